@@ -1,32 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict
 
-from app.schemas.chat import ChatRequest, ChatResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.schemas.chat import (
+    ChatBatchItem,
+    ChatBatchRequest,
+    ChatBatchResponse,
+    ChatRequest,
+    ChatResponse,
+)
 from app.schemas.users import UserOut
+from app.core.config import settings
 from app.core.deps import get_rag_service
 from app.core.security import get_current_user
-from app.services.rag_service import RAGService
+from app.services.rag_service import RAGBatchItem, RAGService
 
 router = APIRouter()
 
 
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _use_cache(request: Request) -> bool:
+    """False when the client sent `Cache-Control: no-cache` or `no-store`."""
+    directives = {
+        directive.strip().lower() for directive in request.headers.get("cache-control", "").split(",")
+    }
+    return not directives & {"no-cache", "no-store"}
+
+
+def _batch_item(item: RAGBatchItem) -> ChatBatchItem:
+    return ChatBatchItem(
+        index=item.index,
+        response=item.text,
+        sources=item.sources,
+        origin=item.origin,
+        error=item.error,
+    )
+
+
 @router.post("/", response_model=ChatResponse)
 async def chat(
     payload: ChatRequest,
+    request: Request,
     current_user: UserOut = Depends(get_current_user),
     rag_service: RAGService = Depends(get_rag_service),
 ) -> ChatResponse:
     """
     Main chat endpoint.
 
-    Receives a user query and returns a RAG-generated response.
+    Receives a user query and returns a RAG-generated response. Pass the
+    returned `conversation_id` back to ask follow-up questions. Send
+    `Cache-Control: no-cache` to bypass the answer caches.
+    """
+    try:
+        result = await rag_service.answer_question(
+            payload.message,
+            payload.retrieval,
+            payload.filters,
+            conversation_id=payload.conversation_id,
+            owner=str(current_user.id),
+            use_cache=_use_cache(request),
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for an identical in-flight request")
+    except Exception as exc:  # pragma: no cover - simple pass-through
+        raise HTTPException(status_code=500, detail=str(exc))
+    return ChatResponse(
+        response=result.text,
+        sources=result.sources,
+        conversation_id=result.conversation_id,
+        timestamp=result.timestamp,
+        origin=result.origin,
+        timings=result.timings,
+    )
+
+
+@router.post("/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    request: Request,
+    current_user: UserOut = Depends(get_current_user),
+    rag_service: RAGService = Depends(get_rag_service),
+) -> StreamingResponse:
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Emits a `sources` event first, then one `token` event per generated chunk,
+    and finally a `done` event with `conversation_id`, `timestamp`, `origin`
+    and per-stage `timings`.
+    Generation stops as soon as the client disconnects.
     """
+
+    async def event_stream() -> AsyncIterator[str]:
+        events = rag_service.stream_answer(
+            payload.message,
+            payload.retrieval,
+            payload.filters,
+            conversation_id=payload.conversation_id,
+            owner=str(current_user.id),
+            use_cache=_use_cache(request),
+        )
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                yield _format_sse(event["event"], event["data"])
+        except Exception as exc:  # pragma: no cover - reported to the client
+            yield _format_sse("error", {"detail": str(exc)})
+        finally:
+            # Closing the generator closes the provider stream as well
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch", response_model=ChatBatchResponse)
+async def chat_batch(
+    payload: ChatBatchRequest,
+    request: Request,
+    current_user: UserOut = Depends(get_current_user),
+    rag_service: RAGService = Depends(get_rag_service),
+):
+    """
+    Bulk question answering.
+
+    All messages are embedded in one call and searched with one multi-query
+    Chroma call; LLM calls run with bounded concurrency
+    (`CHAT_BATCH_MAX_CONCURRENCY`). Failures are reported per item in
+    `error`. With `stream: true` the results are sent as NDJSON, one
+    `ChatBatchItem` per line in completion order.
+    """
+    if len(payload.messages) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.CHAT_BATCH_MAX_ITEMS} messages per batch",
+        )
+
+    if payload.stream:
+
+        async def ndjson_stream() -> AsyncIterator[str]:
+            items = rag_service.stream_batch(
+                payload.messages,
+                payload.retrieval,
+                payload.filters,
+                use_cache=_use_cache(request),
+            )
+            try:
+                async for item in items:
+                    if await request.is_disconnected():
+                        break
+                    yield _batch_item(item).model_dump_json() + "\n"
+            except Exception as exc:  # pragma: no cover - reported to the client
+                yield json.dumps({"error": str(exc)}) + "\n"
+            finally:
+                await items.aclose()
+
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
     try:
-        result = await rag_service.answer_question(payload.message)
-        return ChatResponse(
-            response=result.text,
-            sources=result.sources,
-            conversation_id=result.conversation_id,
-            timestamp=result.timestamp,
+        result = await rag_service.answer_batch(
+            payload.messages,
+            payload.retrieval,
+            payload.filters,
+            use_cache=_use_cache(request),
         )
     except Exception as exc:  # pragma: no cover - simple pass-through
         raise HTTPException(status_code=500, detail=str(exc))
+    return ChatBatchResponse(
+        results=[_batch_item(item) for item in result.items],
+        timings=result.timings,
+    )
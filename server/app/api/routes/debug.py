@@ -1,6 +1,15 @@
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
-from app.core.deps import get_vector_store_collection, get_embedding_model
+from app.core.config import settings
+from app.core.deps import (
+    get_embedding_model,
+    get_indexing_embedding_model,
+    get_llm_client,
+    get_qa_indexing_service,
+    get_rag_service,
+    get_vector_store_collection,
+)
 from app.core.security import get_current_user
 from app.schemas.users import UserOut
 
@@ -64,6 +73,15 @@ async def inspect_vector_store(
 async def test_query(
     query: str = Query(..., description="Test query to see what gets retrieved"),
     top_k: int = Query(3, ge=1, le=10),
+    mmr_lambda: Optional[float] = Query(None, ge=0.0, le=1.0, description="Enable MMR with this relevance/diversity trade-off"),
+    fetch_k: int = Query(20, ge=1, le=200, description="Candidates fetched before MMR selection"),
+    source: Optional[List[str]] = Query(None, description="Only search these sources (repeatable)"),
+    type: Optional[List[str]] = Query(None, description="Only search these types: document, qa_pair, question (repeatable)"),
+    solved_only: bool = Query(False, description="Only solved Q&A threads (documents unaffected)"),
+    indexed_after: Optional[datetime] = Query(None),
+    indexed_before: Optional[datetime] = Query(None),
+    max_distance: Optional[float] = Query(None, ge=0.0, description="Drop chunks farther than this distance"),
+    distance_gap: Optional[float] = Query(None, ge=0.0, description="Cut results at the first distance jump larger than this"),
     current_user: UserOut = Depends(get_current_user),
     collection = Depends(get_vector_store_collection),
     embedding_model = Depends(get_embedding_model),
@@ -72,10 +90,27 @@ async def test_query(
     Test a query and see what documents are retrieved from the vector store.
     Useful for debugging why certain content isn't being found.
     """
-    from app.infra.vector_store import search_similar_documents
+    from app.infra.embeddings import generate_embedding
+    from app.infra.metadata_filters import build_where
+    from app.infra.retrieval import RetrievalParams, dense_search
     
     try:
-        results = search_similar_documents(query, collection, embedding_model, top_k)
+        where = build_where(
+            sources=source,
+            types=type,
+            solved_only=solved_only,
+            indexed_after=indexed_after,
+            indexed_before=indexed_before,
+        )
+        params = RetrievalParams(
+            mmr_lambda=mmr_lambda,
+            mmr_fetch_k=fetch_k,
+            where=where,
+            max_distance=max_distance,
+            distance_gap=distance_gap,
+        )
+        query_embedding = generate_embedding(query, embedding_model)
+        results = dense_search(query_embedding, collection, top_k, params)
         
         formatted_results = []
         for result in results:
@@ -84,11 +119,16 @@ async def test_query(
                 "content_length": len(result["content"]),
                 "metadata": result.get("metadata", {}),
                 "id": result.get("id"),
+                "distance": result.get("distance"),
             })
         
         return {
             "query": query,
             "top_k": top_k,
+            "mmr_lambda": mmr_lambda,
+            "where": where,
+            "max_distance": max_distance,
+            "distance_gap": distance_gap,
             "results_count": len(formatted_results),
             "results": formatted_results,
         }
@@ -135,4 +175,157 @@ async def vector_store_stats(
             "types": type_counts,
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+@router.get("/semantic-cache/stats")
+async def semantic_cache_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get hit/miss statistics of the semantic answer cache.
+    """
+    stats = rag_service.cache_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/completion-cache/stats")
+async def completion_cache_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get hit/miss statistics of the exact LLM completion cache.
+    """
+    stats = rag_service.completion_cache_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/embeddings/batcher")
+async def embedding_batcher_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get batch-size and queue-wait metrics of the query embedding micro-batcher.
+    """
+    stats = rag_service.embedding_batcher_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/embeddings/cache")
+async def embedding_cache_stats(
+    current_user: UserOut = Depends(get_current_user),
+    embedding_model = Depends(get_indexing_embedding_model),
+):
+    """
+    Get hit/miss statistics of the persistent embedding cache used for indexing.
+    """
+    from app.infra.embedding_cache import CachedEmbeddingModel
+
+    if not isinstance(embedding_model, CachedEmbeddingModel):
+        return {"enabled": False}
+    return {"enabled": True, "model_id": embedding_model.model_id, **embedding_model.cache.stats()}
+
+
+@router.post("/qa/reindex")
+def reindex_all_questions(
+    current_user: UserOut = Depends(get_current_user),
+    qa_indexing = Depends(get_qa_indexing_service),
+):
+    """
+    Re-index every Q&A thread in batches (backfill after model or format changes).
+
+    A plain `def` so the long-running backfill runs in the threadpool.
+    """
+    indexed = qa_indexing.reindex_all_questions(batch_size=settings.INGEST_BATCH_SIZE)
+    return {"indexed": indexed}
+
+
+@router.get("/single-flight/stats")
+async def single_flight_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get request coalescing counters (`coalesced` = pipeline runs saved).
+    """
+    stats = rag_service.single_flight_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/conversations/stats")
+async def conversation_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get conversation memory statistics (stored conversations, summary folds).
+    """
+    stats = rag_service.conversation_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/qa-fast-path/stats")
+async def qa_fast_path_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get how often questions were answered from accepted Q&A answers.
+    """
+    stats = rag_service.qa_fast_path_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/llm/router")
+async def llm_router_stats(
+    current_user: UserOut = Depends(get_current_user),
+    llm_client = Depends(get_llm_client),
+):
+    """
+    Get per-provider latency / error EWMAs, health and hedge counters of the LLM router.
+    """
+    from app.infra.llm_router import RoutedChatModel
+
+    if not isinstance(llm_client, RoutedChatModel):
+        return {"enabled": False}
+    return {"enabled": True, **llm_client.router.stats()}
+
+
+@router.get("/reranker/stats")
+async def reranker_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get score cache statistics of the cross-encoder reranker.
+    """
+    stats = rag_service.reranker_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@router.get("/context-packing/stats")
+async def context_packing_stats(
+    current_user: UserOut = Depends(get_current_user),
+    rag_service = Depends(get_rag_service),
+):
+    """
+    Get cumulative prompt token savings from context packing.
+    """
+    return rag_service.context_packing_stats()
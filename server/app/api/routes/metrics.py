@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.infra.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_metrics()
+    # Passed as a header so Starlette does not append a second charset
+    return Response(content=payload, headers={"Content-Type": content_type})
@@ -21,6 +21,7 @@ def init_db() -> None:
   from app.models.question import Question  # noqa: F401
   from app.models.answer import Answer  # noqa: F401
   from app.models.vote import Vote  # noqa: F401
+  from app.models.conversation import Conversation  # noqa: F401
   
   Base.metadata.create_all(bind=engine)
 
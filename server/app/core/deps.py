@@ -1,42 +1,247 @@
 from functools import lru_cache
+import os
+from typing import Optional
 
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import SessionLocal
-from app.infra.rag_engine import initialize_llm
-from app.infra.vector_store import initialize_vector_store
+from app.infra.rag_engine import initialize_llm_client
+from app.infra.vector_store import QA_TITLE_COLLECTION, initialize_vector_store, open_collection
 from app.infra.embeddings import initialize_embedding_model
+from app.infra.completion_cache import CompletionCache
+from app.infra.conversation_store import InMemoryConversationStore, SQLConversationStore
+from app.infra.embedding_batcher import EmbeddingBatcher
+from app.infra.embedding_cache import CachedEmbeddingModel, EmbeddingCache
+from app.infra.embedding_pool import EmbeddingProcessPool
+from app.infra.lexical_index import LexicalIndex
+from app.infra.parent_store import ParentStore
+from app.infra.reranker import Reranker, initialize_reranker
+from app.infra.single_flight import SingleFlight
+from app.services.conversation_service import ConversationService
 from app.services.rag_service import RAGService
 from app.services.storage_service import StorageService
 from app.services.document_service import DocumentService
+from app.services.semantic_cache_service import SemanticCacheService
 from app.services.user_service import UserService
 
 
+@lru_cache
+def get_vector_store():
+    """
+    Lazily initialize and cache the ChromaDB client and document collection.
+    """
+    return initialize_vector_store(
+        persist_directory=settings.VECTOR_DB_PATH,
+        space=settings.VECTOR_DB_SPACE,
+    )
+
+
 @lru_cache
 def get_vector_store_collection():
     """
     Lazily initialize and cache the ChromaDB collection.
     """
-    client, collection = initialize_vector_store(persist_directory=settings.VECTOR_DB_PATH)
+    client, collection = get_vector_store()
     return collection
 
 
+@lru_cache
+def get_qa_title_collection():
+    """
+    Collection of solved Q&A thread titles for the accepted-answer fast path
+    (None when the fast path is disabled).
+    """
+    if not settings.QA_FAST_PATH_ENABLED:
+        return None
+    client, _ = get_vector_store()
+    return open_collection(client, QA_TITLE_COLLECTION, settings.VECTOR_DB_SPACE)
+
+
 @lru_cache
 def get_embedding_model():
     """
     Lazily initialize and cache the embedding model.
     """
-    return initialize_embedding_model(model_name=settings.EMBEDDING_MODEL)
+    return initialize_embedding_model(
+        model_name=settings.EMBEDDING_MODEL,
+        backend=settings.EMBEDDING_BACKEND,
+        model_dir=settings.EMBEDDING_MODEL_DIR,
+        onnx_file=settings.EMBEDDING_ONNX_FILE,
+    )
+
+
+@lru_cache
+def get_embedding_pool() -> Optional[EmbeddingProcessPool]:
+    """
+    Start the multi-process embedding pool for bulk indexing (None when disabled).
+    """
+    if settings.EMBEDDING_POOL_WORKERS <= 0:
+        return None
+    return EmbeddingProcessPool(
+        settings.EMBEDDING_MODEL,
+        workers=settings.EMBEDDING_POOL_WORKERS,
+        torch_threads=settings.EMBEDDING_POOL_TORCH_THREADS,
+        min_batch=settings.EMBEDDING_POOL_MIN_BATCH,
+        backend=settings.EMBEDDING_BACKEND,
+        model_dir=settings.EMBEDDING_MODEL_DIR,
+        onnx_file=settings.EMBEDDING_ONNX_FILE,
+    )
+
+
+@lru_cache
+def get_indexing_embedding_model():
+    """
+    Embedding model used for indexing: backed by the persistent embedding
+    cache when it is enabled, so unchanged text is not re-embedded.
+
+    Queries keep using `get_embedding_model` so one-off questions do not
+    evict document vectors. With `EMBEDDING_POOL_WORKERS`, cache misses are
+    embedded by the process pool.
+    """
+    model = get_embedding_pool() or get_embedding_model()
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return model
+    os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+    cache = EmbeddingCache(
+        os.path.join(settings.VECTOR_DB_PATH, settings.EMBEDDING_CACHE_FILENAME),
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+    # Anything that changes the vectors must change the identity
+    model_id = ":".join(
+        str(part)
+        for part in (
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_BACKEND,
+            settings.EMBEDDING_MODEL_DIR or "",
+            settings.EMBEDDING_ONNX_FILE or "",
+        )
+    )
+    return CachedEmbeddingModel(model, cache, model_id)
+
+
+@lru_cache
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """
+    Lazily load (or bootstrap from Chroma) the BM25 index used for hybrid search.
+    """
+    if not settings.HYBRID_SEARCH_ENABLED:
+        return None
+    return LexicalIndex.load(
+        os.path.join(settings.VECTOR_DB_PATH, settings.LEXICAL_INDEX_FILENAME),
+        collection=get_vector_store_collection(),
+    )
+
+
+@lru_cache
+def get_parent_store() -> Optional[ParentStore]:
+    """
+    Open the parent window store (None when parent/child indexing is disabled).
+    """
+    if not settings.PARENT_CHILD_ENABLED:
+        return None
+    os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+    return ParentStore(os.path.join(settings.VECTOR_DB_PATH, settings.PARENT_STORE_FILENAME))
+
+
+@lru_cache
+def get_reranker() -> Optional[Reranker]:
+    """
+    Lazily load the cross-encoder reranker (None when reranking is disabled).
+    """
+    if not settings.RERANK_ENABLED:
+        return None
+    return initialize_reranker(
+        model_name=settings.RERANK_MODEL,
+        cache_size=settings.RERANK_CACHE_SIZE,
+    )
+
+
+@lru_cache
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """
+    Provide the shared query-embedding micro-batcher (None when disabled).
+    """
+    if not settings.EMBEDDING_BATCHING_ENABLED:
+        return None
+    return EmbeddingBatcher(
+        embedding_model=get_embedding_model(),
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        max_inflight_batches=settings.EMBEDDING_EXECUTOR_WORKERS,
+    )
 
 
 @lru_cache
 def get_llm_client():
     """
     Lazily initialize and cache the LLM client (Gemini / OpenAI via LangChain).
+
+    When a fallback provider is configured this is a `RoutedChatModel`.
+    """
+    return initialize_llm_client()
+
+
+@lru_cache
+def get_semantic_cache() -> Optional[SemanticCacheService]:
+    """
+    Provide the process-wide semantic answer cache (None when disabled).
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    return SemanticCacheService(
+        similarity_threshold=settings.SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    )
+
+
+@lru_cache
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    Open the exact LLM completion cache (None when it is disabled).
     """
-    return initialize_llm()
+    if not settings.COMPLETION_CACHE_ENABLED:
+        return None
+    os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+    return CompletionCache(
+        os.path.join(settings.VECTOR_DB_PATH, settings.COMPLETION_CACHE_FILENAME),
+        max_entries=settings.COMPLETION_CACHE_MAX_ENTRIES,
+    )
+
+
+@lru_cache
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Provide the chat request coalescer (None when single-flight is disabled).
+    """
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return None
+    return SingleFlight(wait_timeout=settings.SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS)
+
+
+@lru_cache
+def get_conversation_service() -> Optional[ConversationService]:
+    """
+    Provide the chat conversation memory (None when it is disabled).
+    """
+    if not settings.CONVERSATION_MEMORY_ENABLED:
+        return None
+    if settings.CONVERSATION_BACKEND.lower() == "database":
+        store = SQLConversationStore(SessionLocal, ttl_seconds=settings.CONVERSATION_TTL_SECONDS)
+    else:
+        store = InMemoryConversationStore(
+            max_entries=settings.CONVERSATION_MAX_ENTRIES,
+            ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        )
+    return ConversationService(
+        store,
+        get_llm_client(),
+        max_recent_turns=settings.CONVERSATION_MAX_RECENT_TURNS,
+        turn_max_chars=settings.CONVERSATION_TURN_MAX_CHARS,
+        summary_max_chars=settings.CONVERSATION_SUMMARY_MAX_CHARS,
+    )
 
 
 @lru_cache
@@ -50,6 +255,18 @@ def get_rag_service() -> RAGService:
         llm_client=get_llm_client(),
         top_k=settings.TOP_K_RETRIEVAL,
         temperature=settings.LLM_TEMPERATURE,
+        answer_cache=get_semantic_cache(),
+        embedding_batcher=get_embedding_batcher(),
+        lexical_index=get_lexical_index(),
+        reranker=get_reranker(),
+        single_flight=get_single_flight(),
+        parent_store=get_parent_store(),
+        qa_fast_path_min_similarity=(
+            settings.QA_FAST_PATH_MIN_SIMILARITY if settings.QA_FAST_PATH_ENABLED else None
+        ),
+        qa_title_collection=get_qa_title_collection(),
+        conversations=get_conversation_service(),
+        completion_cache=get_completion_cache(),
     )
 
 
@@ -69,7 +286,10 @@ def get_document_service() -> DocumentService:
     return DocumentService(
         storage=get_storage_service(),
         collection=get_vector_store_collection(),
-        embedding_model=get_embedding_model(),
+        embedding_model=get_indexing_embedding_model(),
+        answer_cache=get_semantic_cache(),
+        lexical_index=get_lexical_index(),
+        parent_store=get_parent_store(),
     )
 
 
@@ -93,8 +313,18 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:
 def get_qa_indexing_service(
     db: Session = Depends(get_db),
     collection = Depends(get_vector_store_collection),
-    embedding_model = Depends(get_embedding_model),
+    embedding_model = Depends(get_indexing_embedding_model),
+    answer_cache = Depends(get_semantic_cache),
+    lexical_index = Depends(get_lexical_index),
+    title_collection = Depends(get_qa_title_collection),
 ):
     """Provide a QA indexing service per request."""
     from app.services.qa_indexing_service import QAIndexingService
-    return QAIndexingService(db, collection, embedding_model)
+    return QAIndexingService(
+        db,
+        collection,
+        embedding_model,
+        answer_cache=answer_cache,
+        lexical_index=lexical_index,
+        title_collection=title_collection,
+    )
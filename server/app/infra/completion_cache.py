@@ -0,0 +1,141 @@
+"""
+Exact-match cache of LLM completions.
+
+A completion is keyed by a SHA-256 of the formatted prompt messages (which
+include the question, the retrieved context and the prompt template), the
+model identity and the temperature, so a hit is only ever served for a
+byte-identical request. Unlike the semantic answer cache there is no
+similarity threshold to tune: a changed document changes the prompt and
+therefore the key.
+
+Entries live in a SQLite file next to the vector DB, so they survive
+restarts and are shared by every worker on the host. The cache is bounded
+to `max_entries`; the least recently used entries are evicted.
+
+Cache hits are returned as `CachedCompletion`, a `str` subclass, so callers
+can tell them apart from fresh completions.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class CachedCompletion(str):
+    """A completion served from the `CompletionCache`."""
+
+
+def model_fingerprint(llm_client: Any) -> str:
+    """Identify the provider and model behind a chat model (all providers for a router)."""
+    router = getattr(llm_client, "router", None)
+    if router is not None:
+        return "routed[" + ",".join(model_fingerprint(provider.model) for provider in router.providers) + "]"
+    llm_type = getattr(llm_client, "_llm_type", type(llm_client).__name__)
+    model = getattr(llm_client, "model_name", None) or getattr(llm_client, "model", None)
+    return f"{llm_type}:{model}" if model else str(llm_type)
+
+
+def completion_key(prompt_messages: List[Any], llm_client: Any, temperature: Optional[float]) -> str:
+    """Stable hash of the formatted messages and model parameters."""
+    payload = {
+        "messages": [[getattr(message, "type", ""), getattr(message, "content", message)] for message in prompt_messages],
+        "model": model_fingerprint(llm_client),
+        "temperature": temperature,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """SQLite-backed LRU of completions."""
+
+    def __init__(self, path: str, max_entries: int = 10000, prune_every: int = 100) -> None:
+        self._max_entries = max_entries
+        # The table is trimmed to `max_entries` on every `prune_every`-th store
+        self._prune_every = max(prune_every, 1)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        # WAL lets other workers read while one of them writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CachedCompletion]:
+        """Look up completions by key; misses are absent from the result."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT key, text FROM completions WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE completions SET last_used = ? WHERE key IN ({','.join('?' for _ in rows)})",
+                    [time.time(), *(row[0] for row in rows)],
+                )
+            self._hits += len(rows)
+            self._misses += len(keys) - len(rows)
+        return {key: CachedCompletion(text) for key, text in rows}
+
+    def get(self, key: str) -> Optional[CachedCompletion]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        """Store completions (`key -> text`), evicting the least recently used beyond `max_entries`."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO completions (key, text, created_at, last_used) VALUES (?, ?, ?, ?)",
+                [(key, str(text), now, now) for key, text in items.items()],
+            )
+            previous = self._stores
+            self._stores += len(items)
+            if previous // self._prune_every != self._stores // self._prune_every:
+                self._prune()
+
+    def put(self, key: str, text: str) -> None:
+        self.put_many({key: text})
+
+    def _prune(self) -> None:
+        self._conn.execute(
+            "DELETE FROM completions WHERE key IN ("
+            " SELECT key FROM completions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "stores": self._stores,
+        }
@@ -0,0 +1,142 @@
+"""
+Context assembly for the prompt.
+
+Chunks produced by `split_text_into_chunks` overlap by `CHUNK_OVERLAP`
+characters, so adjacent chunks retrieved together repeat text in the
+prompt. This module:
+
+- merges runs of adjacent chunks (same `source`, consecutive `chunk_index`)
+  into one passage, dropping the overlapping span
+- drops exact duplicate passages
+- packs the passages, most relevant first, into a token budget
+
+Token counts are estimated from character length (no tokenizer dependency),
+which is accurate enough for budgeting.
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Rough token estimate for budgeting."""
+    return int(math.ceil(len(text) / max(chars_per_token, 1.0)))
+
+
+def _overlap_length(left: str, right: str, max_overlap: int) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    upper = min(max_overlap, len(left), len(right))
+    # The common case is an exact CHUNK_OVERLAP-sized overlap; check it first
+    if upper and left.endswith(right[:upper]):
+        return upper
+    for size in range(upper - 1, 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _chunk_index(chunk: Dict[str, Any]) -> Any:
+    try:
+        return int(chunk.get("metadata", {}).get("chunk_index"))
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_adjacent_chunks(
+    chunks: List[Dict[str, Any]],
+    max_overlap: int = 200,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Merge runs of adjacent chunks from the same source.
+
+    The input order is treated as relevance order; a merged passage takes the
+    rank of its most relevant member. Returns `(passages, merged_count)`
+    where `merged_count` is the number of chunks folded into another one.
+    """
+    # (rank, chunk) per source for chunks that know their position
+    by_source: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+    passages: List[Tuple[int, Dict[str, Any]]] = []
+    for rank, chunk in enumerate(chunks):
+        source = chunk.get("metadata", {}).get("source")
+        if source is None or _chunk_index(chunk) is None:
+            passages.append((rank, chunk))
+        else:
+            by_source.setdefault(source, []).append((rank, chunk))
+
+    merged_count = 0
+    for members in by_source.values():
+        members.sort(key=lambda item: _chunk_index(item[1]))
+        run_rank, run_chunk = members[0]
+        run_content = run_chunk["content"]
+        run_last_index = _chunk_index(run_chunk)
+        for rank, chunk in members[1:]:
+            index = _chunk_index(chunk)
+            if index == run_last_index:
+                merged_count += 1  # same chunk retrieved twice
+                run_rank = min(run_rank, rank)
+                continue
+            if index == run_last_index + 1:
+                overlap = _overlap_length(run_content, chunk["content"], max_overlap)
+                run_content += chunk["content"][overlap:]
+                run_rank = min(run_rank, rank)
+                run_last_index = index
+                merged_count += 1
+                continue
+            passages.append((run_rank, {**run_chunk, "content": run_content}))
+            run_rank, run_chunk, run_content, run_last_index = rank, chunk, chunk["content"], index
+        passages.append((run_rank, {**run_chunk, "content": run_content}))
+
+    passages.sort(key=lambda item: item[0])
+    return [passage for _, passage in passages], merged_count
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    token_budget: int,
+    max_overlap: int = 200,
+    chars_per_token: float = 4.0,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Merge, de-duplicate and pack chunks (ordered by relevance) into a budget.
+
+    Passages that do not fit are skipped so smaller, less relevant ones can
+    still use the remaining budget; if even the most relevant passage does
+    not fit, it is truncated. Returns `(packed_chunks, stats)` where stats
+    contains `input_tokens`, `output_tokens`, `tokens_saved`,
+    `merged_chunks`, `duplicate_chunks` and `dropped_chunks`.
+    """
+    input_tokens = sum(estimate_tokens(chunk["content"], chars_per_token) for chunk in chunks)
+    passages, merged_count = merge_adjacent_chunks(chunks, max_overlap)
+
+    seen_contents = set()
+    unique_passages: List[Dict[str, Any]] = []
+    for passage in passages:
+        if passage["content"] in seen_contents:
+            continue
+        seen_contents.add(passage["content"])
+        unique_passages.append(passage)
+    duplicate_count = len(passages) - len(unique_passages)
+
+    packed: List[Dict[str, Any]] = []
+    used_tokens = 0
+    dropped = 0
+    for passage in unique_passages:
+        tokens = estimate_tokens(passage["content"], chars_per_token)
+        if used_tokens + tokens <= token_budget:
+            packed.append(passage)
+            used_tokens += tokens
+        elif not packed and token_budget > 0:
+            max_chars = int(token_budget * chars_per_token)
+            packed.append({**passage, "content": passage["content"][:max_chars]})
+            used_tokens = estimate_tokens(packed[0]["content"], chars_per_token)
+        else:
+            dropped += 1
+
+    return packed, {
+        "input_tokens": input_tokens,
+        "output_tokens": used_tokens,
+        "tokens_saved": input_tokens - used_tokens,
+        "merged_chunks": merged_count,
+        "duplicate_chunks": duplicate_count,
+        "dropped_chunks": dropped,
+    }
@@ -0,0 +1,237 @@
+"""
+Storage backends for chat conversation state.
+
+A conversation is a rolling summary of older turns plus the most recent
+turns verbatim (see `services.conversation_service.ConversationService`).
+Two interchangeable backends are provided:
+
+- `InMemoryConversationStore`: per-process LRU with an idle TTL
+- `SQLConversationStore`: the `conversations` table of the application
+  database (PostgreSQL), shared by all workers
+
+Idle conversations expire after `ttl_seconds` in both backends.
+
+Writers go through `update`, which re-reads the stored state and applies
+the change atomically (under a lock in memory, with `SELECT ... FOR UPDATE`
+in the database), so an exchange recorded by another request or worker
+while a summary was being generated is not lost.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models.conversation import Conversation
+
+
+@dataclass
+class ConversationState:
+    conversation_id: str
+    # Id of the user who started the conversation
+    owner: Optional[str] = None
+    # Rolling summary of turns that are no longer kept verbatim
+    summary: str = ""
+    # Recent turns: {"role": "user" | "assistant", "content": ...}
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.summary or self.turns)
+
+
+class ConversationStore:
+    """Interface of conversation backends."""
+
+    # True when calls block on I/O and should run off the event loop
+    blocking = False
+
+    def get(self, conversation_id: str) -> Optional[ConversationState]:
+        """Return the conversation, or None when it is unknown or expired."""
+        raise NotImplementedError
+
+    def save(self, state: ConversationState) -> None:
+        raise NotImplementedError
+
+    def update(
+        self,
+        conversation_id: str,
+        mutate: Callable[[Optional[ConversationState]], Optional[ConversationState]],
+    ) -> Optional[ConversationState]:
+        """
+        Atomically read, change and save one conversation.
+
+        `mutate` gets the current state (None when unknown or expired) and
+        returns the state to save, or None to leave the conversation as is.
+        Returns what was saved.
+        """
+        raise NotImplementedError
+
+    def delete(self, conversation_id: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryConversationStore(ConversationStore):
+    """LRU of conversations kept in process memory."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._expired = 0
+        self._evicted = 0
+
+    def get(self, conversation_id: str) -> Optional[ConversationState]:
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is None:
+                return None
+            if time.time() - state.updated_at > self._ttl_seconds:
+                del self._states[conversation_id]
+                self._expired += 1
+                return None
+            self._states.move_to_end(conversation_id)
+            # Callers get a copy so they cannot mutate the stored state
+            return replace(state, turns=list(state.turns))
+
+    def save(self, state: ConversationState) -> None:
+        with self._lock:
+            self._save_locked(state)
+
+    def _save_locked(self, state: ConversationState) -> None:
+        self._states[state.conversation_id] = replace(state, turns=list(state.turns), updated_at=time.time())
+        self._states.move_to_end(state.conversation_id)
+        while len(self._states) > self._max_entries:
+            self._states.popitem(last=False)
+            self._evicted += 1
+
+    def update(
+        self,
+        conversation_id: str,
+        mutate: Callable[[Optional[ConversationState]], Optional[ConversationState]],
+    ) -> Optional[ConversationState]:
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is not None and time.time() - state.updated_at > self._ttl_seconds:
+                del self._states[conversation_id]
+                self._expired += 1
+                state = None
+            updated = mutate(replace(state, turns=list(state.turns)) if state is not None else None)
+            if updated is not None:
+                self._save_locked(updated)
+            return updated
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._states.pop(conversation_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "conversations": len(self._states),
+                "max_entries": self._max_entries,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
+
+
+class SQLConversationStore(ConversationStore):
+    """Conversations persisted in the application database."""
+
+    blocking = True
+
+    def __init__(self, session_factory: Callable[[], Any], ttl_seconds: float = 3600.0, purge_every: int = 100) -> None:
+        self._session_factory = session_factory
+        self._ttl_seconds = ttl_seconds
+        # Expired rows are deleted on every `purge_every`-th save
+        self._purge_every = max(purge_every, 1)
+        self._saves = 0
+
+    @staticmethod
+    def _utcnow() -> datetime:
+        # Stored as naive UTC (the column has no time zone)
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _cutoff(self) -> datetime:
+        return self._utcnow() - timedelta(seconds=self._ttl_seconds)
+
+    def _to_state(self, row: Optional[Conversation]) -> Optional[ConversationState]:
+        if row is None:
+            return None
+        updated_at = row.updated_at.replace(tzinfo=None)
+        if updated_at < self._cutoff():
+            return None
+        return ConversationState(
+            conversation_id=row.id,
+            owner=row.owner,
+            summary=row.summary or "",
+            turns=json.loads(row.turns or "[]"),
+            updated_at=updated_at.replace(tzinfo=timezone.utc).timestamp(),
+        )
+
+    def get(self, conversation_id: str) -> Optional[ConversationState]:
+        with self._session_factory() as db:
+            return self._to_state(db.get(Conversation, conversation_id))
+
+    def _write(self, db: Any, state: ConversationState) -> None:
+        db.merge(
+            Conversation(
+                id=state.conversation_id,
+                owner=state.owner,
+                summary=state.summary,
+                turns=json.dumps(state.turns),
+                updated_at=self._utcnow(),
+            )
+        )
+        self._saves += 1
+        if self._saves % self._purge_every == 0:
+            db.query(Conversation).filter(Conversation.updated_at < self._cutoff()).delete()
+        db.commit()
+
+    def save(self, state: ConversationState) -> None:
+        with self._session_factory() as db:
+            self._write(db, state)
+
+    def update(
+        self,
+        conversation_id: str,
+        mutate: Callable[[Optional[ConversationState]], Optional[ConversationState]],
+    ) -> Optional[ConversationState]:
+        with self._session_factory() as db:
+            # The row lock is held until the commit in `_write` (or the rollback)
+            row = (
+                db.query(Conversation)
+                .filter(Conversation.id == conversation_id)
+                .with_for_update()
+                .one_or_none()
+            )
+            updated = mutate(self._to_state(row))
+            if updated is None:
+                db.rollback()
+                return None
+            try:
+                self._write(db, updated)
+            except IntegrityError:
+                # Another worker inserted the same new conversation first
+                db.rollback()
+                return None
+            return updated
+
+    def delete(self, conversation_id: str) -> None:
+        with self._session_factory() as db:
+            db.query(Conversation).filter(Conversation.id == conversation_id).delete()
+            db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "database"}
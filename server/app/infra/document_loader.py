@@ -3,14 +3,20 @@ Document loading and processing utilities.
 
 Responsible for:
 - Loading text files from disk
-- Splitting text into chunks with overlap
+- Splitting text into chunks with overlap (eagerly or lazily, for
+  streaming ingestion of large files)
+- Splitting text into parent windows and child chunks (parent/child mode)
 - Extracting text from PDFs
 - Validating uploaded files
 """
 
-from typing import List, Dict, Optional, Tuple, Any
+from typing import Iterator, List, Dict, Optional, Tuple, Any
 from pathlib import Path
 from io import BytesIO
+import hashlib
+
+from app.infra.metrics import timed_stage
+from app.infra.parent_store import parent_id
 
 try:
     from PyPDF2 import PdfReader
@@ -50,14 +56,20 @@ def split_text_into_chunks(
     """
     Split text into overlapping character-based chunks.
     """
-    chunks: List[str] = []
+    return list(iter_text_chunks(text, chunk_size, chunk_overlap))
+
+
+def iter_text_chunks(
+    text: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+) -> Iterator[str]:
+    """Lazy variant of `split_text_into_chunks`."""
     start = 0
     while start < len(text):
         end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
+        yield text[start:end]
         start += max(chunk_size - chunk_overlap, 1)
-    return chunks
 
 
 def process_documents(
@@ -94,22 +106,99 @@ def process_uploaded_file(
     """
     Process an uploaded file's text content into chunks with metadata.
     """
-    chunks: List[Dict[str, Any]] = []
-    doc_chunks = split_text_into_chunks(file_content, chunk_size, chunk_overlap)
-    for idx, chunk in enumerate(doc_chunks):
-        chunks.append(
-            {
-                "content": chunk,
-                "metadata": {
-                    "source": filename,
-                    "chunk_index": idx,
-                    "upload_type": "file_upload",
-                },
-            }
+    return list(iter_uploaded_file_chunks(file_content, filename, chunk_size, chunk_overlap))
+
+
+def iter_uploaded_file_chunks(
+    file_content: str,
+    filename: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazy variant of `process_uploaded_file`: chunks are produced as they are
+    consumed, so only the text itself has to fit in memory.
+    """
+    for idx, chunk in enumerate(iter_text_chunks(file_content, chunk_size, chunk_overlap)):
+        yield {
+            "content": chunk,
+            "metadata": {
+                "source": filename,
+                "chunk_index": idx,
+                "upload_type": "file_upload",
+            },
+        }
+
+
+def estimate_chunk_count(text_length: int, chunk_size: int = 1000, chunk_overlap: int = 200) -> int:
+    """Number of chunks `iter_text_chunks` yields for a text of `text_length` characters."""
+    step = max(chunk_size - chunk_overlap, 1)
+    return (text_length + step - 1) // step
+
+
+def split_parent_child(
+    text: str,
+    source: str,
+    parent_size: int = 2000,
+    child_size: int = 400,
+    child_overlap: int = 50,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split text into non-overlapping parent windows and small child chunks.
+
+    Children never cross a parent boundary, so each has exactly one parent.
+    Child ids are derived from the source and the child's text (plus an
+    occurrence counter for repeated text), so re-indexing an edited document
+    yields the same ids for unchanged children and their embeddings can be
+    reused. Returns `(parents, children)`; children have the usual
+    `content` / `metadata` shape plus an `id`.
+    """
+    source_key = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+    parents: List[Dict[str, Any]] = []
+    children: List[Dict[str, Any]] = []
+    occurrences: Dict[str, int] = {}
+    for parent_index, start in enumerate(range(0, len(text), max(parent_size, 1))):
+        end = min(start + parent_size, len(text))
+        pid = parent_id(source, start, end)
+        parents.append(
+            {"id": pid, "parent_index": parent_index, "start": start, "end": end, "content": text[start:end]}
         )
-    return chunks
+        for child in split_text_into_chunks(text[start:end], child_size, child_overlap):
+            content_hash = hashlib.sha1(child.encode("utf-8")).hexdigest()
+            occurrence = occurrences.get(content_hash, 0)
+            occurrences[content_hash] = occurrence + 1
+            children.append(
+                {
+                    "id": f"child-{source_key}-{content_hash[:24]}-{occurrence}",
+                    "content": child,
+                    "metadata": {
+                        "source": source,
+                        "chunk_index": len(children),
+                        "parent_id": pid,
+                        "content_hash": content_hash,
+                    },
+                }
+            )
+    return parents, children
+
+
+def process_uploaded_file_parent_child(
+    file_content: str,
+    filename: str,
+    parent_size: int = 2000,
+    child_size: int = 400,
+    child_overlap: int = 50,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Parent/child variant of `process_uploaded_file`; returns `(parents, children)`.
+    """
+    parents, children = split_parent_child(file_content, filename, parent_size, child_size, child_overlap)
+    for child in children:
+        child["metadata"]["upload_type"] = "file_upload"
+    return parents, children
 
 
+@timed_stage("pdf_extract")
 def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     """
     Extract text content from a PDF file.
@@ -0,0 +1,139 @@
+"""
+Micro-batching dispatcher for query embeddings.
+
+Concurrent chat requests each need one query embedding. Encoding them one
+by one means one forward pass per request; this module collects texts for
+at most `max_wait_ms` (or until `max_batch_size` texts are queued), encodes
+them with a single `model.encode` call on the embedding executor, and hands
+each caller its own vector.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.infra.embeddings import generate_embeddings
+from app.infra.executors import run_in_embedding_executor
+
+_QueueItem = Tuple[str, "asyncio.Future[np.ndarray]", float]
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into micro-batches.
+
+    The dispatcher is bound lazily to the running event loop. At most
+    `max_inflight_batches` batches are encoded at the same time so the
+    embedding executor is kept busy without being flooded.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Any,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_inflight_batches: int = 2,
+    ) -> None:
+        self._model = embedding_model
+        self._max_batch_size = max(max_batch_size, 1)
+        self._max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self._max_inflight_batches = max(max_inflight_batches, 1)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[_QueueItem]"] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._encode_time_total = 0.0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed a single text, sharing a model call with concurrent callers."""
+        self._ensure_dispatcher()
+        future: "asyncio.Future[np.ndarray]" = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch-size and queue-wait metrics."""
+        return {
+            "max_batch_size": self._max_batch_size,
+            "max_wait_ms": self._max_wait * 1000.0,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+            "avg_queue_wait_ms": (self._queue_wait_total / self._items * 1000.0) if self._items else 0.0,
+            "max_queue_wait_ms": self._queue_wait_max * 1000.0,
+            "avg_encode_ms": (self._encode_time_total / self._batches * 1000.0) if self._batches else 0.0,
+        }
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._inflight = asyncio.Semaphore(self._max_inflight_batches)
+        self._dispatcher = loop.create_task(self._dispatch_forever())
+
+    async def _dispatch_forever(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._inflight.acquire()
+            self._loop.create_task(self._encode_batch(batch))
+
+    async def _encode_batch(self, batch: List[_QueueItem]) -> None:
+        try:
+            # Callers that were cancelled while waiting do not need a vector
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                return
+
+            started = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                wait = started - enqueued_at
+                self._queue_wait_total += wait
+                self._queue_wait_max = max(self._queue_wait_max, wait)
+
+            try:
+                vectors = await run_in_embedding_executor(
+                    generate_embeddings, [text for text, _, _ in batch], self._model
+                )
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+            self._encode_time_total += time.perf_counter() - started
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            self._inflight.release()
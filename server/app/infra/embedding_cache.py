@@ -0,0 +1,153 @@
+"""
+Persistent cache of text embeddings.
+
+`CachedEmbeddingModel` wraps an embedding model and exposes the same
+`encode` method, so `generate_embeddings` and everything built on it work
+unchanged. Vectors are stored as float32 blobs in a SQLite file keyed by
+SHA-256 of the model identity and the normalized text; only texts that are
+not cached go to the model, in one batch. Re-indexing an unchanged document
+or Q&A thread therefore costs a few SQLite reads instead of a forward pass
+per chunk.
+
+Normalization is Unicode NFC plus collapsing whitespace runs, which does
+not change what the WordPiece tokenizer of the default model sees. The
+model identity must change whenever the vectors would (another model,
+backend or ONNX file), otherwise stale vectors are served.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU of float32 vectors."""
+
+    def __init__(self, path: str, max_entries: int = 100000, prune_every: int = 1000) -> None:
+        self._max_entries = max_entries
+        # The table is trimmed to `max_entries` on every `prune_every`-th stored vector
+        self._prune_every = max(prune_every, 1)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        # WAL lets other workers read while one of them writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Look up vectors by key; misses are absent from the result."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock, self._conn:
+            # Stay below SQLite's bound-parameter limit
+            for offset in range(0, len(keys), 500):
+                part = keys[offset:offset + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' for _ in rows)})",
+                        [time.time(), *(row[0] for row in rows)],
+                    )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store vectors, evicting the least recently used beyond `max_entries`."""
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in vectors.items()
+                ],
+            )
+            previous = self._stores
+            self._stores += len(vectors)
+            if previous // self._prune_every != self._stores // self._prune_every:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "stores": self._stores,
+        }
+
+
+class CachedEmbeddingModel:
+    """Embedding model whose `encode` is served from an `EmbeddingCache` where possible."""
+
+    def __init__(self, model: Any, cache: EmbeddingCache, model_id: str) -> None:
+        self.model = model
+        self.cache = cache
+        self.model_id = model_id
+
+    def encode(self, texts: List[str], **kwargs: Any) -> np.ndarray:
+        # Other encode options (normalization, precision...) change the vectors
+        if kwargs or isinstance(texts, str):
+            return self.model.encode(texts, **kwargs)
+        keys = [embedding_key(self.model_id, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            encoded = np.asarray(self.model.encode(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (dimension, tokenizer, ...) comes from the wrapped model
+        return getattr(self.model, name)
@@ -0,0 +1,137 @@
+"""
+Multi-process embedding for bulk ingestion.
+
+One `SentenceTransformer.encode` call uses a single process, which leaves
+most cores idle during large backfills. `EmbeddingProcessPool` runs the
+model in several worker processes (each loads it once at start-up) and
+exposes the same `encode` method as the model, so it can be passed
+anywhere an embedding model is expected (`generate_embeddings`,
+`add_documents_streaming`, `CachedEmbeddingModel`...).
+
+An `encode` call splits the texts across workers. Each worker writes its
+float32 vectors straight into one shared-memory block allocated by the
+caller, so no vectors are pickled on the way back; only the texts are sent
+to the workers.
+
+Workers are started with the "spawn" method (forking a process that has
+already loaded torch can deadlock), and each is limited to `torch_threads`
+intra-op threads so `workers * torch_threads` can be matched to the cores.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait
+import math
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import os
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+
+# Model of the current worker process (set by `_init_worker`)
+_worker_model: Any = None
+
+
+def _init_worker(
+    model_name: str,
+    backend: str,
+    model_dir: Optional[str],
+    onnx_file: Optional[str],
+    torch_threads: int,
+) -> None:
+    global _worker_model
+    # Must be set before torch / ONNX Runtime create their thread pools
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from app.infra.embeddings import initialize_embedding_model
+
+    _worker_model = initialize_embedding_model(
+        model_name,
+        backend=backend,
+        model_dir=model_dir,
+        onnx_file=onnx_file,
+    )
+
+
+def _worker_dimension() -> int:
+    return int(np.asarray(_worker_model.encode(["dimension probe"])).shape[1])
+
+
+def _encode_into(shm_name: str, rows: int, dim: int, offset: int, texts: List[str]) -> None:
+    """Encode `texts` into rows `offset...` of the caller's shared (rows, dim) float32 block."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((rows, dim), dtype=np.float32, buffer=shm.buf)
+        out[offset:offset + len(texts)] = _worker_model.encode(texts)
+        del out
+    finally:
+        shm.close()
+
+
+class EmbeddingProcessPool:
+    """Process pool with the `encode` interface of an embedding model."""
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        torch_threads: int = 1,
+        min_batch: int = 16,
+        backend: str = "torch",
+        model_dir: Optional[str] = None,
+        onnx_file: Optional[str] = None,
+    ) -> None:
+        self.workers = max(workers, 1)
+        # Fewer texts than this per worker are not worth a round trip
+        self._min_batch = max(min_batch, 1)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, model_dir, onnx_file, max(torch_threads, 1)),
+        )
+        self._dimension: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = self._executor.submit(_worker_dimension).result()
+            return self._dimension
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed `texts` across the workers; returns a (len(texts), dim) float32 array."""
+        texts = list(texts)
+        dim = self.get_sentence_embedding_dimension()
+        if not texts:
+            return np.zeros((0, dim), dtype=np.float32)
+        rows = len(texts)
+        per_task = max(math.ceil(rows / self.workers), self._min_batch)
+        shm = SharedMemory(create=True, size=rows * dim * 4)
+        try:
+            futures = [
+                self._executor.submit(_encode_into, shm.name, rows, dim, offset, texts[offset:offset + per_task])
+                for offset in range(0, rows, per_task)
+            ]
+            # Let every task finish before the block is released, then surface errors
+            wait(futures)
+            for future in futures:
+                future.result()
+            return np.ndarray((rows, dim), dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def warm_up(self) -> None:
+        """Start every worker and load its model (otherwise done lazily on first use)."""
+        self.get_sentence_embedding_dimension()
+        self.encode(["warm up"] * self.workers * self._min_batch)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
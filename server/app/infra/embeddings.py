@@ -3,33 +3,128 @@ Text embedding utilities.
 
 This module provides a thin wrapper around sentence-transformers
 so that the rest of the codebase can depend on a simple interface.
+
+Three CPU backends are available behind the same `encode` interface:
+
+- `torch`: the PyTorch model (default)
+- `onnx`: the model exported to ONNX, run with ONNX Runtime
+- `onnx-int8`: the ONNX model with dynamically int8-quantized weights,
+  the smallest and fastest option at a small accuracy cost
+
+The ONNX backends need `optimum[onnxruntime]` and read the model files from
+a local directory prepared with `export_onnx_model` (see
+`benchmarks/bench_embedding_backends.py --export`), so workers never
+export or download at start-up.
+
+`generate_embeddings` returns a C-contiguous float32 array of unit-length
+rows. Callers (vector store, Q&A indexing, caches, MMR) use it as is;
+conversion to Python lists happens only where a library requires them
+(`vector_store.to_chroma_embeddings`). Because every vector is normalized
+here, once, an inner-product index ranks exactly like cosine similarity.
 """
 
-from typing import List
+import os
+from typing import List, Optional
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from app.infra.metrics import observe_stage
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Quantization preset used by `export_onnx_model` (avx2 runs on any x86-64 CPU
+# of the last decade; "avx512_vnni" or "arm64" suit newer / ARM servers better)
+DEFAULT_QUANTIZATION = "avx2"
+
 
-def initialize_embedding_model(model_name: str = "all-MiniLM-L6-v2"):
+def default_onnx_file(backend: str, quantization: str = DEFAULT_QUANTIZATION) -> str:
+    """Path of the ONNX file for `backend`, relative to the model directory."""
+    if backend == "onnx-int8":
+        return f"onnx/model_qint8_{quantization}.onnx"
+    return "onnx/model.onnx"
+
+
+def initialize_embedding_model(
+    model_name: str = "all-MiniLM-L6-v2",
+    backend: str = "torch",
+    model_dir: Optional[str] = None,
+    onnx_file: Optional[str] = None,
+):
     """
     Initialize the embedding model.
 
     Args:
         model_name: Name of the model to use
+        backend: "torch", "onnx" or "onnx-int8"
+        model_dir: Local directory with the model files; loaded instead of
+            `model_name` (required for the ONNX backends)
+        onnx_file: ONNX file inside `model_dir` (defaults to
+            `default_onnx_file(backend)`)
 
     Returns:
         The embedding model
     """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
     device = 'cpu'
+    if backend != "torch":
+        if not model_dir:
+            raise ValueError(f"The {backend} embedding backend needs EMBEDDING_MODEL_DIR")
+        onnx_file = onnx_file or default_onnx_file(backend)
+        if not os.path.isfile(os.path.join(model_dir, onnx_file)):
+            raise RuntimeError(
+                f"{onnx_file} not found in {model_dir}; export it with "
+                "`python -m benchmarks.bench_embedding_backends --export --model-dir ...`"
+            )
+        return SentenceTransformer(
+            model_dir,
+            device=device,
+            backend="onnx",
+            local_files_only=True,
+            model_kwargs={"file_name": onnx_file},
+        )
     try:
-        model = SentenceTransformer(model_name, device=device)
+        model = SentenceTransformer(model_dir or model_name, device=device)
         # Explicitly move to CPU if needed
         model = model.to(device)
         return model
     except Exception as e:
         # If there's still an issue, try clearing cache and retrying
         raise RuntimeError(f"Failed to load embedding model: {e}. Try clearing cache: rm -rf ~/.cache/huggingface/")
-def generate_embeddings(texts: List[str], model) -> List[List[float]]:
+
+
+def export_onnx_model(
+    model_name: str,
+    model_dir: str,
+    quantization: str = DEFAULT_QUANTIZATION,
+) -> None:
+    """
+    Export `model_name` to `model_dir` for the ONNX backends.
+
+    Writes the sentence-transformers model files plus `onnx/model.onnx` and
+    its dynamically int8-quantized variant `onnx/model_qint8_{quantization}.onnx`.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save_pretrained(model_dir)
+    export_dynamic_quantized_onnx_model(model, quantization, model_dir)
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scale rows of a float32 matrix to unit length.
+
+    Models that already end with a normalization layer (such as the default
+    `all-MiniLM-L6-v2`) produce unit rows; those are returned without a copy.
+    """
+    norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings))
+    if np.abs(norms - 1.0).max() <= 1e-4:
+        return embeddings
+    return embeddings / np.maximum(norms, 1e-12)[:, None]
+
+
+def generate_embeddings(texts: List[str], model) -> np.ndarray:
     """
     Generate embeddings for a list of texts.
 
@@ -38,12 +133,16 @@ def generate_embeddings(texts: List[str], model) -> List[List[float]]:
         model: The embedding model (from initialize_embedding_model)
 
     Returns:
-        List of embedding vectors (each is a list of floats)
+        C-contiguous float32 array of shape (len(texts), dim), rows normalized
     """
-    return model.encode(texts).tolist()
+    with observe_stage("embedding"):
+        embeddings = np.ascontiguousarray(model.encode(texts), dtype=np.float32)
+        if not len(embeddings):
+            return embeddings.reshape(0, embeddings.shape[-1] if embeddings.ndim == 2 else 0)
+        return normalize_embeddings(embeddings)
 
 
-def generate_embedding(text: str, model) -> List[float]:
+def generate_embedding(text: str, model) -> np.ndarray:
     """
     Generate embedding for a single text.
 
@@ -52,8 +151,6 @@ def generate_embedding(text: str, model) -> List[float]:
         model: The embedding model
 
     Returns:
-        Embedding vector as a list of floats
+        Normalized float32 vector of shape (dim,)
     """
     return generate_embeddings([text], model)[0]
-
-
@@ -0,0 +1,69 @@
+"""
+Bounded thread pools for blocking work on the async request path.
+
+The embedding model (CPU-bound, releases the GIL inside torch) and the
+ChromaDB client (synchronous I/O) must never run directly on the event
+loop. Each gets its own small executor so a burst of embedding work cannot
+starve vector store queries and vice versa.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_embedding_executor: Optional[ThreadPoolExecutor] = None
+_vector_store_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Return the shared executor for embedding / model inference work."""
+    global _embedding_executor
+    if _embedding_executor is None:
+        _embedding_executor = ThreadPoolExecutor(
+            max_workers=max(settings.EMBEDDING_EXECUTOR_WORKERS, 1),
+            thread_name_prefix="embedding",
+        )
+    return _embedding_executor
+
+
+def get_vector_store_executor() -> ThreadPoolExecutor:
+    """Return the shared executor for ChromaDB calls."""
+    global _vector_store_executor
+    if _vector_store_executor is None:
+        _vector_store_executor = ThreadPoolExecutor(
+            max_workers=max(settings.VECTOR_STORE_EXECUTOR_WORKERS, 1),
+            thread_name_prefix="vector-store",
+        )
+    return _vector_store_executor
+
+
+async def run_in_embedding_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking embedding call without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_embedding_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_vector_store_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking vector store call without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_vector_store_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executors() -> None:
+    """Shut down the shared executors (called on application shutdown)."""
+    global _embedding_executor, _vector_store_executor
+    if _embedding_executor is not None:
+        _embedding_executor.shutdown(wait=False)
+        _embedding_executor = None
+    if _vector_store_executor is not None:
+        _vector_store_executor.shutdown(wait=False)
+        _vector_store_executor = None
@@ -0,0 +1,153 @@
+"""
+Deterministic local chat model for load testing and CI.
+
+`FakeChatModel` is a LangChain chat model that never touches the network.
+The answer text depends only on the prompt (and `seed`), so runs are
+reproducible; latency, streaming speed and failures are drawn from a
+seeded per-call random stream to mimic a real provider:
+
+- `latency_ms` / `latency_jitter_ms` / `latency_distribution`: time to
+  the first token (`constant`, `uniform`, `normal` or `lognormal`)
+- `tokens_per_second`: generation speed (also paces streaming)
+- `error_rate`: probability that a call raises `FakeLLMError`
+
+Selected with `LLM_PROVIDER=fake` (or `local`).
+"""
+
+import asyncio
+import hashlib
+import itertools
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_VOCABULARY = (
+    "the answer based on context document question community project "
+    "information knowledge base relevant details according to provided "
+    "source section data results system users support example process "
+    "update release configuration service request response time value"
+).split()
+
+# Global call sequence, so repeated identical prompts still vary in latency
+_call_counter = itertools.count()
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure raised by `FakeChatModel`."""
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model with configurable latency, speed and errors."""
+
+    latency_ms: float = 200.0
+    latency_jitter_ms: float = 50.0
+    latency_distribution: str = "normal"
+    tokens_per_second: float = 50.0
+    response_tokens: int = 64
+    error_rate: float = 0.0
+    seed: int = 0
+    # Accepted so per-request temperatures work; it does not change the output
+    temperature: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _prompt_key(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(f"{message.type}:{message.content}" for message in messages)
+        return hashlib.sha256(f"{self.seed}\n{text}".encode("utf-8")).hexdigest()
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        rng = random.Random(self._prompt_key(messages))
+        words = [rng.choice(_VOCABULARY) for _ in range(max(self.response_tokens, 1))]
+        return [words[0]] + [f" {word}" for word in words[1:]]
+
+    def _call_rng(self, messages: List[BaseMessage]) -> random.Random:
+        return random.Random(f"{self._prompt_key(messages)}:{next(_call_counter)}")
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        """Seconds until the first token, drawn from the configured distribution."""
+        center = max(self.latency_ms, 0.0)
+        jitter = max(self.latency_jitter_ms, 0.0)
+        distribution = self.latency_distribution.lower()
+        if distribution == "constant" or jitter == 0.0:
+            delay = center
+        elif distribution == "uniform":
+            delay = rng.uniform(center - jitter, center + jitter)
+        elif distribution == "normal":
+            delay = rng.gauss(center, jitter)
+        elif distribution == "lognormal":
+            # Median `latency_ms`; jitter / latency approximates the spread
+            sigma = math.log1p(jitter / center) if center else 0.0
+            delay = center * math.exp(rng.gauss(0.0, sigma))
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        return max(delay, 0.0) / 1000.0
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _maybe_fail(self, rng: random.Random) -> None:
+        if self.error_rate > 0 and rng.random() < self.error_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng = self._call_rng(messages)
+        tokens = self._tokens(messages)
+        time.sleep(self._first_token_delay(rng) + self._token_delay() * len(tokens))
+        self._maybe_fail(rng)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng = self._call_rng(messages)
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self._first_token_delay(rng) + self._token_delay() * len(tokens))
+        self._maybe_fail(rng)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        rng = self._call_rng(messages)
+        time.sleep(self._first_token_delay(rng))
+        self._maybe_fail(rng)
+        for position, token in enumerate(self._tokens(messages)):
+            if position:
+                time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        rng = self._call_rng(messages)
+        await asyncio.sleep(self._first_token_delay(rng))
+        self._maybe_fail(rng)
+        for position, token in enumerate(self._tokens(messages)):
+            if position:
+                await asyncio.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
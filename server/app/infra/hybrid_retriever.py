@@ -0,0 +1,138 @@
+"""
+Hybrid lexical + dense retrieval.
+
+Runs the Chroma similarity search and the in-process BM25 search over the
+same chunks and fuses both rankings with reciprocal-rank fusion (RRF), so
+exact identifiers found by BM25 and paraphrases found by the embeddings
+both make it into the top-k.
+
+BM25 scores are not comparable across queries, so relevance cut-offs
+(`RetrievalParams.max_distance` / `distance_gap`) act on the dense leg:
+when no dense chunk passes them, hybrid search returns nothing rather than
+lexical matches on incidental words.
+
+With MMR enabled, RRF keeps a pool of `mmr_fetch_k` fused candidates and
+the diverse top-k is selected from it last (`retrieval.diversify`).
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.infra.executors import run_in_vector_store_executor
+from app.infra.lexical_index import LexicalIndex
+from app.infra.retrieval import RetrievalParams, dense_search, diversify, mmr_pool_size
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    k: int = 60,
+    top_k: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse several ranked result lists with reciprocal-rank fusion.
+
+    Each chunk scores `sum(1 / (k + rank))` over the lists it appears in;
+    chunks are identified by their `id`. The fused score is stored as
+    `rrf_score` on the returned chunks.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, 1):
+            chunk_id = chunk.get("id") or chunk["content"]
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            if chunk_id in fused:
+                # Keep the extra fields (e.g. bm25_score) of every leg
+                fused[chunk_id] = {**chunk, **fused[chunk_id]}
+            else:
+                fused[chunk_id] = dict(chunk)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{**fused[chunk_id], "rrf_score": score} for chunk_id, score in ranked]
+
+
+def hybrid_search(
+    query: str,
+    query_embedding: np.ndarray,
+    collection: Any,
+    lexical_index: LexicalIndex,
+    top_k: int = 3,
+    candidate_k: int = 20,
+    rrf_k: int = 60,
+    params: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous hybrid search (dense + BM25, fused with RRF).
+
+    With `select=False` the MMR selection is left to the caller, which then
+    gets the fused pool (see `fuse_with_lexical`).
+    """
+    candidate_k = max(candidate_k, top_k)
+    dense = dense_search(query_embedding, collection, candidate_k, params, select=False)
+    fused = fuse_with_lexical(query, dense, lexical_index, top_k, candidate_k, rrf_k, params)
+    if not select:
+        return fused
+    return diversify(query_embedding, fused, top_k, params, collection)
+
+
+def fuse_with_lexical(
+    query: str,
+    dense: List[Dict[str, Any]],
+    lexical_index: LexicalIndex,
+    top_k: int = 3,
+    candidate_k: int = 20,
+    rrf_k: int = 60,
+    params: Optional[RetrievalParams] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the BM25 leg for `query` and fuse it with already retrieved dense results.
+
+    Used when the dense leg was computed separately, e.g. for many queries
+    in one Chroma call (with `select=False`). With MMR enabled the result is
+    the fused pool of `mmr_fetch_k` candidates, to be narrowed to `top_k`
+    with `diversify`.
+    """
+    if _nothing_relevant(dense, params):
+        return []
+    lexical = lexical_index.search(query, candidate_k, where=params.where if params else None)
+    return reciprocal_rank_fusion([dense, lexical], k=rrf_k, top_k=mmr_pool_size(top_k, params))
+
+
+def _nothing_relevant(dense: List[Dict[str, Any]], params: Optional[RetrievalParams]) -> bool:
+    return not dense and params is not None and params.has_cutoffs
+
+
+async def ahybrid_search(
+    query: str,
+    query_embedding: np.ndarray,
+    collection: Any,
+    lexical_index: LexicalIndex,
+    top_k: int = 3,
+    candidate_k: int = 20,
+    rrf_k: int = 60,
+    params: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Async hybrid search (`select` as in `hybrid_search`).
+
+    The Chroma query runs on the vector store executor and the BM25 lookup
+    in a worker thread at the same time (scoring is CPU-bound and may wait
+    for the index lock held by an ingest), so the event loop is never
+    blocked and hybrid search costs about as much latency as the slower leg.
+    """
+    candidate_k = max(candidate_k, top_k)
+    dense, lexical = await asyncio.gather(
+        run_in_vector_store_executor(dense_search, query_embedding, collection, candidate_k, params, False),
+        asyncio.to_thread(lexical_index.search, query, candidate_k, where=params.where if params else None),
+    )
+    if _nothing_relevant(dense, params):
+        return []
+    fused = reciprocal_rank_fusion([dense, lexical], k=rrf_k, top_k=mmr_pool_size(top_k, params))
+    if not select or params is None or params.mmr_lambda is None:
+        return fused
+    # May fetch embeddings of BM25-only hits from Chroma
+    return await run_in_vector_store_executor(diversify, query_embedding, fused, top_k, params, collection)
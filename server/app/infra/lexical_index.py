@@ -0,0 +1,348 @@
+"""
+In-process BM25 inverted index over the chunks stored in ChromaDB.
+
+Dense retrieval misses exact identifiers (error codes, product names,
+ticket numbers); this index covers that gap. It is kept in sync with the
+vector store by the same code paths that add / delete chunks and persisted
+as an append-only JSON-lines log next to the Chroma directory:
+
+- every `add` / `delete` appends one record (cheap, no full rewrite)
+- on load the log is replayed and compacted when it contains many
+  superseded records
+
+Several worker processes can share one log. Writes and compaction hold an
+exclusive `fcntl` lock on a sidecar `.lock` file; before every search or
+write a worker stats the log and replays the records other workers
+appended since it last read it (or reloads it entirely after another
+worker compacted it), so no worker serves a stale index or drops records.
+
+Queries ignore English stopwords and terms found in more than
+`max_df_ratio` of the chunks: they barely change the BM25 ranking but
+their posting lists are the longest to score.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+import heapq
+import json
+import math
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+from app.infra.metadata_filters import matches_where
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[.\-/:#][a-z0-9_]+)*")
+_COMPOUND_SPLIT = re.compile(r"[.\-/:#]")
+
+STOPWORDS = frozenset(
+    "a about above after again against all am an and any are as at be because been before being "
+    "below between both but by can could did do does doing down during each few for from further "
+    "had has have having he her here hers herself him himself his how i if in into is it its itself "
+    "just me more most my myself no nor not now of off on once only or other our ours ourselves out "
+    "over own same she should so some such than that the their theirs them themselves then there "
+    "these they this those through to too under until up very was we were what when where which "
+    "while who whom why will with would you your yours yourself yourselves".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokenizer that keeps identifiers intact.
+
+    Compound tokens like `err-1234` or `v2.3.1` are emitted whole *and* as
+    their parts, so both exact and partial identifier queries match.
+    """
+    tokens: List[str] = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in _COMPOUND_SPLIT.split(token) if part)
+    return tokens
+
+
+class LexicalIndex:
+    """Incremental BM25 index keyed by the same ids as the Chroma collection."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_df_ratio: float = 0.5,
+    ) -> None:
+        self._path = Path(path) if path else None
+        self._k1 = k1
+        self._b = b
+        # Query terms in more than this share of the chunks are skipped
+        self._max_df_ratio = max_df_ratio
+        self._lock = threading.RLock()
+        # Identity of the log file and how far of it has been applied
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._offset = 0
+
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._log_records = 0
+
+    @classmethod
+    def load(cls, path: str, collection: Any = None, **kwargs: Any) -> "LexicalIndex":
+        """
+        Load the index from `path`.
+
+        When no index file exists yet and a collection is given, the index is
+        bootstrapped from the chunks already stored in the collection.
+        """
+        index = cls(path, **kwargs)
+        if index._path.exists():
+            index._load_log()
+        elif collection is not None:
+            index._bootstrap_from_collection(collection)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Add (or replace) chunks in the index."""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock, self._file_lock():
+            self._sync_locked()
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._add_locked(doc_id, text, metadata or {})
+            self._append_log(
+                {"op": "add", "ids": ids, "texts": texts, "metadatas": metadatas}
+            )
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Remove chunks from the index; unknown ids are ignored."""
+        with self._lock, self._file_lock():
+            self._sync_locked()
+            ids = [doc_id for doc_id in ids if doc_id in self._documents]
+            if not ids:
+                return
+            for doc_id in ids:
+                self._delete_locked(doc_id)
+            self._append_log({"op": "delete", "ids": ids})
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the `top_k` best BM25 matches for `query`.
+
+        Results have the same shape as `vector_store.search_similar_documents`
+        plus a `bm25_score` field. `where` is a Chroma-style metadata filter.
+        Scoring is CPU-bound; async callers should run it in a thread.
+        """
+        terms = set(tokenize(query)) - STOPWORDS
+        with self._lock:
+            self._refresh_locked()
+            if not terms or not self._documents:
+                return []
+
+            doc_count = len(self._documents)
+            avg_length = self._total_length / doc_count
+            max_df = max(self._max_df_ratio * doc_count, 1.0)
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                if df > max_df:
+                    continue
+                idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self._k1 * (1.0 - self._b + self._b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self._k1 + 1.0) / (tf + norm)
+
+            candidates = scores.items()
+            if where:
+                candidates = [
+                    item for item in candidates
+                    if matches_where(self._documents[item[0]]["metadata"], where)
+                ]
+            best = heapq.nlargest(top_k, candidates, key=lambda item: item[1])
+            return [
+                {
+                    "content": self._documents[doc_id]["content"],
+                    "metadata": dict(self._documents[doc_id]["metadata"]),
+                    "id": doc_id,
+                    "bm25_score": score,
+                }
+                for doc_id, score in best
+            ]
+
+    def _add_locked(self, doc_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        if doc_id in self._documents:
+            self._delete_locked(doc_id)
+        term_counts = Counter(tokenize(text))
+        length = sum(term_counts.values())
+        for term, tf in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._doc_terms[doc_id] = dict(term_counts)
+        self._doc_lengths[doc_id] = length
+        self._documents[doc_id] = {"content": text, "metadata": metadata}
+        self._total_length += length
+
+    def _delete_locked(self, doc_id: str) -> None:
+        for term in self._doc_terms.pop(doc_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        self._documents.pop(doc_id, None)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by all processes using the same log."""
+        if self._path is None or fcntl is None:
+            yield
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self._path.with_suffix(self._path.suffix + ".lock")
+        with lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh_locked(self) -> None:
+        # One stat when nothing changed; the file lock only when catching up
+        if self._path is None:
+            return
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return
+        if (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size != self._offset:
+            with self._file_lock():
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        """Apply records appended to the log by other processes (caller holds the file lock)."""
+        if self._path is None:
+            return
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            # Compacted (replaced) by another process: start over
+            self._reset_locked()
+            self._file_id = file_id
+        if stat.st_size > self._offset:
+            self._read_log_locked()
+
+    def _reset_locked(self) -> None:
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._documents = {}
+        self._total_length = 0
+        self._log_records = 0
+        self._offset = 0
+
+    def _read_log_locked(self) -> None:
+        with self._path.open("rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read()
+        # A last line without newline is still being written (or torn); read it later
+        complete = data[: data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn line from a crash mid-write; skip it
+                continue
+            self._log_records += 1
+            if record.get("op") == "add":
+                for doc_id, text, metadata in zip(
+                    record["ids"], record["texts"], record["metadatas"]
+                ):
+                    self._add_locked(doc_id, text, metadata or {})
+            elif record.get("op") == "delete":
+                for doc_id in record["ids"]:
+                    self._delete_locked(doc_id)
+
+    def _append_log(self, record: Dict[str, Any]) -> None:
+        # Caller holds the file lock and has synced, so the file ends at `_offset`
+        if self._path is None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("ab") as fh:
+            fh.write((json.dumps(record) + "\n").encode("utf-8"))
+            fh.flush()
+            stat = os.fstat(fh.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size
+        self._log_records += 1
+
+    def _load_log(self) -> None:
+        with self._lock, self._file_lock():
+            self._sync_locked()
+            # Compact once the log is mostly superseded records
+            if self._log_records > 2 * max(len(self._documents), 1):
+                self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        # Caller holds the file lock and has synced, so no record is dropped
+        tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+        ids = list(self._documents)
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            if ids:
+                fh.write(
+                    json.dumps(
+                        {
+                            "op": "add",
+                            "ids": ids,
+                            "texts": [self._documents[i]["content"] for i in ids],
+                            "metadatas": [self._documents[i]["metadata"] for i in ids],
+                        }
+                    )
+                    + "\n"
+                )
+        os.replace(tmp_path, self._path)
+        stat = self._path.stat()
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size
+        self._log_records = 1 if ids else 0
+
+    def _bootstrap_from_collection(self, collection: Any) -> None:
+        results = collection.get(include=["documents", "metadatas"])
+        ids = results.get("ids") or []
+        documents = results.get("documents") or []
+        metadatas = results.get("metadatas") or [{} for _ in ids]
+        if ids:
+            self.add(list(ids), list(documents), list(metadatas))
+        elif self._path is not None:
+            # Create the file so the next start does not bootstrap again
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._path.touch()
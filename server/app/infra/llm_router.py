@@ -0,0 +1,375 @@
+"""
+Runtime routing across several LangChain chat models.
+
+`RoutedChatModel` is a regular `BaseChatModel`, so `ainvoke`, `astream`,
+`abatch` etc. work unchanged for callers. Each call goes to the first
+healthy provider; when it has not answered within a hedge delay (the
+provider's observed p95 latency, or a fixed delay until enough samples
+exist) the same request is also sent to the next provider, the first
+successful answer wins and the other call is cancelled (a losing stream
+is closed). A failed call fails over to the next provider immediately.
+
+`LLMRouter` keeps per-provider latency / error EWMAs; a provider whose
+error rate (or, optionally, latency) crosses the threshold is taken out
+of rotation for a cooldown period. Latencies are kept per call kind
+(`CALL_KINDS`): a full completion (`invoke`) and the first chunk of a
+stream (`stream_ttft`) take very different times, so each kind hedges on
+its own percentile.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+T = TypeVar("T")
+
+# "invoke": full completion latency; "stream_ttft": time to the first streamed chunk
+CALL_KINDS = ("invoke", "stream_ttft")
+
+
+def with_temperature(llm_client: BaseChatModel, temperature: Optional[float]) -> BaseChatModel:
+    """
+    Return a chat model configured with `temperature` for a single request.
+
+    The shared client is never mutated; when the temperature differs a
+    shallow copy is returned instead (the underlying HTTP client is shared),
+    so concurrent requests cannot see each other's settings.
+    """
+    if temperature is None or not hasattr(llm_client, "temperature"):
+        return llm_client
+    if llm_client.temperature == temperature:
+        return llm_client
+    if hasattr(llm_client, "model_copy"):
+        return llm_client.model_copy(update={"temperature": temperature})
+    # langchain-core < 0.3 chat models are pydantic v1 models, whose `copy`
+    # drops fields declared with `exclude=True` (callbacks, tags, metadata...)
+    clone = llm_client.copy(update={"temperature": temperature})
+    for name, value in llm_client.__dict__.items():
+        clone.__dict__.setdefault(name, value)
+    return clone
+
+
+@dataclass
+class ProviderState:
+    """A routed chat model plus its health statistics."""
+
+    name: str
+    model: BaseChatModel
+    # Latency EWMAs (ms) per call kind
+    latency_ewma_ms: Dict[str, float] = field(default_factory=dict)
+    # Time cancelled calls had run per call kind: only a lower bound of their latency
+    cancelled_latency_ewma_ms: Dict[str, float] = field(default_factory=dict)
+    error_ewma: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    wins: int = 0
+    cancelled: int = 0
+    unhealthy_until: float = 0.0
+    # Recent latencies (ms) per call kind for the hedge percentile
+    latencies: Dict[str, Deque[float]] = field(
+        default_factory=lambda: {kind: deque(maxlen=200) for kind in CALL_KINDS}
+    )
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+
+class LLMRouter:
+    """Provider selection, hedge delays and health tracking for `RoutedChatModel`."""
+
+    def __init__(
+        self,
+        providers: Sequence[Tuple[str, BaseChatModel]],
+        hedging_enabled: bool = True,
+        hedge_delay_ms: float = 3000.0,
+        hedge_percentile: float = 95.0,
+        min_hedge_delay_ms: float = 250.0,
+        min_samples: int = 20,
+        ewma_alpha: float = 0.2,
+        unhealthy_error_rate: float = 0.5,
+        unhealthy_latency_ms: Optional[float] = None,
+        cooldown_seconds: float = 30.0,
+    ) -> None:
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = [ProviderState(name=name, model=model) for name, model in providers]
+        self.hedging_enabled = hedging_enabled
+        self._hedge_delay_ms = hedge_delay_ms
+        self._hedge_percentile = hedge_percentile
+        self._min_hedge_delay_ms = min_hedge_delay_ms
+        self._min_samples = min_samples
+        self._alpha = ewma_alpha
+        self._unhealthy_error_rate = unhealthy_error_rate
+        self._unhealthy_latency_ms = unhealthy_latency_ms
+        self._cooldown_seconds = cooldown_seconds
+        self._hedges = 0
+        self._failovers = 0
+
+    def select(self) -> List[ProviderState]:
+        """Healthy providers in configured order; all of them if none is healthy."""
+        now = time.monotonic()
+        healthy = [provider for provider in self.providers if provider.is_healthy(now)]
+        return healthy or list(self.providers)
+
+    def hedge_delay(self, provider: ProviderState, kind: str = "invoke") -> float:
+        """Seconds to wait for a `kind` call to `provider` before hedging to the next one."""
+        latencies = provider.latencies[kind]
+        if len(latencies) < self._min_samples:
+            return self._hedge_delay_ms / 1000.0
+        ordered = sorted(latencies)
+        index = min(int(len(ordered) * self._hedge_percentile / 100.0), len(ordered) - 1)
+        return max(ordered[index], self._min_hedge_delay_ms) / 1000.0
+
+    def record_success(
+        self,
+        provider: ProviderState,
+        latency_ms: float,
+        kind: str = "invoke",
+        won: bool = True,
+    ) -> None:
+        provider.calls += 1
+        if won:
+            provider.wins += 1
+        provider.latencies[kind].append(latency_ms)
+        provider.latency_ewma_ms[kind] = self._ewma(provider.latency_ewma_ms.get(kind), latency_ms)
+        provider.error_ewma = self._ewma(provider.error_ewma, 0.0)
+        self._update_health(provider)
+
+    def record_failure(self, provider: ProviderState, latency_ms: float) -> None:
+        provider.calls += 1
+        provider.errors += 1
+        provider.error_ewma = self._ewma(provider.error_ewma, 1.0)
+        self._update_health(provider)
+
+    def record_cancelled(self, provider: ProviderState, latency_ms: float, kind: str = "invoke") -> None:
+        """
+        A hedged call that lost the race; its latency is at least `latency_ms`.
+
+        Lower bounds are kept out of the latency window and EWMA (they would
+        pull the hedge delay down) and only count towards the slowness check.
+        """
+        provider.cancelled += 1
+        provider.cancelled_latency_ewma_ms[kind] = self._ewma(
+            provider.cancelled_latency_ewma_ms.get(kind), latency_ms
+        )
+        self._update_health(provider)
+
+    def record_hedge(self) -> None:
+        self._hedges += 1
+
+    def record_failover(self) -> None:
+        self._failovers += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "hedging_enabled": self.hedging_enabled,
+            "hedges": self._hedges,
+            "failovers": self._failovers,
+            "providers": [
+                {
+                    "name": provider.name,
+                    "healthy": provider.is_healthy(now),
+                    "latency_ewma_ms": dict(provider.latency_ewma_ms),
+                    "cancelled_latency_ewma_ms": dict(provider.cancelled_latency_ewma_ms),
+                    "error_ewma": provider.error_ewma,
+                    "hedge_delay_ms": {kind: self.hedge_delay(provider, kind) * 1000.0 for kind in CALL_KINDS},
+                    "calls": provider.calls,
+                    "errors": provider.errors,
+                    "wins": provider.wins,
+                    "cancelled": provider.cancelled,
+                }
+                for provider in self.providers
+            ],
+        }
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return self._alpha * value + (1.0 - self._alpha) * current
+
+    def _update_health(self, provider: ProviderState) -> None:
+        too_many_errors = provider.error_ewma >= self._unhealthy_error_rate
+        # Every kind's EWMA (cancelled or not) is at most the completion latency
+        too_slow = self._unhealthy_latency_ms is not None and any(
+            latency >= self._unhealthy_latency_ms
+            for ewmas in (provider.latency_ewma_ms, provider.cancelled_latency_ewma_ms)
+            for latency in ewmas.values()
+        )
+        if too_many_errors or too_slow:
+            provider.unhealthy_until = time.monotonic() + self._cooldown_seconds
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000.0
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model that hedges and fails over across the providers of an `LLMRouter`."""
+
+    router: Any
+    # Per-request temperature forwarded to every provider (None keeps theirs)
+    temperature: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    def _model_for(self, provider: ProviderState) -> BaseChatModel:
+        return with_temperature(provider.model, self.temperature)
+
+    async def _race(
+        self,
+        start: Callable[[ProviderState], Awaitable[T]],
+        kind: str = "invoke",
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Run `start` on the first provider, hedging / failing over to the next ones.
+
+        At most one hedge is in flight per waiting call; losers are cancelled.
+        Latencies are recorded, and hedge delays read, for the `kind` of call.
+        `discard` releases the result of a loser that completed anyway (in
+        the same wakeup as the winner).
+        """
+        router: LLMRouter = self.router
+        queue = router.select()
+        running: Dict["asyncio.Future[T]", Tuple[ProviderState, float]] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            provider = queue.pop(0)
+            running[asyncio.ensure_future(start(provider))] = (provider, time.perf_counter())
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if queue and len(running) == 1 and router.hedging_enabled:
+                    (provider, started), = running.values()
+                    timeout = max(router.hedge_delay(provider, kind) - (time.perf_counter() - started), 0.0)
+                done, _ = await asyncio.wait(
+                    running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    router.record_hedge()
+                    launch()
+                    continue
+                for task in done:
+                    provider, started = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        router.record_success(provider, _elapsed_ms(started), kind)
+                        return task.result()
+                    router.record_failure(provider, _elapsed_ms(started))
+                    last_error = error
+                if not running and queue:
+                    router.record_failover()
+                    launch()
+            assert last_error is not None
+            raise last_error
+        finally:
+            completed: List[T] = []
+            for task, (provider, started) in running.items():
+                if not task.done():
+                    task.cancel()
+                    router.record_cancelled(provider, _elapsed_ms(started), kind)
+                elif not task.cancelled():
+                    # Finished in the same wakeup as the winner
+                    if task.exception() is None:
+                        router.record_success(provider, _elapsed_ms(started), kind, won=False)
+                        completed.append(task.result())
+                    else:
+                        router.record_failure(provider, _elapsed_ms(started))
+            if discard is not None:
+                for result in completed:
+                    try:
+                        await discard(result)
+                    except Exception:
+                        pass
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async def call(provider: ProviderState) -> BaseMessage:
+            return await self._model_for(provider).ainvoke(messages, stop=stop, **kwargs)
+
+        message = await self._race(call)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Blocking calls cannot be cancelled, so the sync path only fails over
+        router: LLMRouter = self.router
+        last_error: Optional[BaseException] = None
+        for position, provider in enumerate(router.select()):
+            if position:
+                router.record_failover()
+            started = time.perf_counter()
+            try:
+                message = self._model_for(provider).invoke(messages, stop=stop, **kwargs)
+            except Exception as exc:
+                router.record_failure(provider, _elapsed_ms(started))
+                last_error = exc
+                continue
+            router.record_success(provider, _elapsed_ms(started))
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        assert last_error is not None
+        raise last_error
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Stream from the provider that produces the first token first.
+
+        Hedging and failover apply until the first chunk arrives; after
+        that the winning stream is consumed to the end.
+        """
+
+        async def first_chunk(provider: ProviderState) -> Tuple[ProviderState, Any, Optional[Any]]:
+            stream = self._model_for(provider).astream(messages, stop=stop, **kwargs)
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                chunk = None
+            except BaseException:
+                await stream.aclose()
+                raise
+            return provider, stream, chunk
+
+        async def close(started: Tuple[ProviderState, Any, Optional[Any]]) -> None:
+            await started[1].aclose()
+
+        provider, stream, chunk = await self._race(first_chunk, kind="stream_ttft", discard=close)
+        try:
+            if chunk is None:
+                yield ChatGenerationChunk(message=AIMessageChunk(content=""))
+                return
+            yield ChatGenerationChunk(message=chunk)
+            async for chunk in stream:
+                yield ChatGenerationChunk(message=chunk)
+        except Exception:
+            self.router.record_failure(provider, 0.0)
+            raise
+        finally:
+            await stream.aclose()
@@ -0,0 +1,117 @@
+"""
+Metadata filters for retrieval.
+
+Filters are expressed as Chroma `where` clauses so the dense search only
+considers matching chunks inside the index. The same clause is evaluated in
+Python by `matches_where` for the in-process BM25 index, keeping both legs
+of hybrid search restricted to the same chunks.
+
+Chunk metadata used by the filters:
+- `source`: file name or `qa/question/{id}`
+- `type`: `document`, `qa_pair` or `question`
+- `is_solved`: `"True"` / `"False"` on Q&A entries
+- `indexed_at_ts`: indexing time as a UNIX timestamp (range filters)
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+DOCUMENT_TYPE = "document"
+QA_TYPES = ("qa_pair", "question")
+
+
+def to_timestamp(value: datetime) -> float:
+    """UNIX timestamp of `value`; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _any_of(field: str, values: Sequence[str]) -> Dict[str, Any]:
+    values = list(dict.fromkeys(values))
+    if len(values) == 1:
+        return {field: values[0]}
+    return {field: {"$in": values}}
+
+
+def build_where(
+    sources: Optional[Sequence[str]] = None,
+    types: Optional[Sequence[str]] = None,
+    solved_only: bool = False,
+    indexed_after: Optional[datetime] = None,
+    indexed_before: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a Chroma `where` clause from retrieval filters.
+
+    `solved_only` only restricts Q&A entries; documents still match.
+    Returns None when no filter is set.
+    """
+    clauses: List[Dict[str, Any]] = []
+    if sources:
+        clauses.append(_any_of("source", sources))
+    if types:
+        clauses.append(_any_of("type", types))
+    if solved_only:
+        clauses.append(
+            {"$or": [{"type": {"$nin": list(QA_TYPES)}}, {"is_solved": "True"}]}
+        )
+    if indexed_after is not None:
+        clauses.append({"indexed_at_ts": {"$gte": to_timestamp(indexed_after)}})
+    if indexed_before is not None:
+        clauses.append({"indexed_at_ts": {"$lte": to_timestamp(indexed_before)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def _match_condition(metadata: Dict[str, Any], field: str, condition: Any) -> bool:
+    if field not in metadata:
+        # Chroma never matches chunks missing the field, even for $ne / $nin
+        return False
+    value = metadata[field]
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = value == operand
+        elif operator == "$ne":
+            matched = value != operand
+        elif operator == "$in":
+            matched = value in operand
+        elif operator == "$nin":
+            matched = value not in operand
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            matched = {
+                "$gt": value > operand,
+                "$gte": value >= operand,
+                "$lt": value < operand,
+                "$lte": value <= operand,
+            }[operator]
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma `where` clause against one chunk's metadata."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata, key, condition):
+            return False
+    return True
@@ -0,0 +1,158 @@
+"""
+Prometheus metrics.
+
+- `rag_http_request_duration_seconds`: request latency per route template
+  (recorded by `MetricsMiddleware`)
+- `rag_stage_duration_seconds`: time spent in pipeline stages (embedding,
+  Chroma query / add / delete, LLM calls, PDF extraction), recorded with
+  `observe_stage`
+- `rag_llm_in_flight_calls`: LLM calls currently running
+- `rag_vector_store_chunks` / `rag_db_pool_checked_out`: sampled only when
+  `/metrics` is scraped (see `register_gauge_callbacks`)
+
+Histogram children are resolved once per stage / route, so recording a
+sample costs a dict lookup and a bucket increment on the hot path.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+
+REQUEST_LATENCY = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in RAG pipeline stages",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+LLM_IN_FLIGHT = Gauge("rag_llm_in_flight_calls", "LLM calls currently in flight")
+VECTOR_STORE_CHUNKS = Gauge("rag_vector_store_chunks", "Chunks stored in the vector store")
+DB_POOL_CHECKED_OUT = Gauge("rag_db_pool_checked_out", "Database connections checked out of the pool")
+
+_stage_children: Dict[str, Any] = {}
+_request_children: Dict[Tuple[str, str, str], Any] = {}
+
+
+def _stage(stage: str) -> Any:
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_LATENCY.labels(stage)
+    return child
+
+
+def observe_stage_duration(stage: str, seconds: float) -> None:
+    """Record a duration (seconds) for `stage`."""
+    _stage(stage).observe(seconds)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Context manager timing the enclosed block as `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage(stage).observe(time.perf_counter() - start)
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator timing a (sync) function as `stage`."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _stage(stage).observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def track_llm_call(calls: int = 1, stage: str = "llm") -> Iterator[None]:
+    """Count `calls` in-flight LLM calls for the enclosed block and time it as `stage`."""
+    LLM_IN_FLIGHT.inc(calls)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage(stage).observe(time.perf_counter() - start)
+        LLM_IN_FLIGHT.dec(calls)
+
+
+def register_gauge_callbacks(
+    vector_store_chunks: Optional[Callable[[], float]] = None,
+    db_pool_checked_out: Optional[Callable[[], float]] = None,
+) -> None:
+    """Sample the given callables whenever metrics are scraped."""
+    if vector_store_chunks is not None:
+        VECTOR_STORE_CHUNKS.set_function(_safe(vector_store_chunks))
+    if db_pool_checked_out is not None:
+        DB_POOL_CHECKED_OUT.set_function(_safe(db_pool_checked_out))
+
+
+def _safe(func: Callable[[], float]) -> Callable[[], float]:
+    def sample() -> float:
+        try:
+            return float(func())
+        except Exception:
+            return float("nan")
+
+    return sample
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    The route template (e.g. `/questions/{question_id}`) is read from the
+    scope after routing, so path parameters do not explode label
+    cardinality. Streaming responses are timed until the body is complete.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            key = (
+                scope.get("method", ""),
+                getattr(route, "path", None) or "unmatched",
+                str(status["code"]),
+            )
+            child = _request_children.get(key)
+            if child is None:
+                child = _request_children[key] = REQUEST_LATENCY.labels(*key)
+            child.observe(time.perf_counter() - start)
@@ -0,0 +1,98 @@
+"""
+Maximal-marginal-relevance (MMR) selection.
+
+Picks `k` candidates that are relevant to the query but not redundant with
+each other, so a single long document cannot fill every retrieval slot.
+All similarity computations are vectorized with NumPy: one matrix-vector
+product for query relevance and one more per selected item, folded into a
+running max of similarity to the already selected set. For `k` selected
+out of `n` candidates that is O(k * n * dim) instead of the O(n^2 * dim) of
+a full pairwise similarity matrix.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Any,
+    k: int,
+    lambda_mult: float = 0.5,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """
+    Return the indices of `k` candidates selected by MMR.
+
+    `lambda_mult` trades relevance (1.0) against diversity (0.0).
+    `relevance` replaces the cosine similarity to the query as the relevance
+    of each candidate (e.g. cross-encoder scores); it should be on a
+    comparable 0-1 scale.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or candidates.shape[0] == 0 or k <= 0:
+        return []
+    k = min(k, candidates.shape[0])
+
+    candidates = _normalize_rows(candidates)
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+    if relevance is None:
+        relevance = candidates @ query
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = np.empty(k, dtype=np.intp)
+    available = np.ones(candidates.shape[0], dtype=bool)
+
+    first = int(np.argmax(relevance))
+    selected[0] = first
+    available[first] = False
+    max_similarity = candidates @ candidates[first]
+
+    for position in range(1, k):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected[position] = best
+        available[best] = False
+        np.maximum(max_similarity, candidates @ candidates[best], out=max_similarity)
+
+    return selected.tolist()
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    candidates: List[Dict[str, Any]],
+    k: int,
+    lambda_mult: float = 0.5,
+    relevance_key: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Select `k` diverse chunks from candidates carrying an `embedding` field.
+
+    With `relevance_key`, that field of each candidate is its relevance
+    instead of the similarity to the query. The `embedding` field is
+    dropped from the returned chunks.
+    """
+    if not candidates:
+        return []
+    indices = maximal_marginal_relevance(
+        query_embedding,
+        [candidate["embedding"] for candidate in candidates],
+        k,
+        lambda_mult,
+        relevance=[candidate[relevance_key] for candidate in candidates] if relevance_key else None,
+    )
+    selected = []
+    for index in indices:
+        chunk = dict(candidates[index])
+        chunk.pop("embedding", None)
+        selected.append(chunk)
+    return selected
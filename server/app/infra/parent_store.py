@@ -0,0 +1,140 @@
+"""
+Parent windows for parent/child (small-to-big) retrieval.
+
+In parent/child mode a document is split into large, non-overlapping parent
+windows; each window is split into small child chunks, which are the only
+thing embedded and stored in Chroma. Children carry the `parent_id` of their
+window. At query time `expand_to_parents` swaps the retrieved children for
+their parent windows (once per parent), so matching is precise while the
+prompt gets enough surrounding text.
+
+Parents live in a small SQLite file next to the vector DB, keyed by
+`source` + character range.
+"""
+
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def parent_id(source: str, start: int, end: int) -> str:
+    """Stable id of the parent window `[start, end)` of `source`."""
+    return f"{source}#{start}-{end}"
+
+
+class ParentStore:
+    """SQLite-backed store of parent windows."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parents ("
+            " id TEXT PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " parent_index INTEGER NOT NULL,"
+            " start INTEGER NOT NULL,"
+            " end INTEGER NOT NULL,"
+            " content TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS parents_source ON parents (source)")
+        self._conn.commit()
+
+    def replace_source(self, source: str, parents: List[Dict[str, Any]]) -> None:
+        """
+        Replace every parent window of `source` with `parents`.
+
+        Each parent is a dict with `id`, `parent_index`, `start`, `end` and
+        `content` (see `document_loader.split_parent_child`).
+        """
+        rows = [
+            (parent["id"], source, parent["parent_index"], parent["start"], parent["end"], parent["content"])
+            for parent in parents
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parents WHERE source = ?", (source,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents (id, source, parent_index, start, end, content)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_source(self, source: str) -> int:
+        """Remove the parent windows of `source`; returns how many were removed."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM parents WHERE source = ?", (source,)).rowcount
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up parents by id; unknown ids are missing from the result."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, source, parent_index, start, end, content FROM parents"
+                f" WHERE id IN ({placeholders})",
+                ids,
+            ).fetchall()
+        return {
+            row[0]: {
+                "id": row[0],
+                "source": row[1],
+                "parent_index": row[2],
+                "start": row[3],
+                "end": row[4],
+                "content": row[5],
+            }
+            for row in rows
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+
+def expand_to_parents(
+    chunks: List[Dict[str, Any]],
+    parent_store: Optional[ParentStore],
+) -> List[Dict[str, Any]]:
+    """
+    Replace child chunks (ordered by relevance) with their parent windows.
+
+    Each parent appears once, at the rank of its best child, and keeps that
+    child's relevance fields (`distance`, `rerank_score`, ...). Chunks
+    without a known parent (flat-mode documents, Q&A entries) are kept as
+    they are.
+    """
+    if parent_store is None or not chunks:
+        return chunks
+    parents = parent_store.get_many(
+        chunk["metadata"]["parent_id"] for chunk in chunks if chunk.get("metadata", {}).get("parent_id")
+    )
+    if not parents:
+        return chunks
+
+    expanded: List[Dict[str, Any]] = []
+    seen = set()
+    for chunk in chunks:
+        metadata = chunk.get("metadata", {})
+        parent = parents.get(metadata.get("parent_id"))
+        if parent is None:
+            expanded.append(chunk)
+            continue
+        if parent["id"] in seen:
+            continue
+        seen.add(parent["id"])
+        # Parents do not overlap, so drop `chunk_index` to keep the context
+        # packer from looking for (and trimming) overlaps between them
+        parent_metadata = {key: value for key, value in metadata.items() if key != "chunk_index"}
+        parent_metadata["parent_index"] = parent["parent_index"]
+        expanded.append(
+            {
+                **chunk,
+                "content": parent["content"],
+                "metadata": parent_metadata,
+                "id": parent["id"],
+                "child_id": chunk.get("id"),
+            }
+        )
+    return expanded
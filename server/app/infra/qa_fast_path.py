@@ -0,0 +1,74 @@
+"""
+Answering directly from accepted community answers.
+
+Every thread with an accepted answer also gets its title embedded on its
+own, in a small separate collection (`vector_store.QA_TITLE_COLLECTION`,
+kept in sync by `QAIndexingService`). A user question is compared with
+these titles: a question and a thread title are comparable texts, whereas
+the combined Q&A chunk (title, details and every answer) rarely comes close
+to a short question. When the best title is similar enough, the accepted
+answer is returned verbatim (attributed to the thread) instead of
+generating one with the LLM.
+
+The title collection holds only solved threads, so the extra top-1 query
+is small, and it is skipped while the collection is empty. Title entries
+carry the metadata of their Q&A chunk, so retrieval filters (`where`)
+apply to them in the same way.
+
+Similarity is cosine similarity derived from the squared-L2-scale distance
+that `search_by_embeddings` reports for the normalized embeddings (in any
+collection space): `similarity = 1 - distance / 2`.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.infra.vector_store import search_by_embeddings
+
+
+def distance_to_similarity(distance: float) -> float:
+    """Cosine similarity for a squared-L2 distance between unit vectors."""
+    return 1.0 - distance / 2.0
+
+
+def title_entry_id(question_id: Any) -> str:
+    return f"qa_title_{question_id}"
+
+
+def match_accepted_answers(
+    query_embeddings: np.ndarray,
+    title_collection: Any,
+    min_similarity: float,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Find an accepted answer for each query, with one query of the title collection.
+
+    Returns, per query, `None` or a dict with `text`, `source`,
+    `question_id` and `similarity`. Only the most similar title (within
+    `where`) is considered.
+    """
+    if len(query_embeddings) == 0 or title_collection.count() == 0:
+        return [None] * len(query_embeddings)
+    hit_lists = search_by_embeddings(query_embeddings, title_collection, top_k=1, where=where)
+    return [_accepted_answer(hits[0], min_similarity) if hits else None for hits in hit_lists]
+
+
+def _accepted_answer(hit: Dict[str, Any], min_similarity: float) -> Optional[Dict[str, Any]]:
+    metadata = hit.get("metadata") or {}
+    if metadata.get("type") != "qa_pair" or metadata.get("has_accepted_answer") != "True":
+        return None
+    text = metadata.get("accepted_answer_text")
+    distance = hit.get("distance")
+    if not text or distance is None:
+        return None
+    similarity = distance_to_similarity(distance)
+    if similarity < min_similarity:
+        return None
+    return {
+        "text": text,
+        "source": metadata.get("source"),
+        "question_id": metadata.get("question_id"),
+        "similarity": similarity,
+    }
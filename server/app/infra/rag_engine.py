@@ -2,24 +2,61 @@
 Core RAG (Retrieval-Augmented Generation) engine using LangChain.
 
 This module provides low-level primitives:
-- Initializing LLM clients (Gemini / OpenAI via LangChain)
+- Initializing LLM clients (Gemini / OpenAI via LangChain, or the local
+  fake model for load testing)
 - Retrieving relevant context from the vector store
 - Building prompts with context
 - Invoking the LLM to generate answers
 
+Every stage has an async counterpart (`aretrieve_relevant_context`,
+`agenerate_response`, `arag_pipeline`) that keeps blocking embedding and
+Chroma work off the event loop and calls the LLM through `ainvoke`.
+`aprepare_rag_prompt` + `astream_response` expose the same pipeline for
+token streaming. `aprepare_rag_prompts_batch` + `abatch_generate_responses`
+run it for many queries at once: one `encode` call, one multi-query Chroma
+call and bounded-concurrency LLM calls via LangChain's `abatch`.
+
+Pipelines report per-stage wall-clock timings (milliseconds) under
+`timings` so the cost of each optional stage (e.g. reranking) is visible.
+When retrieval finds nothing (e.g. every chunk is beyond the relevance
+cut-offs) and `RETRIEVAL_EARLY_EXIT` is on, the LLM is skipped and
+`NO_CONTEXT_RESPONSE` is returned with `no_context=True`.
+With a `parent_store` (parent/child indexing), retrieved child chunks are
+expanded to their parent windows after reranking, before context packing.
+The generation functions take an optional `completion_cache`: identical
+prompts (same messages, model and temperature) are answered from it, and
+hits are returned as `CachedCompletion`.
+
 Higher-level orchestration should be done via `services.rag_service.RAGService`.
 """
 
-from typing import List, Dict, Optional, Any
+import asyncio
+import time
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple, Union
+
+import numpy as np
 
 from app.core.config import settings
-from app.infra.vector_store import search_similar_documents
+from app.infra.completion_cache import CachedCompletion, CompletionCache, completion_key
+from app.infra.context_packer import pack_context
+from app.infra.embeddings import generate_embedding, generate_embeddings
+from app.infra.executors import run_in_embedding_executor, run_in_vector_store_executor
+from app.infra.fake_llm import FakeChatModel
+from app.infra.hybrid_retriever import ahybrid_search, fuse_with_lexical, hybrid_search
+from app.infra.llm_router import LLMRouter, RoutedChatModel, with_temperature
+from app.infra.metrics import track_llm_call
+from app.infra.parent_store import expand_to_parents
+from app.infra.retrieval import RetrievalParams, dense_search, dense_search_batch, diversify
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
 
+# Same wording the prompt asks the LLM to use when the context lacks the answer
+NO_CONTEXT_RESPONSE = "I don't have that information in my knowledge base."
+
+
 def initialize_llm(provider: Optional[str] = None, api_key: Optional[str] = None) -> BaseChatModel:
     """
     Initialize the LLM client using LangChain.
@@ -82,7 +119,50 @@ def initialize_llm(provider: Optional[str] = None, api_key: Optional[str] = None
             temperature=settings.LLM_TEMPERATURE,
         )
 
-    raise ValueError(f"Unknown LLM provider: {provider}. Choose from: gemini, openai")
+    if provider in ("fake", "local"):
+        # Deterministic offline model for load tests / CI (no network, no cost)
+        return FakeChatModel(
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            latency_jitter_ms=settings.FAKE_LLM_LATENCY_JITTER_MS,
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            seed=settings.FAKE_LLM_SEED,
+            temperature=settings.LLM_TEMPERATURE,
+        )
+
+    raise ValueError(f"Unknown LLM provider: {provider}. Choose from: gemini, openai, fake")
+
+
+def initialize_llm_client() -> BaseChatModel:
+    """
+    Initialize the chat model used by the RAG pipeline.
+
+    With `LLM_FALLBACK_PROVIDER` set, the primary and fallback models are
+    wrapped in a `RoutedChatModel` that hedges slow calls and fails over
+    at runtime; otherwise the primary model is returned as is.
+    """
+    primary = initialize_llm()
+    fallback = settings.LLM_FALLBACK_PROVIDER
+    if not fallback:
+        return primary
+
+    router = LLMRouter(
+        [
+            (settings.LLM_PROVIDER.lower(), primary),
+            (fallback.lower(), initialize_llm(fallback.lower())),
+        ],
+        hedging_enabled=settings.LLM_HEDGING_ENABLED,
+        hedge_delay_ms=settings.LLM_HEDGE_DELAY_MS,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        min_hedge_delay_ms=settings.LLM_HEDGE_MIN_DELAY_MS,
+        ewma_alpha=settings.LLM_HEALTH_EWMA_ALPHA,
+        unhealthy_error_rate=settings.LLM_UNHEALTHY_ERROR_RATE,
+        unhealthy_latency_ms=settings.LLM_UNHEALTHY_LATENCY_MS,
+        cooldown_seconds=settings.LLM_UNHEALTHY_COOLDOWN_SECONDS,
+    )
+    return RoutedChatModel(router=router)
 
 
 def retrieve_relevant_context(
@@ -90,20 +170,126 @@ def retrieve_relevant_context(
     vector_store_collection: Any,
     embedding_model: Any,
     top_k: int = 3,
+    lexical_index: Any = None,
+    query_embedding: Optional[np.ndarray] = None,
+    retrieval: Optional[RetrievalParams] = None,
+    select: bool = True,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve relevant document chunks for a query from the vector store.
+
+    When a `lexical_index` is given, dense and BM25 results are fused with
+    reciprocal-rank fusion (hybrid search). `retrieval` carries per-request
+    settings such as MMR diversity; with `select=False` the MMR selection
+    is left to the caller (see `rerank_and_select`).
     """
-    return search_similar_documents(query, vector_store_collection, embedding_model, top_k)
+    if query_embedding is None:
+        query_embedding = generate_embedding(query, embedding_model)
+    if lexical_index is None:
+        return dense_search(query_embedding, vector_store_collection, top_k, retrieval, select)
+    return hybrid_search(
+        query,
+        query_embedding,
+        vector_store_collection,
+        lexical_index,
+        top_k=top_k,
+        candidate_k=settings.HYBRID_CANDIDATES,
+        rrf_k=settings.HYBRID_RRF_K,
+        params=retrieval,
+        select=select,
+    )
+
+
+async def aretrieve_relevant_context(
+    query: str,
+    vector_store_collection: Any,
+    embedding_model: Any,
+    top_k: int = 3,
+    query_embedding: Optional[np.ndarray] = None,
+    lexical_index: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of `retrieve_relevant_context`.
+
+    The embedding is computed on the embedding executor (unless the caller
+    already has one) and the Chroma query runs on the vector store executor,
+    concurrently with the BM25 lookup when hybrid search is enabled.
+    """
+    if query_embedding is None:
+        query_embedding = await run_in_embedding_executor(
+            generate_embedding, query, embedding_model
+        )
+    if lexical_index is not None:
+        return await ahybrid_search(
+            query,
+            query_embedding,
+            vector_store_collection,
+            lexical_index,
+            top_k=top_k,
+            candidate_k=settings.HYBRID_CANDIDATES,
+            rrf_k=settings.HYBRID_RRF_K,
+            params=retrieval,
+            select=select,
+        )
+    return await run_in_vector_store_executor(
+        dense_search, query_embedding, vector_store_collection, top_k, retrieval, select
+    )
+
+
+def retrieve_relevant_context_batch(
+    queries: List[str],
+    query_embeddings: np.ndarray,
+    vector_store_collection: Any,
+    top_k: int = 3,
+    lexical_index: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Retrieve context for several queries with a single Chroma query.
+
+    Returns one chunk list per query, in order. With a `lexical_index`, each
+    query's dense results are fused with its BM25 results. `select` as in
+    `retrieve_relevant_context`.
+    """
+    if lexical_index is None:
+        return dense_search_batch(query_embeddings, vector_store_collection, top_k, retrieval, select)
+
+    candidate_k = max(settings.HYBRID_CANDIDATES, top_k)
+    dense_lists = dense_search_batch(query_embeddings, vector_store_collection, candidate_k, retrieval, select=False)
+    fused_lists = [
+        fuse_with_lexical(
+            query,
+            dense,
+            lexical_index,
+            top_k=top_k,
+            candidate_k=candidate_k,
+            rrf_k=settings.HYBRID_RRF_K,
+            params=retrieval,
+        )
+        for query, dense in zip(queries, dense_lists)
+    ]
+    if not select:
+        return fused_lists
+    return [
+        diversify(query_embedding, fused, top_k, retrieval, vector_store_collection)
+        for query_embedding, fused in zip(query_embeddings, fused_lists)
+    ]
 
 
 def format_prompt_with_context(
     query: str,
     context_chunks: List[Dict[str, Any]],
     use_system_message: bool = False,
+    history: Optional[str] = None,
 ) -> List[Any]:
     """
     Format the prompt with retrieved context using LangChain's prompt template.
+
+    `history` (conversation summary and recent messages) is placed before
+    the context so follow-up questions can be resolved.
     """
     # Format context with better structure and source information
     context_parts = []
@@ -137,7 +323,7 @@ def format_prompt_with_context(
                     "If you don't have the information, say: "
                     "'I don't have that information in my knowledge base.'\n\n"
                 ),
-                ("human", "Context:\n{context}\n\nUser Question: {question}\n\nProvide a helpful answer based on the context above:"),
+                ("human", "{history}Context:\n{context}\n\nUser Question: {question}\n\nProvide a helpful answer based on the context above:"),
             ]
         )
     else:
@@ -148,6 +334,7 @@ def format_prompt_with_context(
                     "You are a helpful assistant. Use the following context to answer the user's question. "
                     "The context may contain Q&A discussions, documents, or other relevant information. "
                     "Extract and provide all relevant information from the context that helps answer the question.\n\n"
+                    "{history}"
                     "Context:\n{context}\n\n"
                     "User Question: {question}\n\n"
                     "Answer based on the context:",
@@ -155,23 +342,148 @@ def format_prompt_with_context(
             ]
         )
 
-    return prompt_template.format_messages(context=context_text, question=query)
+    history_text = f"Conversation so far:\n{history}\n\n" if history else ""
+    return prompt_template.format_messages(context=context_text, question=query, history=history_text)
+
 
 def generate_response(
     prompt_messages: List[Any],
     llm_client: BaseChatModel,
     temperature: float = 0.7,
+    completion_cache: Optional[CompletionCache] = None,
 ) -> str:
     """
     Generate a response using the configured LLM via LangChain.
     """
-    if hasattr(llm_client, "temperature"):
-        llm_client.temperature = temperature
+    key = completion_key(prompt_messages, llm_client, temperature) if completion_cache is not None else None
+    if key is not None:
+        cached = completion_cache.get(key)
+        if cached is not None:
+            return cached
+    with track_llm_call():
+        response = with_temperature(llm_client, temperature).invoke(prompt_messages)
+    if key is not None:
+        completion_cache.put(key, response.content)
+    return response.content
+
 
-    response = llm_client.invoke(prompt_messages)
+async def agenerate_response(
+    prompt_messages: List[Any],
+    llm_client: BaseChatModel,
+    temperature: float = 0.7,
+    completion_cache: Optional[CompletionCache] = None,
+) -> str:
+    """
+    Async variant of `generate_response` using LangChain's `ainvoke`.
+    """
+    key = completion_key(prompt_messages, llm_client, temperature) if completion_cache is not None else None
+    if key is not None:
+        cached = await asyncio.to_thread(completion_cache.get, key)
+        if cached is not None:
+            return cached
+    with track_llm_call():
+        response = await with_temperature(llm_client, temperature).ainvoke(prompt_messages)
+    if key is not None:
+        await asyncio.to_thread(completion_cache.put, key, response.content)
     return response.content
 
 
+async def astream_response(
+    prompt_messages: List[Any],
+    llm_client: BaseChatModel,
+    temperature: float = 0.7,
+    completion_cache: Optional[CompletionCache] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the LLM response token by token using LangChain's `astream`.
+
+    Closing the returned generator (or cancelling the consuming task) stops
+    the underlying provider stream, so no further tokens are generated.
+    A cached completion is yielded as a single `CachedCompletion` chunk;
+    only streams that run to the end are stored.
+    """
+    key = completion_key(prompt_messages, llm_client, temperature) if completion_cache is not None else None
+    if key is not None:
+        cached = await asyncio.to_thread(completion_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+    chunks: List[str] = []
+    with track_llm_call(stage="llm_stream"):
+        async for chunk in with_temperature(llm_client, temperature).astream(prompt_messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+    if key is not None:
+        await asyncio.to_thread(completion_cache.put, key, "".join(chunks))
+
+
+def collect_sources(context_chunks: List[Dict[str, Any]]) -> List[str]:
+    """Return the unique `source` values of the given chunks."""
+    return list(
+        {chunk.get("metadata", {}).get("source", "unknown") for chunk in context_chunks}
+    )
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000.0
+
+
+def _retrieval_fetch_k(top_k: int, reranker: Any) -> int:
+    """Over-fetch candidates when a reranker will pick the best ones."""
+    return max(top_k, settings.RERANK_CANDIDATES) if reranker is not None else top_k
+
+
+def rerank_and_select(
+    query: str,
+    query_embedding: np.ndarray,
+    context_chunks: List[Dict[str, Any]],
+    reranker: Any,
+    retrieval: Optional[RetrievalParams],
+    vector_store_collection: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Rerank over-fetched candidates and keep `RERANK_TOP_N` of them.
+
+    With MMR enabled (retrieval then ran with `select=False`), every
+    candidate is scored and the final chunks are an MMR selection with the
+    cross-encoder scores as relevance, so the reranked top is also diverse.
+    """
+    if retrieval is None or retrieval.mmr_lambda is None:
+        return reranker.rerank(query, context_chunks, settings.RERANK_TOP_N)
+    ranked = reranker.rerank(query, context_chunks, len(context_chunks))
+    return diversify(
+        query_embedding,
+        ranked,
+        settings.RERANK_TOP_N,
+        retrieval,
+        vector_store_collection,
+        relevance_key="rerank_score",
+    )
+
+
+def _skip_generation(context_chunks: List[Dict[str, Any]]) -> bool:
+    return not context_chunks and settings.RETRIEVAL_EARLY_EXIT
+
+
+def pack_context_chunks(
+    context_chunks: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Merge overlapping neighbours and fit chunks into `CONTEXT_TOKEN_BUDGET`.
+
+    Returns the chunks unchanged (and empty stats) when packing is disabled.
+    """
+    if not settings.CONTEXT_PACKING_ENABLED:
+        return context_chunks, {}
+    return pack_context(
+        context_chunks,
+        token_budget=settings.CONTEXT_TOKEN_BUDGET,
+        max_overlap=settings.CHUNK_OVERLAP,
+        chars_per_token=settings.CONTEXT_CHARS_PER_TOKEN,
+    )
+
+
 def rag_pipeline(
     query: str,
     vector_store_collection: Any,
@@ -179,20 +491,401 @@ def rag_pipeline(
     llm_client: BaseChatModel,
     top_k: int = 3,
     temperature: float = 0.7,
+    lexical_index: Any = None,
+    reranker: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    parent_store: Any = None,
+    completion_cache: Optional[CompletionCache] = None,
 ) -> Dict[str, Any]:
     """
     Complete RAG pipeline: retrieve context, build prompt, generate answer.
+
+    `cached` in the result is True when the answer came from the
+    `completion_cache`.
     """
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    query_embedding = generate_embedding(query, embedding_model)
+    timings["embedding_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
     context_chunks = retrieve_relevant_context(
-        query, vector_store_collection, embedding_model, top_k
+        query,
+        vector_store_collection,
+        embedding_model,
+        _retrieval_fetch_k(top_k, reranker),
+        lexical_index=lexical_index,
+        query_embedding=query_embedding,
+        retrieval=retrieval,
+        select=reranker is None,
     )
+    timings["retrieval_ms"] = _elapsed_ms(start)
+
+    if _skip_generation(context_chunks):
+        return {
+            "response": NO_CONTEXT_RESPONSE,
+            "sources": [],
+            "timings": timings,
+            "context_stats": {},
+            "no_context": True,
+            "cached": False,
+        }
+
+    if reranker is not None:
+        start = time.perf_counter()
+        context_chunks = rerank_and_select(
+            query, query_embedding, context_chunks, reranker, retrieval, vector_store_collection
+        )
+        timings["rerank_ms"] = _elapsed_ms(start)
+
+    if parent_store is not None:
+        start = time.perf_counter()
+        context_chunks = expand_to_parents(context_chunks, parent_store)
+        timings["expand_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    context_chunks, context_stats = pack_context_chunks(context_chunks)
     prompt_messages = format_prompt_with_context(query, context_chunks)
-    answer = generate_response(prompt_messages, llm_client, temperature)
+    timings["prompt_ms"] = _elapsed_ms(start)
 
-    sources = list(
-        {chunk.get("metadata", {}).get("source", "unknown") for chunk in context_chunks}
+    start = time.perf_counter()
+    answer = generate_response(prompt_messages, llm_client, temperature, completion_cache)
+    timings["generation_ms"] = _elapsed_ms(start)
+
+    return {
+        "response": answer,
+        "sources": collect_sources(context_chunks),
+        "timings": timings,
+        "context_stats": context_stats,
+        "no_context": False,
+        "cached": isinstance(answer, CachedCompletion),
+    }
+
+
+async def aprepare_rag_prompt(
+    query: str,
+    vector_store_collection: Any,
+    embedding_model: Any,
+    top_k: int = 3,
+    query_embedding: Optional[np.ndarray] = None,
+    lexical_index: Any = None,
+    reranker: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    parent_store: Any = None,
+    history: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the retrieval, rerank and prompt-building stages of the pipeline.
+
+    Returns a dict with `context_chunks`, `prompt_messages`, `sources`,
+    `timings`, `context_stats` (token savings of context packing) and
+    `no_context` (True when generation should be skipped; `prompt_messages`
+    is then empty), shared by `arag_pipeline` and the streaming chat path.
+    `history` is the rendered conversation memory for follow-up questions.
+    """
+    timings: Dict[str, float] = {}
+
+    if query_embedding is None:
+        start = time.perf_counter()
+        query_embedding = await run_in_embedding_executor(
+            generate_embedding, query, embedding_model
+        )
+        timings["embedding_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    context_chunks = await aretrieve_relevant_context(
+        query,
+        vector_store_collection,
+        embedding_model,
+        _retrieval_fetch_k(top_k, reranker),
+        query_embedding=query_embedding,
+        lexical_index=lexical_index,
+        retrieval=retrieval,
+        select=reranker is None,
+    )
+    timings["retrieval_ms"] = _elapsed_ms(start)
+
+    if _skip_generation(context_chunks):
+        return _no_context_prompt(timings)
+
+    if reranker is not None:
+        start = time.perf_counter()
+        context_chunks = await run_in_embedding_executor(
+            rerank_and_select,
+            query,
+            query_embedding,
+            context_chunks,
+            reranker,
+            retrieval,
+            vector_store_collection,
+        )
+        timings["rerank_ms"] = _elapsed_ms(start)
+
+    if parent_store is not None:
+        start = time.perf_counter()
+        context_chunks = await run_in_vector_store_executor(
+            expand_to_parents, context_chunks, parent_store
+        )
+        timings["expand_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    context_chunks, context_stats = pack_context_chunks(context_chunks)
+    prompt_messages = format_prompt_with_context(query, context_chunks, history=history)
+    timings["prompt_ms"] = _elapsed_ms(start)
+
+    return {
+        "context_chunks": context_chunks,
+        "prompt_messages": prompt_messages,
+        "sources": collect_sources(context_chunks),
+        "timings": timings,
+        "context_stats": context_stats,
+        "no_context": False,
+    }
+
+
+def _no_context_prompt(timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    prepared: Dict[str, Any] = {
+        "context_chunks": [],
+        "prompt_messages": [],
+        "sources": [],
+        "context_stats": {},
+        "no_context": True,
+    }
+    if timings is not None:
+        prepared["timings"] = timings
+    return prepared
+
+
+async def arag_pipeline(
+    query: str,
+    vector_store_collection: Any,
+    embedding_model: Any,
+    llm_client: BaseChatModel,
+    top_k: int = 3,
+    temperature: float = 0.7,
+    query_embedding: Optional[np.ndarray] = None,
+    lexical_index: Any = None,
+    reranker: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    parent_store: Any = None,
+    history: Optional[str] = None,
+    completion_cache: Optional[CompletionCache] = None,
+) -> Dict[str, Any]:
+    """
+    Async RAG pipeline that never blocks the event loop.
+
+    Same result shape as `rag_pipeline`.
+    """
+    prepared = await aprepare_rag_prompt(
+        query,
+        vector_store_collection,
+        embedding_model,
+        top_k,
+        query_embedding=query_embedding,
+        lexical_index=lexical_index,
+        reranker=reranker,
+        retrieval=retrieval,
+        parent_store=parent_store,
+        history=history,
+    )
+
+    if prepared["no_context"]:
+        return {
+            "response": NO_CONTEXT_RESPONSE,
+            "sources": [],
+            "timings": prepared["timings"],
+            "context_stats": {},
+            "no_context": True,
+            "cached": False,
+        }
+
+    start = time.perf_counter()
+    answer = await agenerate_response(prepared["prompt_messages"], llm_client, temperature, completion_cache)
+    timings = {**prepared["timings"], "generation_ms": _elapsed_ms(start)}
+
+    return {
+        "response": answer,
+        "sources": prepared["sources"],
+        "timings": timings,
+        "context_stats": prepared["context_stats"],
+        "no_context": False,
+        "cached": isinstance(answer, CachedCompletion),
+    }
+
+
+def _finish_prompts(
+    queries: List[str],
+    query_embeddings: np.ndarray,
+    context_lists: List[List[Dict[str, Any]]],
+    reranker: Any = None,
+    parent_store: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    vector_store_collection: Any = None,
+) -> List[Union[Dict[str, Any], Exception]]:
+    """Rerank, expand, pack and format each query's context; failures are returned per item."""
+    prepared: List[Union[Dict[str, Any], Exception]] = []
+    for query, query_embedding, context_chunks in zip(queries, query_embeddings, context_lists):
+        try:
+            if _skip_generation(context_chunks):
+                prepared.append(_no_context_prompt())
+                continue
+            if reranker is not None:
+                context_chunks = rerank_and_select(
+                    query, query_embedding, context_chunks, reranker, retrieval, vector_store_collection
+                )
+            context_chunks = expand_to_parents(context_chunks, parent_store)
+            context_chunks, context_stats = pack_context_chunks(context_chunks)
+            prepared.append(
+                {
+                    "context_chunks": context_chunks,
+                    "prompt_messages": format_prompt_with_context(query, context_chunks),
+                    "sources": collect_sources(context_chunks),
+                    "context_stats": context_stats,
+                    "no_context": False,
+                }
+            )
+        except Exception as exc:
+            prepared.append(exc)
+    return prepared
+
+
+async def aprepare_rag_prompts_batch(
+    queries: List[str],
+    vector_store_collection: Any,
+    embedding_model: Any,
+    top_k: int = 3,
+    query_embeddings: Optional[np.ndarray] = None,
+    lexical_index: Any = None,
+    reranker: Any = None,
+    retrieval: Optional[RetrievalParams] = None,
+    parent_store: Any = None,
+) -> Dict[str, Any]:
+    """
+    Batch variant of `aprepare_rag_prompt`.
+
+    All queries are embedded in one `encode` call and searched with one
+    multi-query Chroma call. Returns `prepared` (per query, in order, either
+    the same dict as `aprepare_rag_prompt` without timings or the exception
+    that query raised) and batch-level `timings`.
+    """
+    timings: Dict[str, float] = {}
+
+    if query_embeddings is None:
+        start = time.perf_counter()
+        query_embeddings = await run_in_embedding_executor(
+            generate_embeddings, list(queries), embedding_model
+        )
+        timings["embedding_ms"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    context_lists = await run_in_vector_store_executor(
+        retrieve_relevant_context_batch,
+        list(queries),
+        query_embeddings,
+        vector_store_collection,
+        _retrieval_fetch_k(top_k, reranker),
+        lexical_index,
+        retrieval,
+        reranker is None,
     )
+    timings["retrieval_ms"] = _elapsed_ms(start)
 
-    return {"response": answer, "sources": sources}
+    start = time.perf_counter()
+    prepared = await run_in_embedding_executor(
+        _finish_prompts,
+        list(queries),
+        query_embeddings,
+        context_lists,
+        reranker,
+        parent_store,
+        retrieval,
+        vector_store_collection,
+    )
+    timings["prompt_ms"] = _elapsed_ms(start)
+
+    return {"prepared": prepared, "timings": timings}
 
 
+async def _lookup_completions(
+    prompt_messages_list: List[List[Any]],
+    llm_client: BaseChatModel,
+    temperature: float,
+    completion_cache: Optional[CompletionCache],
+) -> Tuple[List[Optional[str]], Dict[int, CachedCompletion]]:
+    """Return the cache key of each prompt (None without a cache) and the hits by position."""
+    if completion_cache is None:
+        return [None] * len(prompt_messages_list), {}
+    keys = [completion_key(messages, llm_client, temperature) for messages in prompt_messages_list]
+    found = await asyncio.to_thread(completion_cache.get_many, keys)
+    return keys, {position: found[key] for position, key in enumerate(keys) if key in found}
+
+
+async def abatch_generate_responses(
+    prompt_messages_list: List[List[Any]],
+    llm_client: BaseChatModel,
+    temperature: float = 0.7,
+    max_concurrency: int = 8,
+    completion_cache: Optional[CompletionCache] = None,
+) -> List[Union[str, Exception]]:
+    """
+    Generate answers for many prompts with at most `max_concurrency` LLM calls in flight.
+
+    Results are in input order; a failed call yields its exception instead
+    of failing the whole batch. Cached prompts are not sent to the LLM.
+    """
+    if not prompt_messages_list:
+        return []
+    keys, cached = await _lookup_completions(prompt_messages_list, llm_client, temperature, completion_cache)
+    results: Dict[int, Union[str, Exception]] = dict(cached)
+    misses = [position for position in range(len(prompt_messages_list)) if position not in results]
+    if misses:
+        with track_llm_call(min(len(misses), max_concurrency), stage="llm_batch"):
+            outputs = await with_temperature(llm_client, temperature).abatch(
+                [prompt_messages_list[position] for position in misses],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            )
+        fresh: Dict[str, str] = {}
+        for position, output in zip(misses, outputs):
+            results[position] = output if isinstance(output, Exception) else output.content
+            if keys[position] is not None and not isinstance(output, Exception):
+                fresh[keys[position]] = output.content
+        if fresh:
+            await asyncio.to_thread(completion_cache.put_many, fresh)
+    return [results[position] for position in range(len(prompt_messages_list))]
+
+
+async def astream_batch_responses(
+    prompt_messages_list: List[List[Any]],
+    llm_client: BaseChatModel,
+    temperature: float = 0.7,
+    max_concurrency: int = 8,
+    completion_cache: Optional[CompletionCache] = None,
+) -> AsyncIterator[Tuple[int, Union[str, Exception]]]:
+    """
+    Like `abatch_generate_responses`, but yields `(index, answer)` as each call completes.
+
+    Cached answers are yielded first.
+    """
+    if not prompt_messages_list:
+        return
+    keys, cached = await _lookup_completions(prompt_messages_list, llm_client, temperature, completion_cache)
+    for position, answer in cached.items():
+        yield position, answer
+    misses = [position for position in range(len(prompt_messages_list)) if position not in cached]
+    if not misses:
+        return
+    with track_llm_call(min(len(misses), max_concurrency), stage="llm_batch"):
+        async for index, output in with_temperature(llm_client, temperature).abatch_as_completed(
+            [prompt_messages_list[position] for position in misses],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        ):
+            position = misses[index]
+            if isinstance(output, Exception):
+                yield position, output
+                continue
+            if keys[position] is not None:
+                await asyncio.to_thread(completion_cache.put, keys[position], output.content)
+            yield position, output.content
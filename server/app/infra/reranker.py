@@ -0,0 +1,105 @@
+"""
+Cross-encoder reranking of retrieved chunks.
+
+The retriever over-fetches candidates; a small cross-encoder scores every
+(query, chunk) pair in one CPU batch and only the best few chunks go into
+the prompt. Scores are cached per (query, chunk text hash) so repeated
+questions do not pay for inference again; keying on the text rather than
+the Chroma id means a chunk re-indexed under the same id (Q&A threads keep
+theirs as answers change) is scored afresh, with no invalidation needed.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any, Dict, List, Tuple
+
+from sentence_transformers import CrossEncoder
+
+
+def _chunk_key(chunk: Dict[str, Any]) -> str:
+    return hashlib.sha1(chunk["content"].encode("utf-8")).hexdigest()
+
+
+class Reranker:
+    """Scores (query, chunk) pairs with a cross-encoder, with an LRU score cache."""
+
+    def __init__(self, model: Any, cache_size: int = 10000) -> None:
+        self._model = model
+        self._cache_size = max(cache_size, 0)
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def rerank(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        top_n: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the `top_n` chunks ordered by cross-encoder score.
+
+        Each returned chunk carries its score as `rerank_score`.
+        """
+        if not chunks:
+            return []
+
+        keys = [(query, _chunk_key(chunk)) for chunk in chunks]
+        scores: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+            self._hits += len(scores)
+
+        missing = [(key, chunk) for key, chunk in zip(keys, chunks) if key not in scores]
+        if missing:
+            # One batched forward pass for every uncached pair
+            predicted = self._model.predict(
+                [(query, chunk["content"]) for _, chunk in missing],
+                batch_size=len(missing),
+                show_progress_bar=False,
+            )
+            with self._lock:
+                self._misses += len(missing)
+                for (key, _), score in zip(missing, predicted):
+                    scores[key] = float(score)
+                    if self._cache_size:
+                        self._cache[key] = float(score)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        ranked = sorted(
+            ({**chunk, "rerank_score": scores[key]} for key, chunk in zip(keys, chunks)),
+            key=lambda chunk: chunk["rerank_score"],
+            reverse=True,
+        )
+        return ranked[:top_n]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return score cache hit/miss counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+def initialize_reranker(
+    model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    cache_size: int = 10000,
+) -> Reranker:
+    """
+    Load a cross-encoder on CPU and wrap it in a caching `Reranker`.
+    """
+    try:
+        model = CrossEncoder(model_name, device="cpu")
+    except Exception as e:
+        raise RuntimeError(f"Failed to load reranker model '{model_name}': {e}")
+    return Reranker(model, cache_size=cache_size)
@@ -0,0 +1,177 @@
+"""
+Per-request retrieval settings and the dense retrieval leg.
+
+`RetrievalParams` carries the knobs a single chat request may override
+(e.g. MMR diversity, metadata filters, relevance cut-offs). `dense_search`
+applies them on top of the raw Chroma similarity search and is shared by
+dense-only and hybrid retrieval.
+
+MMR is always the last selection step. When later stages still rank the
+candidates (RRF fusion with BM25, cross-encoder reranking), `dense_search`
+is called with `select=False` and the final top-k is picked with
+`diversify` on their output; selecting before would keep the whole
+over-fetched pool and leave the final cut to relevance alone.
+"""
+
+from dataclasses import asdict, dataclass
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.infra.mmr import mmr_select
+from app.infra.vector_store import search_by_embeddings
+
+
+@dataclass(frozen=True)
+class RetrievalParams:
+    """Retrieval settings resolved for one request."""
+
+    # MMR trade-off between relevance (1.0) and diversity (0.0); None disables MMR
+    mmr_lambda: Optional[float] = None
+    # Number of candidates fetched from Chroma before MMR selection
+    mmr_fetch_k: int = 20
+    # Chroma `where` clause (see `metadata_filters.build_where`)
+    where: Optional[Dict[str, Any]] = None
+    # Drop chunks farther than this distance (squared-L2 scale); None keeps all
+    max_distance: Optional[float] = None
+    # Cut the ranking at the first distance jump larger than this; None keeps all
+    distance_gap: Optional[float] = None
+
+    @property
+    def has_cutoffs(self) -> bool:
+        return self.max_distance is not None or self.distance_gap is not None
+
+    def cache_key(self) -> str:
+        """Stable string identifying these settings (for cache namespaces)."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+def apply_distance_cutoffs(
+    results: List[Dict[str, Any]],
+    max_distance: Optional[float] = None,
+    distance_gap: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Keep the relevant prefix of a distance-ordered result list.
+
+    Results farther than `max_distance` are dropped, and the list is cut
+    before the first result whose distance exceeds the previous one by more
+    than `distance_gap` (adaptive top-k: one clearly relevant chunk is not
+    padded with unrelated ones). Results without a `distance` are kept.
+    """
+    kept: List[Dict[str, Any]] = []
+    previous: Optional[float] = None
+    for result in results:
+        distance = result.get("distance")
+        if distance is None:
+            kept.append(result)
+            continue
+        if max_distance is not None and distance > max_distance:
+            break
+        if distance_gap is not None and previous is not None and distance - previous > distance_gap:
+            break
+        kept.append(result)
+        previous = distance
+    return kept
+
+
+def dense_search(
+    query_embedding: np.ndarray,
+    collection: Any,
+    top_k: int,
+    params: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Dense similarity search honouring per-request retrieval params.
+
+    Distance cut-offs are applied first, so the result may hold fewer than
+    `top_k` chunks (or none). With MMR enabled, `mmr_fetch_k` candidates are
+    fetched together with their embeddings and a diverse `top_k` subset is
+    selected from the ones that pass the cut-offs; with `select=False` the
+    candidates are returned as they are (embeddings included) for a later
+    `diversify`.
+    """
+    return dense_search_batch([query_embedding], collection, top_k, params, select)[0]
+
+
+def dense_search_batch(
+    query_embeddings: np.ndarray,
+    collection: Any,
+    top_k: int,
+    params: Optional[RetrievalParams] = None,
+    select: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """
+    `dense_search` for several queries with a single Chroma query.
+
+    Returns one result list per query embedding, in order.
+    """
+    if params is None:
+        return search_by_embeddings(query_embeddings, collection, top_k)
+    if params.mmr_lambda is None:
+        result_lists = search_by_embeddings(query_embeddings, collection, top_k, where=params.where)
+        return [_apply_cutoffs(results, params) for results in result_lists]
+
+    candidate_lists = search_by_embeddings(
+        query_embeddings,
+        collection,
+        max(top_k, params.mmr_fetch_k),
+        include_embeddings=True,
+        where=params.where,
+    )
+    candidate_lists = [_apply_cutoffs(candidates, params) for candidates in candidate_lists]
+    if not select:
+        return candidate_lists
+    return [
+        mmr_select(query_embedding, candidates, top_k, params.mmr_lambda)
+        for query_embedding, candidates in zip(query_embeddings, candidate_lists)
+    ]
+
+
+def mmr_pool_size(top_k: int, params: Optional[RetrievalParams]) -> int:
+    """Number of ranked candidates to keep for a final `diversify` to `top_k`."""
+    if params is None or params.mmr_lambda is None:
+        return top_k
+    return max(top_k, params.mmr_fetch_k)
+
+
+def diversify(
+    query_embedding: np.ndarray,
+    candidates: List[Dict[str, Any]],
+    top_k: int,
+    params: Optional[RetrievalParams],
+    collection: Any,
+    relevance_key: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Final MMR selection of `top_k` chunks from ranked `candidates`.
+
+    Candidates without an `embedding` (BM25-only hits) get theirs from
+    `collection`. `relevance_key` names a candidate field to use as the
+    relevance instead of the similarity to the query (see `mmr_select`).
+    Without MMR the first `top_k` candidates are returned.
+    """
+    if params is None or params.mmr_lambda is None:
+        return candidates[:top_k]
+    missing = [candidate["id"] for candidate in candidates if "embedding" not in candidate and candidate.get("id")]
+    if missing:
+        found = collection.get(ids=missing, include=["embeddings"])
+        stored = dict(zip(found.get("ids") or [], found.get("embeddings") or []))
+        candidates = [
+            candidate if "embedding" in candidate else {
+                **candidate,
+                "embedding": np.asarray(stored[candidate["id"]], dtype=np.float32),
+            }
+            for candidate in candidates
+            # Chunks deleted since they were ranked are dropped
+            if "embedding" in candidate or candidate.get("id") in stored
+        ]
+    return mmr_select(query_embedding, candidates, top_k, params.mmr_lambda, relevance_key)
+
+
+def _apply_cutoffs(results: List[Dict[str, Any]], params: RetrievalParams) -> List[Dict[str, Any]]:
+    if not params.has_cutoffs:
+        return results
+    return apply_distance_cutoffs(results, params.max_distance, params.distance_gap)
@@ -0,0 +1,70 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers that ask for the same key share one execution: the
+first caller starts the work, later callers wait for its result (or its
+exception) instead of running it again. The shared execution runs in its
+own task, so a caller that times out or disconnects does not cancel it for
+the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self, wait_timeout: Optional[float] = None) -> None:
+        # Maximum time a coalesced caller waits for the shared result
+        self._wait_timeout = wait_timeout
+        self._in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._executions = 0
+        self._coalesced = 0
+        self._timeouts = 0
+        self._errors = 0
+
+    async def run(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run `func` for `key`, or join the execution already in flight.
+
+        Returns `(result, shared)` where `shared` is True for callers that
+        joined another caller's execution. Exceptions raised by `func`
+        propagate to every caller; a joining caller that waits longer than
+        `wait_timeout` gets `asyncio.TimeoutError`.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self._executions += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+            return await asyncio.shield(task), False
+
+        self._coalesced += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), self._wait_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise
+        return result, True
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters; `coalesced` is the number of executions saved."""
+        requests = self._executions + self._coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "timeouts": self._timeouts,
+            "errors": self._errors,
+            "coalesced_ratio": self._coalesced / requests if requests else 0.0,
+        }
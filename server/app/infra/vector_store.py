@@ -5,65 +5,284 @@ This module exposes a minimal API for:
 - Initializing a persistent ChromaDB collection
 - Adding document chunks with embeddings
 - Performing similarity search
+
+`sync_source_chunks` replaces the chunks of one source while reusing the
+stored embeddings of chunks whose id (derived from their text) is
+unchanged.
+
+Chunks are written with `add_documents_streaming`: it consumes any
+iterable (e.g. a chunk generator), embeds fixed-size batches and adds each
+batch to Chroma before reading further, so memory stays bounded by
+`batch_size * sort_window` chunks however large the document is.
+
+Functions that write or delete chunks optionally keep a
+`lexical_index.LexicalIndex` in sync so hybrid search sees the same chunks.
+Searches accept a Chroma `where` clause (see `metadata_filters`) so
+filtering happens inside the index.
+
+Embeddings are float32 arrays of unit rows (see `embeddings`) everywhere in
+the app. The pinned Chroma client only accepts nested lists of Python
+floats, so they are converted once, right at the Chroma call
+(`to_chroma_embeddings`). New collections use the inner-product space
+("ip"), which ranks unit vectors like cosine similarity; collections
+created earlier keep the squared-L2 space they were built with. Search
+results report distances on the squared-L2 scale in both cases
+(`2 * (1 - cosine)`), so distance cut-offs and the Q&A fast path do not
+depend on the space.
 """
 
-from typing import List, Dict, Any
+from itertools import islice
+import logging
+import os
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional
 import uuid
 from datetime import datetime, timezone
 
 import chromadb
 from chromadb.config import Settings
+import numpy as np
 
 from app.infra.embeddings import generate_embeddings, generate_embedding
+from app.infra.metadata_filters import DOCUMENT_TYPE
+from app.infra.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
 
+VECTOR_SPACES = ("l2", "ip", "cosine")
+# Titles of solved Q&A threads, searched by the accepted-answer fast path
+QA_TITLE_COLLECTION = "qa_titles"
 
-def initialize_vector_store(persist_directory: str = "./vector_db"):
+
+def initialize_vector_store(persist_directory: str = "./vector_db", space: str = "ip"):
     """
     Initialize the vector database.
 
     Args:
         persist_directory: Directory to persist the database
+        space: HNSW distance ("l2", "ip" or "cosine") of a newly created
+            collection; an existing collection keeps its own
 
     Returns:
         (client, collection) tuple
     """
     client = chromadb.PersistentClient(path=persist_directory)
-    collection = client.get_or_create_collection(name="documents")
-    return client, collection
+    return client, open_collection(client, "documents", space)
+
+
+def open_collection(client, name: str, space: str = "ip"):
+    """Open collection `name` of `client`, creating it in `space` when it does not exist."""
+    if space not in VECTOR_SPACES:
+        raise ValueError(f"Unknown vector space {space!r}, expected one of {VECTOR_SPACES}")
+    try:
+        # get_or_create_collection would overwrite the metadata of an existing
+        # collection, which must keep describing the space its index was built in
+        return client.get_collection(name=name)
+    except ValueError:
+        return client.get_or_create_collection(name=name, metadata={"hnsw:space": space})
+
+
+def collection_space(collection) -> str:
+    """HNSW distance of `collection` ("l2" unless it was created with another)."""
+    return (getattr(collection, "metadata", None) or {}).get("hnsw:space", "l2")
+
+
+def to_chroma_embeddings(embeddings) -> List[List[float]]:
+    """Convert a float32 embedding matrix (or a list of rows) to the nested lists Chroma validates."""
+    return np.asarray(embeddings, dtype=np.float32).tolist()
 
 
 def add_documents_to_vector_store(
-    documents: List[Dict[str, Any]],
+    documents: Iterable[Dict[str, Any]],
     collection,
     embedding_model,
-):
+    lexical_index=None,
+    batch_size: int = 64,
+    sort_window: int = 8,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
     """
     Add documents to the vector store.
 
     Args:
-        documents: List of document chunks with content and metadata
+        documents: Document chunks with content and metadata (any iterable)
         collection: ChromaDB collection
         embedding_model: Model to generate embeddings
+        lexical_index: Optional BM25 index to update with the same chunks
+        batch_size, sort_window, on_progress: see `add_documents_streaming`
+
+    Returns:
+        Number of chunks added
     """
-    texts = [doc["content"] for doc in documents]
-    embeddings = generate_embeddings(texts, embedding_model)
-    ids = [str(uuid.uuid4()) for _ in range(len(documents))]
+    return add_documents_streaming(
+        documents,
+        collection,
+        embedding_model,
+        lexical_index=lexical_index,
+        batch_size=batch_size,
+        sort_window=sort_window,
+        on_progress=on_progress,
+    )
+
+
+def _windows(documents: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(documents)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
 
-    indexed_at = datetime.now(timezone.utc).isoformat()
+def add_documents_streaming(
+    documents: Iterable[Dict[str, Any]],
+    collection,
+    embedding_model,
+    lexical_index=None,
+    batch_size: int = 64,
+    sort_window: int = 8,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Embed and add chunks batch by batch while consuming `documents` lazily.
+
+    Up to `batch_size * sort_window` chunks are read at a time and sorted by
+    length, so each embedding batch holds texts of similar length (less
+    padding); every batch is added to Chroma (and `lexical_index`) as soon
+    as it is embedded. Chunks keep their `id` when they have one.
+    `on_progress` is called with the number of chunks added so far after
+    each batch. When a batch fails, the chunks added by this call are
+    removed again before the error is raised.
+
+    Returns:
+        Number of chunks added
+    """
+    batch_size = max(batch_size, 1)
+    # One timestamp for the whole document, however many batches it takes
+    now = datetime.now(timezone.utc)
+    added_ids: List[str] = []
+    try:
+        for window in _windows(documents, batch_size * max(sort_window, 1)):
+            window.sort(key=lambda doc: len(doc["content"]))
+            for start in range(0, len(window), batch_size):
+                batch = window[start:start + batch_size]
+                ids = [doc.get("id") or str(uuid.uuid4()) for doc in batch]
+                texts = [doc["content"] for doc in batch]
+                metadatas = _index_metadatas(batch, now)
+                embeddings = generate_embeddings(texts, embedding_model)
+                with observe_stage("chroma_add"):
+                    collection.add(
+                        ids=ids,
+                        embeddings=to_chroma_embeddings(embeddings),
+                        documents=texts,
+                        metadatas=metadatas,
+                    )
+                added_ids.extend(ids)
+                if lexical_index is not None:
+                    lexical_index.add(ids, texts, metadatas)
+                if on_progress is not None:
+                    on_progress(len(added_ids))
+    except Exception:
+        if added_ids:
+            with observe_stage("chroma_delete"):
+                collection.delete(ids=added_ids)
+            if lexical_index is not None:
+                lexical_index.delete(added_ids)
+        raise
+    return len(added_ids)
+
+
+def _index_metadatas(
+    documents: List[Dict[str, Any]],
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
     metadatas: List[Dict[str, Any]] = []
     for doc in documents:
         md = doc.get("metadata", {}).copy()
         # Add / update indexed_at timestamp for tracking
-        md.setdefault("indexed_at", indexed_at)
+        md.setdefault("indexed_at", now.isoformat())
+        # Numeric copy of indexed_at and content type for metadata filters
+        md.setdefault("indexed_at_ts", now.timestamp())
+        md.setdefault("type", DOCUMENT_TYPE)
         metadatas.append(md)
+    return metadatas
 
-    collection.add(
-        ids=ids,
-        embeddings=embeddings,
-        documents=texts,
-        metadatas=metadatas,
+
+def sync_source_chunks(
+    source: str,
+    documents: List[Dict[str, Any]],
+    collection,
+    embedding_model,
+    lexical_index=None,
+    batch_size: int = 64,
+    sort_window: int = 8,
+    on_progress: Optional[Callable[[int], None]] = None,
+    on_written: Optional[Callable[[], None]] = None,
+) -> Dict[str, int]:
+    """
+    Make `documents` (chunks with stable `id`s) the only chunks of `source`.
+
+    New ids are embedded and added in batches with `add_documents_streaming`
+    (`on_progress` counts embedded chunks); chunks whose id is already
+    stored keep their embedding and only get fresh metadata. Then
+    `on_written` runs, and only after that is every other chunk of the
+    source (including old random-id chunks) deleted. If anything fails
+    before the deletion, the added chunks are removed and the reused ones
+    get their previous metadata back, so the source keeps its old chunks.
+    Returns counts of `embedded`, `reused` and `deleted` chunks.
+    """
+    existing = collection.get(where={"source": source}, include=["metadatas"])
+    previous_metadatas = dict(zip(existing.get("ids") or [], existing.get("metadatas") or []))
+    ids = [doc["id"] for doc in documents]
+    stale_ids = list(previous_metadatas.keys() - set(ids))
+    now = datetime.now(timezone.utc)
+    metadatas = _index_metadatas(documents, now)
+
+    fresh = [position for position, doc_id in enumerate(ids) if doc_id not in previous_metadatas]
+    # Rolls its own batches back when it fails
+    embedded = add_documents_streaming(
+        (
+            {**documents[position], "metadata": metadatas[position]}
+            for position in fresh
+        ),
+        collection,
+        embedding_model,
+        batch_size=batch_size,
+        sort_window=sort_window,
+        on_progress=on_progress,
     )
 
+    reused = [position for position, doc_id in enumerate(ids) if doc_id in previous_metadatas]
+    reused_ids = [ids[position] for position in reused]
+    try:
+        if reused:
+            collection.update(
+                ids=reused_ids,
+                metadatas=[metadatas[position] for position in reused],
+            )
+        if on_written is not None:
+            on_written()
+    except Exception:
+        fresh_ids = [ids[position] for position in fresh]
+        if fresh_ids:
+            with observe_stage("chroma_delete"):
+                collection.delete(ids=fresh_ids)
+        if reused:
+            collection.update(ids=reused_ids, metadatas=[previous_metadatas[doc_id] for doc_id in reused_ids])
+        raise
+
+    if lexical_index is not None and documents:
+        lexical_index.add(ids, [doc["content"] for doc in documents], metadatas)
+
+    if stale_ids:
+        with observe_stage("chroma_delete"):
+            collection.delete(ids=stale_ids)
+        if lexical_index is not None:
+            lexical_index.delete(stale_ids)
+
+    return {"embedded": embedded, "reused": len(reused), "deleted": len(stale_ids)}
+
 
 def search_similar_documents(
     query: str,
@@ -84,27 +303,100 @@ def search_similar_documents(
         List of similar documents with metadata.
     """
     query_embedding = generate_embedding(query, embedding_model)
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k,
-    )
+    return search_by_embedding(query_embedding, collection, top_k)
 
-    formatted_results: List[Dict[str, Any]] = []
-    if results.get("documents") and len(results["documents"]) > 0:
-        documents = results["documents"][0]
-        metadatas = results.get("metadatas", [[]])[0] if results.get("metadatas") else [{}] * len(documents)
-        ids = results.get("ids", [[]])[0] if results.get("ids") else [None] * len(documents)
-
-        for doc, metadata, doc_id in zip(documents, metadatas, ids):
-            formatted_results.append(
-                {
-                    "content": doc,
-                    "metadata": metadata or {},
-                    "id": doc_id,
-                }
-            )
 
-    return formatted_results
+def search_by_embedding(
+    query_embedding: np.ndarray,
+    collection,
+    top_k: int = 3,
+    include_embeddings: bool = False,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search the vector store with a precomputed query embedding.
+
+    Split out from `search_similar_documents` so callers can run the
+    embedding and the Chroma query on different executors (or reuse an
+    embedding they already have). Results are ordered by `distance`
+    (squared-L2 scale, lower is closer). With `include_embeddings`, each
+    result also carries its stored vector under `embedding` (a float32
+    array, used by MMR).
+    `where` restricts the search to chunks with matching metadata.
+    """
+    return search_by_embeddings(
+        [query_embedding],
+        collection,
+        top_k,
+        include_embeddings=include_embeddings,
+        where=where,
+    )[0]
+
+
+def search_by_embeddings(
+    query_embeddings: np.ndarray,
+    collection,
+    top_k: int = 3,
+    include_embeddings: bool = False,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Search the vector store for several query embeddings in one Chroma call.
+
+    Returns one result list per query, in the same order and format as
+    `search_by_embedding`.
+    """
+    if len(query_embeddings) == 0:
+        return []
+    include = ["documents", "metadatas", "distances"]
+    if include_embeddings:
+        include.append("embeddings")
+    query_kwargs: Dict[str, Any] = {}
+    if where:
+        query_kwargs["where"] = where
+    with observe_stage("chroma_query"):
+        results = collection.query(
+            query_embeddings=to_chroma_embeddings(query_embeddings),
+            n_results=top_k,
+            include=include,
+            **query_kwargs,
+        )
+
+    all_documents = results.get("documents") or []
+    all_metadatas = results.get("metadatas") or []
+    all_ids = results.get("ids") or []
+    all_distances = results.get("distances") or []
+    all_embeddings = results.get("embeddings") if include_embeddings else None
+    # Inner-product / cosine distances are 1 - cosine for unit vectors
+    distance_scale = 1.0 if collection_space(collection) == "l2" else 2.0
+
+    formatted: List[List[Dict[str, Any]]] = []
+    for query_idx in range(len(query_embeddings)):
+        documents = all_documents[query_idx] if query_idx < len(all_documents) else []
+        metadatas = all_metadatas[query_idx] if query_idx < len(all_metadatas) else [{}] * len(documents)
+        ids = all_ids[query_idx] if query_idx < len(all_ids) else [None] * len(documents)
+        distances = all_distances[query_idx] if query_idx < len(all_distances) else None
+        embeddings = (
+            np.asarray(all_embeddings[query_idx], dtype=np.float32)
+            if all_embeddings and query_idx < len(all_embeddings)
+            else None
+        )
+
+        formatted_results: List[Dict[str, Any]] = []
+        for idx, (doc, metadata, doc_id) in enumerate(zip(documents, metadatas, ids)):
+            result = {
+                "content": doc,
+                "metadata": metadata or {},
+                "id": doc_id,
+            }
+            if distances is not None:
+                result["distance"] = distances[idx] * distance_scale
+            if embeddings is not None:
+                result["embedding"] = embeddings[idx]
+            formatted_results.append(result)
+        formatted.append(formatted_results)
+
+    return formatted
 
 
 def list_indexed_documents(collection) -> List[Dict[str, Any]]:
@@ -153,9 +445,11 @@ def list_indexed_documents(collection) -> List[Dict[str, Any]]:
     return list(indexed.values())
 
 
-def delete_documents_by_source(collection, source: str) -> int:
+def delete_documents_by_source(collection, source: str, lexical_index=None) -> int:
     """
     Delete all document chunks in the vector store for a given source.
+
+    The same chunks are removed from `lexical_index` when one is given.
     """
     try:
         # Get all documents and filter by source
@@ -178,12 +472,94 @@ def delete_documents_by_source(collection, source: str) -> int:
         
         # Delete matching documents
         if matching_ids:
-            collection.delete(ids=matching_ids)
+            with observe_stage("chroma_delete"):
+                collection.delete(ids=matching_ids)
+            if lexical_index is not None:
+                lexical_index.delete(matching_ids)
             return len(matching_ids)
         
         return 0
     except Exception as e:
-        print(f"Error deleting documents by source '{source}': {e}")
+        logger.error("Error deleting documents by source %r: %s", source, e)
         raise
 
 
+
+
+# Written to the vector DB directory once older chunks have been backfilled
+FILTER_METADATA_MARKER = "filter_metadata_backfill.done"
+
+
+def backfill_filter_metadata(collection, lexical_index=None, batch_size: int = 1000) -> int:
+    """
+    Add the metadata fields used by retrieval filters to older chunks.
+
+    Chunks indexed before filtering existed lack `type` (uploaded documents)
+    and `indexed_at_ts`. Chroma never matches a chunk missing the filtered
+    field, so these are filled in once (see `backfill_filter_metadata_once`).
+    The collection is read in pages of `batch_size`. Returns the number of
+    chunks updated.
+    """
+    total = 0
+    offset = 0
+    while True:
+        results = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        ids = results.get("ids") or []
+        if not ids:
+            break
+        offset += len(ids)
+        texts = results.get("documents") or []
+        metadatas = results.get("metadatas") or []
+
+        updated_ids: List[str] = []
+        updated_texts: List[str] = []
+        updated_metadatas: List[Dict[str, Any]] = []
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            metadata = dict(metadata or {})
+            changed = False
+            if "type" not in metadata:
+                metadata["type"] = DOCUMENT_TYPE
+                changed = True
+            if "indexed_at_ts" not in metadata and metadata.get("indexed_at"):
+                try:
+                    metadata["indexed_at_ts"] = datetime.fromisoformat(metadata["indexed_at"]).timestamp()
+                    changed = True
+                except ValueError:
+                    pass
+            if changed:
+                updated_ids.append(doc_id)
+                updated_texts.append(text)
+                updated_metadatas.append(metadata)
+
+        if updated_ids:
+            collection.update(ids=updated_ids, metadatas=updated_metadatas)
+            if lexical_index is not None:
+                lexical_index.add(updated_ids, updated_texts, updated_metadatas)
+            total += len(updated_ids)
+    if total:
+        logger.info("Backfilled filter metadata for %d chunk(s)", total)
+    return total
+
+
+def filter_metadata_backfilled(persist_directory: str) -> bool:
+    return os.path.exists(os.path.join(persist_directory, FILTER_METADATA_MARKER))
+
+
+def backfill_filter_metadata_once(
+    persist_directory: str,
+    get_collection: Callable[[], Any],
+    get_lexical_index: Callable[[], Any] = lambda: None,
+) -> Optional[int]:
+    """
+    Run `backfill_filter_metadata` unless the marker file says it already ran.
+
+    The collection and lexical index are only loaded when the backfill is
+    needed, so the steady-state cost is one `stat`. Returns the number of
+    chunks updated, or None when the backfill had already been done.
+    """
+    if filter_metadata_backfilled(persist_directory):
+        return None
+    updated = backfill_filter_metadata(get_collection(), get_lexical_index())
+    with open(os.path.join(persist_directory, FILTER_METADATA_MARKER), "w", encoding="utf-8") as f:
+        f.write(datetime.now(timezone.utc).isoformat())
+    return updated
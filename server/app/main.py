@@ -1,9 +1,15 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import auth, chat, documents, health
+from app.api.routes import auth, chat, documents, health, metrics
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import engine, init_db
+from app.core.deps import get_embedding_pool, get_lexical_index, get_vector_store_collection
+from app.infra.executors import shutdown_executors
+from app.infra.metrics import MetricsMiddleware, register_gauge_callbacks
+from app.infra.vector_store import backfill_filter_metadata_once, filter_metadata_backfilled
 from app.api.routes import questions
 from app.api.routes import debug
 
@@ -29,6 +35,10 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Per-route latency histograms (outermost, so CORS preflights are timed too)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
     # Routers
     app.include_router(health.router, prefix="/health", tags=["health"])
     app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -36,11 +46,39 @@ def create_app() -> FastAPI:
     app.include_router(documents.router, prefix="/documents", tags=["documents"])
     app.include_router(questions.router, prefix="/questions", tags=["questions"])
     app.include_router(debug.router, prefix="/debug", tags=["debug"])
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 
     @app.on_event("startup")
     async def on_startup() -> None:
         # Create tables if they do not exist yet
         init_db()
+        # Older chunks lack the metadata that retrieval filters match on; done
+        # once per vector DB, in a thread so startup does not wait for it
+        if not filter_metadata_backfilled(settings.VECTOR_DB_PATH):
+            app.state.filter_metadata_backfill = asyncio.create_task(
+                asyncio.to_thread(
+                    backfill_filter_metadata_once,
+                    settings.VECTOR_DB_PATH,
+                    get_vector_store_collection,
+                    get_lexical_index,
+                )
+            )
+        if settings.METRICS_ENABLED:
+            # Sampled on scrape only
+            register_gauge_callbacks(
+                vector_store_chunks=lambda: get_vector_store_collection().count(),
+                db_pool_checked_out=lambda: engine.pool.checkedout(),
+            )
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        shutdown_executors()
+        # Stop the embedding pool only if indexing started it
+        if get_embedding_pool.cache_info().currsize:
+            pool = get_embedding_pool()
+            if pool is not None:
+                pool.close()
 
     @app.get("/")
     async def root() -> dict:
@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Text, DateTime
+from app.core.database import Base
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    
+    id = Column(String(128), primary_key=True)
+    # Scopes the conversation to the user who started it
+    owner = Column(String(64), nullable=True)
+    summary = Column(Text, nullable=False, default="")
+    # JSON list of {"role": "user" | "assistant", "content": ...}
+    turns = Column(Text, nullable=False, default="[]")
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
@@ -1,13 +1,65 @@
 # schemas/chat.py
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
+class RetrievalOptions(BaseModel):
+    # Per-request overrides; unset fields fall back to the server settings
+    use_mmr: Optional[bool] = None
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    mmr_fetch_k: Optional[int] = Field(None, ge=1, le=200)
+    # Relevance cut-offs on Chroma distances (lower is closer)
+    max_distance: Optional[float] = Field(None, ge=0.0)
+    distance_gap: Optional[float] = Field(None, ge=0.0)
+
+class RetrievalFilters(BaseModel):
+    # Restrict retrieval to chunks whose metadata matches every set field
+    sources: Optional[List[str]] = None
+    # Content types: "document", "qa_pair", "question"
+    types: Optional[List[str]] = None
+    # Only solved Q&A threads (documents are unaffected)
+    solved_only: bool = False
+    indexed_after: Optional[datetime] = None
+    indexed_before: Optional[datetime] = None
+
 class ChatRequest(BaseModel):
     message: str
+    # Continue an earlier conversation (as returned in ChatResponse); omit to start one.
+    # Unknown or expired ids start a new conversation, returned with a new id
+    conversation_id: Optional[str] = Field(None, min_length=1, max_length=128)
+    retrieval: Optional[RetrievalOptions] = None
+    filters: Optional[RetrievalFilters] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[str]
     conversation_id: str
-    timestamp: Optional[datetime]
\ No newline at end of file
+    timestamp: Optional[datetime]
+    # Where the answer came from: "llm", "semantic_cache", "completion_cache"
+    # (identical prompt answered before), "coalesced", "qa_fast_path" (a solved thread's accepted answer, sources[0] is the
+    # thread) or "no_context" (nothing relevant was retrieved, the LLM was skipped)
+    origin: str = "llm"
+    # Per-stage latency breakdown in milliseconds (embedding, retrieval, rerank, ...)
+    timings: Optional[Dict[str, float]] = None
+
+class ChatBatchRequest(BaseModel):
+    messages: List[str] = Field(..., min_length=1)
+    retrieval: Optional[RetrievalOptions] = None
+    filters: Optional[RetrievalFilters] = None
+    # Stream results as NDJSON lines in completion order instead of one response
+    stream: bool = False
+
+class ChatBatchItem(BaseModel):
+    # Position of the message in the request
+    index: int
+    response: Optional[str] = None
+    sources: List[str] = []
+    # "llm", "semantic_cache", "completion_cache", "qa_fast_path" or "no_context";
+    # None when the item failed
+    origin: Optional[str] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+    # Batch-level latency breakdown in milliseconds
+    timings: Optional[Dict[str, float]] = None
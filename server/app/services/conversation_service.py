@@ -0,0 +1,200 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.infra.conversation_store import ConversationState, ConversationStore
+from app.infra.rag_engine import agenerate_response
+
+
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "human",
+            "Update the running summary of a conversation between a user and an assistant. "
+            "Keep the facts later questions may refer to: topics, names, numbers, lists and "
+            "what the user asked for. Write at most {max_words} words and no preamble.\n\n"
+            "Current summary:\n{summary}\n\n"
+            "New turns:\n{turns}\n\n"
+            "Updated summary:",
+        )
+    ]
+)
+
+
+class ConversationService:
+    """
+    Server-side chat memory keyed by `conversation_id`.
+
+    The latest `max_recent_turns` messages are kept verbatim (each truncated
+    to `turn_max_chars`); once there are more, all but the newest few
+    exchanges are folded into a rolling summary of at most
+    `summary_max_chars` by the LLM, so the
+    history added to a prompt stays bounded however long the conversation
+    runs. Folding happens in the background after an answer is recorded;
+    the next turn of the same conversation waits for it.
+
+    Conversation ids are issued by the server: a client id is only honoured
+    for an existing conversation of the same owner, and a conversation is
+    never written under an id owned by someone else.
+    """
+
+    def __init__(
+        self,
+        store: ConversationStore,
+        llm_client: Any,
+        max_recent_turns: int = 6,
+        turn_max_chars: int = 1000,
+        summary_max_chars: int = 1500,
+    ) -> None:
+        self._store = store
+        self._llm_client = llm_client
+        self._max_recent_turns = max(max_recent_turns, 2)
+        self._turn_max_chars = turn_max_chars
+        self._summary_max_chars = summary_max_chars
+        self._pending_folds: Dict[str, "asyncio.Task[None]"] = {}
+        self._folds = 0
+        self._fold_failures = 0
+
+    async def _call_store(self, method: str, *args: Any) -> Any:
+        func = getattr(self._store, method)
+        if self._store.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def _wait_for_fold(self, conversation_id: str) -> None:
+        task = self._pending_folds.get(conversation_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def load(self, conversation_id: Optional[str], owner: Optional[str] = None) -> ConversationState:
+        """
+        Return the conversation, or a new empty one.
+
+        Unknown, expired and foreign ids (a conversation owned by someone
+        else) all start a new conversation under a new server-issued id,
+        which the caller returns to the client.
+        """
+        if conversation_id:
+            await self._wait_for_fold(conversation_id)
+            state = await self._call_store("get", conversation_id)
+            if state is not None and state.owner == owner:
+                return state
+        return ConversationState(conversation_id=str(uuid4()), owner=owner)
+
+    async def record_exchange(self, state: ConversationState, question: str, answer: str) -> None:
+        """Append a question / answer pair and schedule summarization when needed."""
+        await self._wait_for_fold(state.conversation_id)
+        turns = [
+            {"role": "user", "content": self._truncate(question)},
+            {"role": "assistant", "content": self._truncate(answer)},
+        ]
+
+        def append(stored: Optional[ConversationState]) -> Optional[ConversationState]:
+            if stored is None:
+                stored = ConversationState(conversation_id=state.conversation_id, owner=state.owner)
+            elif stored.owner != state.owner:
+                return None
+            stored.turns.extend(turns)
+            return stored
+
+        saved = await self._call_store("update", state.conversation_id, append)
+        if saved is None:
+            print(f"Conversation {state.conversation_id} belongs to another user; exchange not recorded")
+            return
+
+        if len(saved.turns) > self._max_recent_turns:
+            conversation_id = saved.conversation_id
+            task = asyncio.ensure_future(self._fold(conversation_id))
+            self._pending_folds[conversation_id] = task
+            task.add_done_callback(lambda done: self._forget_fold(conversation_id, done))
+
+    def _forget_fold(self, conversation_id: str, task: "asyncio.Task[None]") -> None:
+        # A newer fold of the same conversation may already be registered
+        if self._pending_folds.get(conversation_id) is task:
+            del self._pending_folds[conversation_id]
+
+    async def _fold(self, conversation_id: str) -> None:
+        """Summarize all but the newest half of the recent turns into the summary."""
+        state = await self._call_store("get", conversation_id)
+        if state is None:
+            return
+        # An even count keeps question / answer pairs together
+        keep = max(self._max_recent_turns // 2 // 2 * 2, 2)
+        overflow = state.turns[:-keep]
+        if not overflow:
+            return
+        try:
+            summary = await self._summarize(state.summary, overflow)
+        except Exception as exc:
+            print(f"Conversation summary failed, keeping an extractive summary: {exc}")
+            self._fold_failures += 1
+            summary = self._fallback_summary(state.summary, overflow)
+
+        def apply(stored: Optional[ConversationState]) -> Optional[ConversationState]:
+            # Turns recorded while summarizing are kept; skip if the state moved on otherwise
+            if stored is None or stored.summary != state.summary or stored.turns[: len(overflow)] != overflow:
+                return None
+            stored.summary = summary[: self._summary_max_chars]
+            stored.turns = stored.turns[len(overflow):]
+            return stored
+
+        if await self._call_store("update", conversation_id, apply) is not None:
+            self._folds += 1
+
+    async def _summarize(self, summary: str, turns: List[Dict[str, str]]) -> str:
+        messages = _SUMMARY_PROMPT.format_messages(
+            max_words=max(self._summary_max_chars // 6, 20),
+            summary=summary or "(none)",
+            turns=self._format_turns(turns),
+        )
+        return (await agenerate_response(messages, self._llm_client, temperature=0.0)).strip()
+
+    def _fallback_summary(self, summary: str, turns: List[Dict[str, str]]) -> str:
+        # Keep the newest material when the combined text is too long
+        lines = [summary] if summary else []
+        lines.extend(f"User asked: {turn['content'][:200]}" for turn in turns if turn["role"] == "user")
+        return "\n".join(lines)[-self._summary_max_chars:]
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self._turn_max_chars:
+            return text
+        return text[: self._turn_max_chars] + " [...]"
+
+    @staticmethod
+    def _format_turns(turns: List[Dict[str, str]]) -> str:
+        return "\n".join(
+            f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}" for turn in turns
+        )
+
+    def format_history(self, state: ConversationState) -> str:
+        """Render the summary and recent turns for the prompt ("" when there is no history)."""
+        parts: List[str] = []
+        if state.summary:
+            parts.append(f"Summary of earlier conversation:\n{state.summary}")
+        if state.turns:
+            parts.append(f"Recent messages:\n{self._format_turns(state.turns)}")
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def retrieval_query(state: ConversationState, message: str) -> str:
+        """
+        Text to embed for retrieval.
+
+        Follow-ups ("and the second one?") rarely stand on their own, so the
+        previous user message is prepended; no extra LLM call is needed.
+        """
+        for turn in reversed(state.turns):
+            if turn["role"] == "user":
+                return f"{turn['content']}\n{message}"
+        return message
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._store.stats(),
+            "max_recent_turns": self._max_recent_turns,
+            "folds": self._folds,
+            "fold_failures": self._fold_failures,
+            "pending_folds": len(self._pending_folds),
+        }
@@ -1,12 +1,14 @@
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
 from fastapi import HTTPException, UploadFile
 
 from app.core.config import settings
 from app.infra.document_loader import (
-    process_uploaded_file,
+    estimate_chunk_count,
+    iter_uploaded_file_chunks,
+    process_uploaded_file_parent_child,
     validate_file_upload,
     extract_text_from_pdf,
 )
@@ -14,6 +16,7 @@ from app.infra.vector_store import (
     add_documents_to_vector_store,
     list_indexed_documents,
     delete_documents_by_source,
+    sync_source_chunks,
 )
 from app.schemas.documents import (
     DocumentUploadResponse,
@@ -22,6 +25,9 @@ from app.schemas.documents import (
     IndexedDocumentInfo,
     IndexedDocumentDeleteResponse,
 )
+from app.infra.lexical_index import LexicalIndex
+from app.infra.parent_store import ParentStore
+from app.services.semantic_cache_service import SemanticCacheService
 from app.services.storage_service import StorageService
 
 
@@ -32,14 +38,27 @@ class DocumentService:
     Responsibilities:
     - Upload files to S3 via StorageService
     - Extract text (txt/md/pdf)
-    - Chunk and index documents in the vector store
+    - Chunk and index documents in the vector store (flat chunks, or child
+      chunks plus parent windows when a `parent_store` is configured)
     - List existing documents in S3
+    - Invalidate cached chat answers built from re-indexed / removed documents
     """
 
-    def __init__(self, storage: StorageService, collection, embedding_model) -> None:
+    def __init__(
+        self,
+        storage: StorageService,
+        collection,
+        embedding_model,
+        answer_cache: Optional[SemanticCacheService] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        parent_store: Optional[ParentStore] = None,
+    ) -> None:
         self._storage = storage
         self._collection = collection
         self._embedding_model = embedding_model
+        self._answer_cache = answer_cache
+        self._lexical_index = lexical_index
+        self._parent_store = parent_store
 
     def list_files(self) -> List[DocumentInfo]:
         """List documents stored in S3 and map them to typed schema."""
@@ -92,7 +111,12 @@ class DocumentService:
         """
         Remove all indexed chunks for a given document source from the vector store.
         """
-        deleted_chunks = delete_documents_by_source(self._collection, source)
+        deleted_chunks = delete_documents_by_source(
+            self._collection, source, lexical_index=self._lexical_index
+        )
+        if self._parent_store is not None:
+            self._parent_store.delete_source(source)
+        self._invalidate_cached_answers(source)
         return IndexedDocumentDeleteResponse(
             source=source,
             deleted_chunks=deleted_chunks,
@@ -151,32 +175,111 @@ class DocumentService:
             filename=effective_filename,
         )
 
-        documents = process_uploaded_file(
+        if self._parent_store is not None:
+            return self._index_parent_child(file_content, effective_filename, s3_key)
+
+        # Chunks are generated, embedded and written batch by batch, so
+        # memory stays bounded for large files
+        documents = iter_uploaded_file_chunks(
             file_content=file_content,
             filename=effective_filename,
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP,
         )
+        expected = estimate_chunk_count(len(file_content), settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        chunks_count = add_documents_to_vector_store(
+            documents,
+            self._collection,
+            self._embedding_model,
+            lexical_index=self._lexical_index,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            sort_window=settings.INGEST_SORT_WINDOW_BATCHES,
+            on_progress=self._progress_reporter(effective_filename, expected),
+        )
 
-        if not documents:
+        if not chunks_count:
             raise HTTPException(
                 status_code=400,
                 detail="No content could be extracted from the file",
             )
+        self._invalidate_cached_answers(effective_filename)
 
-        add_documents_to_vector_store(
-            documents,
+        return DocumentIndexResponse(
+            message=f"Successfully indexed {chunks_count} document chunks",
+            filename=effective_filename,
+            chunks_count=chunks_count,
+            s3_key=s3_key,
+        )
+
+    def _index_parent_child(
+        self,
+        file_content: str,
+        filename: str,
+        s3_key: str,
+    ) -> DocumentIndexResponse:
+        """
+        Index a document as child chunks plus parent windows, replacing its previous chunks.
+
+        Children whose text did not change keep their stored embeddings. The
+        parent windows are written once the children are, and the old
+        children are deleted last, so a failed re-index leaves the previous
+        version searchable.
+        """
+        parents, children = process_uploaded_file_parent_child(
+            file_content=file_content,
+            filename=filename,
+            parent_size=settings.PARENT_CHUNK_SIZE,
+            child_size=settings.CHILD_CHUNK_SIZE,
+            child_overlap=settings.CHILD_CHUNK_OVERLAP,
+        )
+        if not children:
+            raise HTTPException(
+                status_code=400,
+                detail="No content could be extracted from the file",
+            )
+
+        counts = sync_source_chunks(
+            filename,
+            children,
             self._collection,
             self._embedding_model,
+            lexical_index=self._lexical_index,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            sort_window=settings.INGEST_SORT_WINDOW_BATCHES,
+            on_progress=self._progress_reporter(filename, len(children)),
+            on_written=lambda: self._parent_store.replace_source(filename, parents),
         )
+        self._invalidate_cached_answers(filename)
 
         return DocumentIndexResponse(
-            message=f"Successfully indexed {len(documents)} document chunks",
-            filename=effective_filename,
-            chunks_count=len(documents),
+            message=(
+                f"Successfully indexed {len(children)} child chunks in {len(parents)} parent windows "
+                f"({counts['embedded']} embedded, {counts['reused']} unchanged)"
+            ),
+            filename=filename,
+            chunks_count=len(children),
             s3_key=s3_key,
         )
 
+    @staticmethod
+    def _progress_reporter(filename: str, expected: int) -> Callable[[int], None]:
+        """Progress callback that logs every `INGEST_PROGRESS_PERCENT_STEP` percent of `expected` chunks."""
+        step = max(settings.INGEST_PROGRESS_PERCENT_STEP, 1)
+        reported = [0]
+
+        def report(done: int) -> None:
+            percent = min(done * 100 // max(expected, 1), 100)
+            if percent // step > reported[0] // step:
+                reported[0] = percent
+                print(f"Indexing {filename}: {done}/{expected} chunks ({percent}%)")
+
+        return report
+
+    def _invalidate_cached_answers(self, source: str) -> None:
+        """Drop cached chat answers that were built from `source`."""
+        if self._answer_cache is not None:
+            self._answer_cache.invalidate_sources([source])
+
     def _extract_text_for_indexing(self, content: bytes, filename: str) -> str:
         """
         Internal helper to extract text based on file extension.
@@ -1,31 +1,117 @@
 # server/app/services/qa_indexing_service.py
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from app.models.question import Question
 from app.models.answer import Answer
 from app.infra.embeddings import generate_embeddings
+from app.infra.lexical_index import LexicalIndex
+from app.infra.metrics import observe_stage
+from app.infra.qa_fast_path import title_entry_id
+from app.infra.vector_store import to_chroma_embeddings
 from app.services.answer_service import AnswerService
+from app.services.semantic_cache_service import SemanticCacheService
 
 
 class QAIndexingService:
-    """Service to index Q&A data into the vector store for RAG retrieval."""
+    """
+    Service to index Q&A data into the vector store for RAG retrieval.
+
+    With a `title_collection`, the title of every thread with an accepted
+    answer is also embedded there on its own, for the chat fast path
+    (see `infra.qa_fast_path`).
+    """
     
-    def __init__(self, db: Session, collection, embedding_model):
+    def __init__(
+        self,
+        db: Session,
+        collection,
+        embedding_model,
+        answer_cache: Optional[SemanticCacheService] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        title_collection=None,
+    ):
         self.db = db
         self.collection = collection
         self.embedding_model = embedding_model
         self._answer_service = AnswerService(db)  # For computing vote scores
+        self._answer_cache = answer_cache
+        self._lexical_index = lexical_index
+        self._title_collection = title_collection
     
     def _safe_delete(self, ids: List[str]) -> None:
         """Safely delete entries, ignoring errors if they don't exist."""
         if not ids:
             return
         try:
-            self.collection.delete(ids=ids)
+            with observe_stage("chroma_delete"):
+                self.collection.delete(ids=ids)
         except Exception as e:
             # entry might not exist, which is fine
             pass
+        if self._lexical_index is not None:
+            self._lexical_index.delete(ids)
+    
+    def _add_entry(self, entry_id: str, embedding, text: str, metadata: dict) -> None:
+        """Add a single entry to the vector store (and the BM25 index)."""
+        self._add_entries([entry_id], [embedding], [text], [metadata])
+    
+    @staticmethod
+    def _with_timestamps(metadatas: List[dict]) -> List[dict]:
+        # Numeric copy of indexed_at for range filters
+        return [
+            {
+                **metadata,
+                "indexed_at_ts": datetime.fromisoformat(metadata["indexed_at"]).timestamp(),
+            }
+            for metadata in metadatas
+        ]
+    
+    def _add_entries(self, entry_ids: List[str], embeddings, texts: List[str], metadatas: List[dict]) -> None:
+        """Add entries to the vector store (and the BM25 index) in one call."""
+        metadatas = self._with_timestamps(metadatas)
+        with observe_stage("chroma_add"):
+            self.collection.add(
+                ids=entry_ids,
+                embeddings=to_chroma_embeddings(embeddings),
+                documents=texts,
+                metadatas=metadatas,
+            )
+        if self._lexical_index is not None:
+            self._lexical_index.add(entry_ids, texts, metadatas)
+    
+    def _titled(self, metadata: dict) -> bool:
+        """Whether the thread gets a fast-path title entry."""
+        return self._title_collection is not None and metadata.get("has_accepted_answer") == "True"
+    
+    def _sync_titles(
+        self,
+        titled: List[Tuple[Question, dict]],
+        embeddings,
+        untitled_ids: List[int],
+    ) -> None:
+        """Upsert the title entries of `titled` threads and drop those of `untitled_ids`."""
+        if self._title_collection is None:
+            return
+        if untitled_ids:
+            try:
+                self._title_collection.delete(ids=[title_entry_id(question_id) for question_id in untitled_ids])
+            except Exception:
+                # entry might not exist, which is fine
+                pass
+        if titled:
+            with observe_stage("chroma_add"):
+                self._title_collection.upsert(
+                    ids=[title_entry_id(question.id) for question, _ in titled],
+                    embeddings=to_chroma_embeddings(embeddings),
+                    documents=[question.title for question, _ in titled],
+                    metadatas=self._with_timestamps([metadata for _, metadata in titled]),
+                )
+    
+    def _invalidate_cached_answers(self, question_id: int) -> None:
+        """Drop cached chat answers that were built from this Q&A thread."""
+        if self._answer_cache is not None:
+            self._answer_cache.invalidate_sources([f"qa/question/{question_id}"])
     
     def _get_answer_vote_score(self, answer_id: int) -> int:
         """Get vote score for an answer, with error handling."""
@@ -35,100 +121,131 @@ class QAIndexingService:
             print(f"Error getting vote score for answer {answer_id}: {e}")
             return 0
     
+    def _build_qa_entry(self, question: Question) -> Tuple[str, Dict[str, Any], List[str]]:
+        """
+        Build the combined text and metadata of a question with ALL its current
+        answers, plus the ids of the entries it replaces.
+        """
+        # Always fetch fresh answers from DB
+        # Order by accepted status first, then by creation date (can't order by vote_score directly)
+        answers = self.db.query(Answer).filter(
+            Answer.question_id == question.id
+        ).order_by(Answer.is_accepted.desc(), Answer.created_at.asc()).all()
+        
+        # Calculate vote scores for each answer and sort by score (in Python)
+        answers_with_scores = []
+        for answer in answers:
+            try:
+                vote_score = self._get_answer_vote_score(answer.id)
+                answers_with_scores.append((answer, vote_score))
+            except Exception as e:
+                print(f"Error getting vote score for answer {answer.id}: {e}")
+                answers_with_scores.append((answer, 0))
+        
+        # Sort by accepted status, then by vote score (descending)
+        answers_with_scores.sort(key=lambda x: (x[0].is_accepted, x[1]), reverse=True)
+        answers = [ans for ans, _ in answers_with_scores]
+        
+        # Build combined text
+        qa_text_parts = [
+            f"Question: {question.title}",
+            f"Details: {question.content}",
+        ]
+        
+        if answers:
+            qa_text_parts.append("\nAnswers:")
+            for idx, answer in enumerate(answers, 1):
+                try:
+                    accepted_marker = "✓ (Accepted)" if answer.is_accepted else ""
+                    # Get vote score safely
+                    vote_score = self._get_answer_vote_score(answer.id)
+                    vote_info = f" (Score: {vote_score})" if vote_score > 0 else ""
+                    qa_text_parts.append(
+                        f"\nAnswer {idx} {accepted_marker}{vote_info}:\n{answer.content}"
+                    )
+                except Exception as e:
+                    print(f"Error processing answer {answer.id}: {e}")
+                    # Still include the answer, just without vote info
+                    qa_text_parts.append(
+                        f"\nAnswer {idx}:\n{answer.content}"
+                    )
+        else:
+            qa_text_parts.append("\n(No answers yet)")
+        
+        qa_text = "\n".join(qa_text_parts)
+        
+        # Metadata
+        qa_metadata = {
+            "source": f"qa/question/{question.id}",
+            "type": "qa_pair",
+            "question_id": str(question.id),
+            "author_id": str(question.author_id),
+            "created_at": question.created_at.isoformat() if hasattr(question.created_at, 'isoformat') else str(question.created_at),
+            "is_solved": str(question.is_solved),
+            "answer_count": str(len(answers)),
+            "has_accepted_answer": str(any(a.is_accepted for a in answers)),
+            "indexed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        # Lets the chat fast path return the accepted answer without the LLM
+        accepted = next((a for a in answers if a.is_accepted), None)
+        if accepted is not None:
+            qa_metadata["accepted_answer_id"] = str(accepted.id)
+            qa_metadata["accepted_answer_text"] = accepted.content
+        
+        # Older question-only / per-answer entries of this question
+        ids_to_remove = [
+            f"qa_combined_{question.id}",
+            f"qa_question_{question.id}",
+        ]
+        ids_to_remove.extend(f"qa_answer_{answer.id}" for answer in answers)
+        return qa_text, qa_metadata, ids_to_remove
+    
+    @staticmethod
+    def _build_question_entry(question: Question) -> Tuple[str, Dict[str, Any]]:
+        """Text and metadata of a question without answers."""
+        question_text = f"Question: {question.title}\n\n{question.content}"
+        question_metadata = {
+            "source": f"qa/question/{question.id}",
+            "type": "question",
+            "question_id": str(question.id),
+            "author_id": str(question.author_id),
+            "created_at": question.created_at.isoformat() if hasattr(question.created_at, 'isoformat') else str(question.created_at),
+            "is_solved": str(question.is_solved),
+            "answer_count": "0",
+            "indexed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return question_text, question_metadata
+    
     def index_question_with_answers(self, question: Question) -> None:
         """
         Index a question together with ALL its current answers as a single chunk.
         This method ensures no duplicates by always removing old entries first.
         """
         try:
-            # Always fetch fresh answers from DB
-            # Order by accepted status first, then by creation date (can't order by vote_score directly)
-            answers = self.db.query(Answer).filter(
-                Answer.question_id == question.id
-            ).order_by(Answer.is_accepted.desc(), Answer.created_at.asc()).all()
-            
-            # Calculate vote scores for each answer and sort by score (in Python)
-            answers_with_scores = []
-            for answer in answers:
-                try:
-                    vote_score = self._get_answer_vote_score(answer.id)
-                    answers_with_scores.append((answer, vote_score))
-                except Exception as e:
-                    print(f"Error getting vote score for answer {answer.id}: {e}")
-                    answers_with_scores.append((answer, 0))
-            
-            # Sort by accepted status, then by vote score (descending)
-            answers_with_scores.sort(key=lambda x: (x[0].is_accepted, x[1]), reverse=True)
-            answers = [ans for ans, _ in answers_with_scores]
+            qa_text, qa_metadata, ids_to_remove = self._build_qa_entry(question)
+            titled = self._titled(qa_metadata)
             
-            # Build combined text
-            qa_text_parts = [
-                f"Question: {question.title}",
-                f"Details: {question.content}",
-            ]
-            
-            if answers:
-                qa_text_parts.append("\nAnswers:")
-                for idx, answer in enumerate(answers, 1):
-                    try:
-                        accepted_marker = "✓ (Accepted)" if answer.is_accepted else ""
-                        # Get vote score safely
-                        vote_score = self._get_answer_vote_score(answer.id)
-                        vote_info = f" (Score: {vote_score})" if vote_score > 0 else ""
-                        qa_text_parts.append(
-                            f"\nAnswer {idx} {accepted_marker}{vote_info}:\n{answer.content}"
-                        )
-                    except Exception as e:
-                        print(f"Error processing answer {answer.id}: {e}")
-                        # Still include the answer, just without vote info
-                        qa_text_parts.append(
-                            f"\nAnswer {idx}:\n{answer.content}"
-                        )
-            else:
-                qa_text_parts.append("\n(No answers yet)")
-            
-            qa_text = "\n".join(qa_text_parts)
-            
-            # Metadata
-            qa_metadata = {
-                "source": f"qa/question/{question.id}",
-                "type": "qa_pair",
-                "question_id": str(question.id),
-                "author_id": str(question.author_id),
-                "created_at": question.created_at.isoformat() if hasattr(question.created_at, 'isoformat') else str(question.created_at),
-                "is_solved": str(question.is_solved),
-                "answer_count": str(len(answers)),
-                "has_accepted_answer": str(any(a.is_accepted for a in answers)),
-                "indexed_at": datetime.now(timezone.utc).isoformat(),
-            }
-            
-            # Generate embedding
-            embedding = generate_embeddings([qa_text], self.embedding_model)[0]
-            
-            # Remove old entries
-            question_id = question.id
-            ids_to_remove = [
-                f"qa_combined_{question_id}",
-                f"qa_question_{question_id}",
-            ]
-            
-            # Also remove any individual answer entries for this question
-            answer_ids = [f"qa_answer_{answer.id}" for answer in answers]
-            ids_to_remove.extend(answer_ids)
+            # Generate embeddings (the combined entry and, when solved, the title)
+            embeddings = generate_embeddings(
+                [qa_text, question.title] if titled else [qa_text],
+                self.embedding_model,
+            )
             
             # Remove old entries
             self._safe_delete(ids_to_remove)
             
             # Add the combined entry
+            question_id = question.id
             combined_id = f"qa_combined_{question_id}"
-            self.collection.add(
-                ids=[combined_id],
-                embeddings=[embedding],
-                documents=[qa_text],
-                metadatas=[qa_metadata],
-            )
+            self._add_entry(combined_id, embeddings[0], qa_text, qa_metadata)
+            if titled:
+                self._sync_titles([(question, qa_metadata)], embeddings[1:], [])
+            else:
+                self._sync_titles([], None, [question_id])
+            
+            self._invalidate_cached_answers(question_id)
             
-            print(f"Successfully indexed question {question.id} with {len(answers)} answer(s)")
+            print(f"Successfully indexed question {question.id} with {qa_metadata['answer_count']} answer(s)")
             
         except Exception as e:
             print(f"Error in index_question_with_answers for question {question.id}: {e}")
@@ -141,17 +258,7 @@ class QAIndexingService:
         Index only the question (for when there are no answers yet).
         """
         try:
-            question_text = f"Question: {question.title}\n\n{question.content}"
-            question_metadata = {
-                "source": f"qa/question/{question.id}",
-                "type": "question",
-                "question_id": str(question.id),
-                "author_id": str(question.author_id),
-                "created_at": question.created_at.isoformat() if hasattr(question.created_at, 'isoformat') else str(question.created_at),
-                "is_solved": str(question.is_solved),
-                "answer_count": "0",
-                "indexed_at": datetime.now(timezone.utc).isoformat(),
-            }
+            question_text, question_metadata = self._build_question_entry(question)
             
             # Generate embedding
             embedding = generate_embeddings([question_text], self.embedding_model)[0]
@@ -166,12 +273,10 @@ class QAIndexingService:
             ])
             
             # Add question-only entry
-            self.collection.add(
-                ids=[question_only_id],
-                embeddings=[embedding],
-                documents=[question_text],
-                metadatas=[question_metadata],
-            )
+            self._add_entry(question_only_id, embedding, question_text, question_metadata)
+            self._sync_titles([], None, [question_id])
+            
+            self._invalidate_cached_answers(question_id)
             
             print(f"Successfully indexed question {question.id} (no answers yet)")
             
@@ -218,6 +323,63 @@ class QAIndexingService:
             traceback.print_exc()
             raise
     
+    def reindex_all_questions(self, batch_size: int = 64) -> int:
+        """
+        Re-index every question with its answers, `batch_size` threads at a time.
+
+        Each batch is embedded in one call (spread over the embedding process
+        pool when one is configured) and written with one Chroma add. Used
+        for backfills, e.g. after changing the embedding model. Questions
+        without answers keep their question-only entry (as `index_question`
+        writes it). Returns the number of questions indexed.
+        """
+        indexed = 0
+        last_id = 0
+        while True:
+            questions = (
+                self.db.query(Question)
+                .filter(Question.id > last_id)
+                .order_by(Question.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not questions:
+                break
+            entry_ids: List[str] = []
+            texts: List[str] = []
+            metadatas: List[dict] = []
+            ids_to_remove: List[str] = []
+            titled: List[Tuple[Question, dict]] = []
+            untitled_ids: List[int] = []
+            for question in questions:
+                text, metadata, replaced = self._build_qa_entry(question)
+                ids_to_remove.extend(replaced)
+                if metadata["answer_count"] == "0":
+                    text, metadata = self._build_question_entry(question)
+                    entry_ids.append(f"qa_question_{question.id}")
+                else:
+                    entry_ids.append(f"qa_combined_{question.id}")
+                texts.append(text)
+                metadatas.append(metadata)
+                if self._titled(metadata):
+                    titled.append((question, metadata))
+                else:
+                    untitled_ids.append(question.id)
+            # One encode call for the entries and the fast-path titles
+            embeddings = generate_embeddings(
+                texts + [question.title for question, _ in titled],
+                self.embedding_model,
+            )
+            self._safe_delete(ids_to_remove)
+            self._add_entries(entry_ids, embeddings[: len(texts)], texts, metadatas)
+            self._sync_titles(titled, embeddings[len(texts):], untitled_ids)
+            for question in questions:
+                self._invalidate_cached_answers(question.id)
+            indexed += len(questions)
+            last_id = questions[-1].id
+            print(f"Re-indexed {indexed} questions")
+        return indexed
+    
     def remove_question(self, question_id: int) -> None:
         """Remove a question and its answers from the vector store."""
         try:
@@ -232,6 +394,8 @@ class QAIndexingService:
             ] + answer_ids
             
             self._safe_delete(ids_to_remove)
+            self._sync_titles([], None, [question_id])
+            self._invalidate_cached_answers(question_id)
             print(f"Removed question {question_id} from vector store")
         except Exception as e:
             print(f"Error removing question {question_id}: {e}")
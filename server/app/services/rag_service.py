@@ -1,10 +1,37 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
-from typing import List, Any
+import re
+import time
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from uuid import uuid4
 
+import numpy as np
+
 from app.core.config import settings
-from app.infra.rag_engine import rag_pipeline
+from app.infra.completion_cache import CachedCompletion, CompletionCache
+from app.infra.conversation_store import ConversationState
+from app.infra.embedding_batcher import EmbeddingBatcher
+from app.infra.embeddings import generate_embedding, generate_embeddings
+from app.infra.executors import run_in_embedding_executor, run_in_vector_store_executor
+from app.infra.lexical_index import LexicalIndex
+from app.infra.metadata_filters import build_where
+from app.infra.parent_store import ParentStore
+from app.infra.qa_fast_path import match_accepted_answers
+from app.infra.rag_engine import (
+    NO_CONTEXT_RESPONSE,
+    abatch_generate_responses,
+    aprepare_rag_prompt,
+    aprepare_rag_prompts_batch,
+    arag_pipeline,
+    astream_batch_responses,
+    astream_response,
+)
+from app.infra.reranker import Reranker
+from app.infra.single_flight import SingleFlight
+from app.infra.retrieval import RetrievalParams
+from app.schemas.chat import RetrievalFilters, RetrievalOptions
+from app.services.conversation_service import ConversationService
+from app.services.semantic_cache_service import SemanticCacheService
 
 
 @dataclass
@@ -13,14 +40,61 @@ class RAGResult:
     sources: List[str]
     conversation_id: str
     timestamp: datetime
+    origin: str = "llm"
+    # Per-stage wall-clock timings in milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class RAGBatchItem:
+    # Position of the query in the batch
+    index: int
+    text: Optional[str] = None
+    sources: List[str] = field(default_factory=list)
+    # "llm", "semantic_cache", "qa_fast_path" or "no_context"; None when the item failed
+    origin: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class RAGBatchResult:
+    items: List[RAGBatchItem]
+    # Batch-level wall-clock timings in milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
 
 
 class RAGService:
     """
     High-level service that orchestrates the RAG pipeline.
 
-    It delegates the heavy lifting to the existing `rag_engine.rag_pipeline`
-    while providing a clean interface to the API layer.
+    It delegates the heavy lifting to `rag_engine.arag_pipeline`, which keeps
+    embedding, Chroma and LLM calls off the event loop, while providing a
+    clean interface to the API layer.
+
+    The query embedding is computed once (through the micro-batcher when
+    configured), used for a semantic cache lookup and, on a miss, reused for
+    retrieval.
+
+    With `qa_fast_path_min_similarity` and a `qa_title_collection` set, a
+    question at least that similar to the title of a solved Q&A thread is
+    answered with the thread's accepted answer (`origin="qa_fast_path"`),
+    skipping retrieval and generation.
+
+    Questions for which retrieval finds nothing relevant are answered with
+    `NO_CONTEXT_RESPONSE` without calling the LLM (`origin="no_context"`);
+    those answers are not cached, so they cannot outlive newly indexed
+    documents.
+
+    With `conversations`, single questions and streams remember earlier
+    turns per `conversation_id` (batches stay stateless).
+
+    With a `completion_cache`, a prompt identical to an earlier one (same
+    question, context, model and temperature) is answered from it
+    (`origin="completion_cache"`). Callers pass `use_cache=False` to bypass
+    both answer caches; they are then neither read nor written.
+
+    With a `single_flight` coalescer, concurrent `answer_question` calls for
+    the same normalized query and retrieval settings share one pipeline run.
     """
 
     def __init__(
@@ -30,35 +104,595 @@ class RAGService:
         llm_client: Any,
         top_k: int | None = None,
         temperature: float | None = None,
+        answer_cache: Optional[SemanticCacheService] = None,
+        embedding_batcher: Optional[EmbeddingBatcher] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        reranker: Optional[Reranker] = None,
+        single_flight: Optional[SingleFlight] = None,
+        parent_store: Optional[ParentStore] = None,
+        qa_fast_path_min_similarity: Optional[float] = None,
+        qa_title_collection: Any = None,
+        conversations: Optional[ConversationService] = None,
+        completion_cache: Optional[CompletionCache] = None,
     ) -> None:
         self._vector_store_collection = vector_store_collection
         self._embedding_model = embedding_model
         self._llm_client = llm_client
         self._top_k = top_k or settings.TOP_K_RETRIEVAL
         self._temperature = temperature or settings.LLM_TEMPERATURE
+        self._answer_cache = answer_cache
+        self._embedding_batcher = embedding_batcher
+        self._lexical_index = lexical_index
+        self._reranker = reranker
+        self._single_flight = single_flight
+        self._parent_store = parent_store
+        self._conversations = conversations
+        self._completion_cache = completion_cache
+        self._qa_fast_path_min_similarity = qa_fast_path_min_similarity if qa_title_collection is not None else None
+        self._qa_title_collection = qa_title_collection
+        self._qa_fast_path_lookups = 0
+        self._qa_fast_path_hits = 0
+        self._context_stats: Dict[str, int] = {}
 
-    async def answer_question(self, query: str) -> RAGResult:
+    async def _embed_query(self, query: str, timings: Dict[str, float]) -> np.ndarray:
+        start = time.perf_counter()
+        if self._embedding_batcher is not None:
+            embedding = await self._embedding_batcher.embed(query)
+        else:
+            embedding = await run_in_embedding_executor(
+                generate_embedding, query, self._embedding_model
+            )
+        timings["embedding_ms"] = (time.perf_counter() - start) * 1000.0
+        return embedding
+
+    async def _match_accepted_answers(
+        self,
+        query_embeddings: np.ndarray,
+        params: RetrievalParams,
+        timings: Dict[str, float],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Accepted Q&A answers usable instead of generation (None per query otherwise)."""
+        if self._qa_fast_path_min_similarity is None or len(query_embeddings) == 0:
+            return [None] * len(query_embeddings)
+        start = time.perf_counter()
+        matches = await run_in_vector_store_executor(
+            match_accepted_answers,
+            query_embeddings,
+            self._qa_title_collection,
+            self._qa_fast_path_min_similarity,
+            params.where,
+        )
+        timings["qa_fast_path_ms"] = (time.perf_counter() - start) * 1000.0
+        self._qa_fast_path_lookups += len(matches)
+        self._qa_fast_path_hits += sum(1 for match in matches if match is not None)
+        return matches
+
+    @staticmethod
+    def _resolve_retrieval(
+        options: Optional[RetrievalOptions],
+        filters: Optional[RetrievalFilters] = None,
+    ) -> RetrievalParams:
+        """Merge per-request retrieval options and filters with the server defaults."""
+        use_mmr = settings.MMR_ENABLED
+        mmr_lambda = settings.MMR_LAMBDA
+        mmr_fetch_k = settings.MMR_FETCH_K
+        max_distance = settings.RETRIEVAL_MAX_DISTANCE
+        distance_gap = settings.RETRIEVAL_DISTANCE_GAP
+        if options is not None:
+            if options.mmr_lambda is not None:
+                # Passing a lambda implies MMR unless explicitly disabled
+                mmr_lambda = options.mmr_lambda
+                use_mmr = True
+            if options.use_mmr is not None:
+                use_mmr = options.use_mmr
+            if options.mmr_fetch_k is not None:
+                mmr_fetch_k = options.mmr_fetch_k
+            if options.max_distance is not None:
+                max_distance = options.max_distance
+            if options.distance_gap is not None:
+                distance_gap = options.distance_gap
+        where = None
+        if filters is not None:
+            where = build_where(
+                sources=filters.sources,
+                types=filters.types,
+                solved_only=filters.solved_only,
+                indexed_after=filters.indexed_after,
+                indexed_before=filters.indexed_before,
+            )
+        return RetrievalParams(
+            mmr_lambda=mmr_lambda if use_mmr else None,
+            mmr_fetch_k=mmr_fetch_k,
+            where=where,
+            max_distance=max_distance,
+            distance_gap=distance_gap,
+        )
+
+    async def answer_question(
+        self,
+        query: str,
+        retrieval: Optional[RetrievalOptions] = None,
+        filters: Optional[RetrievalFilters] = None,
+        conversation_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> RAGResult:
         """
         Run the full RAG pipeline for a given user query and return a structured result.
+
+        With conversation memory, `conversation_id` continues an earlier
+        conversation of `owner` (a new one with a server-issued id is started
+        when it is unknown, owned by someone else or omitted) and the
+        exchange is recorded. Questions with history skip
+        the answer cache, the Q&A fast path and single-flight, since their
+        answer depends on the conversation.
+
+        Identical concurrent questions are coalesced when single-flight is
+        enabled; callers that joined another request's run get
+        `origin="coalesced"`. Uncached requests (`use_cache=False`) always
+        run their own pipeline.
         """
-        # rag_pipeline is synchronous; call it directly (no await)
-        result = rag_pipeline(
+        params = self._resolve_retrieval(retrieval, filters)
+        conversation = await self._load_conversation(conversation_id, owner)
+
+        if conversation is not None and conversation.has_history:
+            result = await self._answer(query, params, conversation, use_cache=use_cache)
+        elif self._single_flight is None or not use_cache:
+            result = await self._answer(query, params, use_cache=use_cache)
+        else:
+            key = f"{self._normalize_query(query)}\n{params.cache_key()}"
+            result, shared = await self._single_flight.run(key, lambda: self._answer(query, params))
+            if shared:
+                result = replace(
+                    result,
+                    conversation_id=str(uuid4()),
+                    timestamp=datetime.now(timezone.utc),
+                    origin="coalesced",
+                )
+
+        if conversation is not None:
+            result = replace(result, conversation_id=conversation.conversation_id)
+            await self._conversations.record_exchange(conversation, query, result.text)
+        elif conversation_id:
+            result = replace(result, conversation_id=conversation_id)
+        return result
+
+    async def _load_conversation(
+        self,
+        conversation_id: Optional[str],
+        owner: Optional[str],
+    ) -> Optional[ConversationState]:
+        if self._conversations is None:
+            return None
+        return await self._conversations.load(conversation_id, owner)
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip().casefold()
+
+    def _history_for(self, conversation: Optional[ConversationState], query: str) -> Tuple[Optional[str], str]:
+        """Return `(history, retrieval_text)`; history is None without earlier turns."""
+        if conversation is None or not conversation.has_history:
+            return None, query
+        return (
+            self._conversations.format_history(conversation),
+            self._conversations.retrieval_query(conversation, query),
+        )
+
+    async def _answer(
+        self,
+        query: str,
+        params: RetrievalParams,
+        conversation: Optional[ConversationState] = None,
+        use_cache: bool = True,
+    ) -> RAGResult:
+        cache_namespace = params.cache_key()
+        timings: Dict[str, float] = {}
+        history, retrieval_text = self._history_for(conversation, query)
+        query_embedding = await self._embed_query(retrieval_text, timings)
+        answer_cache = self._answer_cache if use_cache and history is None else None
+
+        if answer_cache is not None:
+            cached = answer_cache.lookup(query_embedding, namespace=cache_namespace)
+            if cached is not None:
+                return RAGResult(
+                    text=cached.text,
+                    sources=cached.sources,
+                    conversation_id=str(uuid4()),
+                    timestamp=datetime.now(timezone.utc),
+                    origin="semantic_cache",
+                    timings=timings,
+                )
+
+        if history is None:
+            match = (await self._match_accepted_answers([query_embedding], params, timings))[0]
+            if match is not None:
+                return RAGResult(
+                    text=match["text"],
+                    sources=[match["source"]],
+                    conversation_id=str(uuid4()),
+                    timestamp=datetime.now(timezone.utc),
+                    origin="qa_fast_path",
+                    timings=timings,
+                )
+
+        result = await arag_pipeline(
             query=query,
             vector_store_collection=self._vector_store_collection,
             embedding_model=self._embedding_model,
             llm_client=self._llm_client,
             top_k=self._top_k,
             temperature=self._temperature,
+            query_embedding=query_embedding,
+            lexical_index=self._lexical_index,
+            reranker=self._reranker,
+            retrieval=params,
+            parent_store=self._parent_store,
+            history=history,
+            completion_cache=self._completion_cache if use_cache else None,
         )
+        timings.update(result["timings"])
+        self._record_context_stats(result["context_stats"])
+
+        if answer_cache is not None and not result["no_context"]:
+            answer_cache.store(
+                query_embedding,
+                result["response"],
+                result["sources"],
+                namespace=cache_namespace,
+            )
 
         conversation_id = str(uuid4())
         timestamp = datetime.now(timezone.utc)
 
         return RAGResult(
             text=result["response"],
-            sources=result.get("saved", result.get("sources", []))
-            if isinstance(result, dict)
-            else [],
+            sources=result.get("sources", []),
             conversation_id=conversation_id,
             timestamp=timestamp,
+            origin=self._generation_origin(result["no_context"], result["cached"]),
+            timings=timings,
+        )
+
+    async def stream_answer(
+        self,
+        query: str,
+        retrieval: Optional[RetrievalOptions] = None,
+        filters: Optional[RetrievalFilters] = None,
+        conversation_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the RAG pipeline for a query, streaming the answer as events.
+
+        Yields dicts of the form `{"event": ..., "data": {...}}`:
+        - `sources`: retrieved sources, sent before generation starts
+        - `token`: one chunk of generated text (a cached answer is one token)
+        - `done`: `conversation_id`, `timestamp`, `origin` and `timings`
+
+        Conversation memory and `use_cache` work as in `answer_question`;
+        the exchange is recorded once the answer is complete.
+        """
+        params = self._resolve_retrieval(retrieval, filters)
+        conversation = await self._load_conversation(conversation_id, owner)
+        if conversation is not None:
+            conversation_id = conversation.conversation_id
+        cache_namespace = params.cache_key()
+        timings: Dict[str, float] = {}
+        history, retrieval_text = self._history_for(conversation, query)
+        query_embedding = await self._embed_query(retrieval_text, timings)
+        answer_cache = self._answer_cache if use_cache and history is None else None
+
+        cached = (
+            answer_cache.lookup(query_embedding, namespace=cache_namespace)
+            if answer_cache is not None
+            else None
         )
+        if cached is not None:
+            yield {"event": "sources", "data": {"sources": cached.sources}}
+            yield {"event": "token", "data": {"text": cached.text}}
+            await self._record_exchange(conversation, query, cached.text)
+            yield self._done_event(origin="semantic_cache", timings=timings, conversation_id=conversation_id)
+            return
+
+        if history is None:
+            match = (await self._match_accepted_answers([query_embedding], params, timings))[0]
+            if match is not None:
+                yield {"event": "sources", "data": {"sources": [match["source"]]}}
+                yield {"event": "token", "data": {"text": match["text"]}}
+                await self._record_exchange(conversation, query, match["text"])
+                yield self._done_event(origin="qa_fast_path", timings=timings, conversation_id=conversation_id)
+                return
+
+        prepared = await aprepare_rag_prompt(
+            query=query,
+            vector_store_collection=self._vector_store_collection,
+            embedding_model=self._embedding_model,
+            top_k=self._top_k,
+            query_embedding=query_embedding,
+            lexical_index=self._lexical_index,
+            reranker=self._reranker,
+            retrieval=params,
+            parent_store=self._parent_store,
+            history=history,
+        )
+        timings.update(prepared["timings"])
+        self._record_context_stats(prepared["context_stats"])
+        yield {"event": "sources", "data": {"sources": prepared["sources"]}}
+
+        if prepared["no_context"]:
+            yield {"event": "token", "data": {"text": NO_CONTEXT_RESPONSE}}
+            await self._record_exchange(conversation, query, NO_CONTEXT_RESPONSE)
+            yield self._done_event(origin="no_context", timings=timings, conversation_id=conversation_id)
+            return
+
+        start = time.perf_counter()
+        tokens: List[str] = []
+        completion_cached = False
+        async for token in astream_response(
+            prepared["prompt_messages"],
+            self._llm_client,
+            self._temperature,
+            completion_cache=self._completion_cache if use_cache else None,
+        ):
+            completion_cached = isinstance(token, CachedCompletion)
+            tokens.append(token)
+            yield {"event": "token", "data": {"text": token}}
+
+        timings["generation_ms"] = (time.perf_counter() - start) * 1000.0
+        answer = "".join(tokens)
+
+        # Only complete answers are cached / remembered; an aborted stream never gets here
+        if answer_cache is not None:
+            answer_cache.store(
+                query_embedding,
+                answer,
+                prepared["sources"],
+                namespace=cache_namespace,
+            )
+        await self._record_exchange(conversation, query, answer)
+
+        yield self._done_event(
+            origin=self._generation_origin(False, completion_cached),
+            timings=timings,
+            conversation_id=conversation_id,
+        )
+
+    @staticmethod
+    def _generation_origin(no_context: bool, cached: bool) -> str:
+        if no_context:
+            return "no_context"
+        return "completion_cache" if cached else "llm"
+
+    async def _record_exchange(self, conversation: Optional[ConversationState], query: str, answer: str) -> None:
+        if conversation is not None:
+            await self._conversations.record_exchange(conversation, query, answer)
+
+    async def answer_batch(
+        self,
+        queries: List[str],
+        retrieval: Optional[RetrievalOptions] = None,
+        filters: Optional[RetrievalFilters] = None,
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> RAGBatchResult:
+        """
+        Answer many queries at once; results are returned in query order.
+
+        Failures are reported per item (`error`) instead of failing the batch.
+        """
+        params = self._resolve_retrieval(retrieval, filters)
+        done, pending, embeddings, timings = await self._prepare_batch(queries, params, use_cache)
+
+        start = time.perf_counter()
+        answers = await abatch_generate_responses(
+            [prepared["prompt_messages"] for _, prepared in pending],
+            self._llm_client,
+            self._temperature,
+            max_concurrency or settings.CHAT_BATCH_MAX_CONCURRENCY,
+            completion_cache=self._completion_cache if use_cache else None,
+        )
+        timings["generation_ms"] = (time.perf_counter() - start) * 1000.0
+
+        for (index, prepared), answer in zip(pending, answers):
+            done.append(self._finish_batch_item(index, prepared, answer, embeddings[index], params, use_cache))
+        done.sort(key=lambda item: item.index)
+        return RAGBatchResult(items=done, timings=timings)
+
+    async def stream_batch(
+        self,
+        queries: List[str],
+        retrieval: Optional[RetrievalOptions] = None,
+        filters: Optional[RetrievalFilters] = None,
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[RAGBatchItem]:
+        """
+        Answer many queries at once, yielding each item as soon as it completes.
+
+        Cached answers and failed items come first, then LLM answers in
+        completion order; use `RAGBatchItem.index` to match them to queries.
+        """
+        params = self._resolve_retrieval(retrieval, filters)
+        done, pending, embeddings, _ = await self._prepare_batch(queries, params, use_cache)
+        for item in done:
+            yield item
+
+        answers = astream_batch_responses(
+            [prepared["prompt_messages"] for _, prepared in pending],
+            self._llm_client,
+            self._temperature,
+            max_concurrency or settings.CHAT_BATCH_MAX_CONCURRENCY,
+            completion_cache=self._completion_cache if use_cache else None,
+        )
+        try:
+            async for position, answer in answers:
+                index, prepared = pending[position]
+                yield self._finish_batch_item(index, prepared, answer, embeddings[index], params, use_cache)
+        finally:
+            await answers.aclose()
+
+    async def _prepare_batch(
+        self,
+        queries: List[str],
+        params: RetrievalParams,
+        use_cache: bool = True,
+    ) -> Tuple[List[RAGBatchItem], List[Tuple[int, Dict[str, Any]]], np.ndarray, Dict[str, float]]:
+        """
+        Embed all queries in one call, serve cache hits and build prompts for the rest.
+
+        Returns `(done, pending, embeddings, timings)` where `done` holds
+        finished items (cache hits, accepted Q&A answers, no-context answers
+        and failures) and `pending` holds
+        `(index, prepared_prompt)` pairs that still need the LLM.
+        """
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        embeddings = await run_in_embedding_executor(
+            generate_embeddings, list(queries), self._embedding_model
+        )
+        timings["embedding_ms"] = (time.perf_counter() - start) * 1000.0
+
+        cache_namespace = params.cache_key()
+        done: List[RAGBatchItem] = []
+        misses: List[int] = []
+        for index, query_embedding in enumerate(embeddings):
+            cached = (
+                self._answer_cache.lookup(query_embedding, namespace=cache_namespace)
+                if self._answer_cache is not None and use_cache
+                else None
+            )
+            if cached is not None:
+                done.append(
+                    RAGBatchItem(index=index, text=cached.text, sources=cached.sources, origin="semantic_cache")
+                )
+            else:
+                misses.append(index)
+
+        matches = await self._match_accepted_answers(embeddings[misses], params, timings)
+        remaining: List[int] = []
+        for index, match in zip(misses, matches):
+            if match is not None:
+                done.append(
+                    RAGBatchItem(index=index, text=match["text"], sources=[match["source"]], origin="qa_fast_path")
+                )
+            else:
+                remaining.append(index)
+        misses = remaining
+
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        if misses:
+            batch = await aprepare_rag_prompts_batch(
+                [queries[index] for index in misses],
+                self._vector_store_collection,
+                self._embedding_model,
+                self._top_k,
+                query_embeddings=embeddings[misses],
+                lexical_index=self._lexical_index,
+                reranker=self._reranker,
+                retrieval=params,
+                parent_store=self._parent_store,
+            )
+            timings.update(batch["timings"])
+            for index, prepared in zip(misses, batch["prepared"]):
+                if isinstance(prepared, Exception):
+                    done.append(RAGBatchItem(index=index, error=str(prepared)))
+                elif prepared["no_context"]:
+                    done.append(RAGBatchItem(index=index, text=NO_CONTEXT_RESPONSE, origin="no_context"))
+                else:
+                    self._record_context_stats(prepared["context_stats"])
+                    pending.append((index, prepared))
+
+        return done, pending, embeddings, timings
+
+    def _finish_batch_item(
+        self,
+        index: int,
+        prepared: Dict[str, Any],
+        answer: Any,
+        query_embedding: np.ndarray,
+        params: RetrievalParams,
+        use_cache: bool = True,
+    ) -> RAGBatchItem:
+        if isinstance(answer, Exception):
+            return RAGBatchItem(index=index, sources=prepared["sources"], error=str(answer))
+        if self._answer_cache is not None and use_cache:
+            self._answer_cache.store(
+                query_embedding,
+                answer,
+                prepared["sources"],
+                namespace=params.cache_key(),
+            )
+        return RAGBatchItem(
+            index=index,
+            text=answer,
+            sources=prepared["sources"],
+            origin=self._generation_origin(False, isinstance(answer, CachedCompletion)),
+        )
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Return semantic cache statistics, or None when caching is disabled."""
+        return self._answer_cache.stats() if self._answer_cache is not None else None
+
+    def completion_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Return exact completion cache statistics, or None when it is disabled."""
+        return self._completion_cache.stats() if self._completion_cache is not None else None
+
+    def embedding_batcher_stats(self) -> Optional[Dict[str, Any]]:
+        """Return micro-batching statistics, or None when batching is disabled."""
+        return self._embedding_batcher.stats() if self._embedding_batcher is not None else None
+
+    def context_packing_stats(self) -> Dict[str, Any]:
+        """Return cumulative token savings of context packing."""
+        stats: Dict[str, Any] = dict(self._context_stats)
+        if stats.get("input_tokens"):
+            stats["saved_ratio"] = stats.get("tokens_saved", 0) / stats["input_tokens"]
+        return stats
+
+    def _record_context_stats(self, context_stats: Dict[str, int]) -> None:
+        if not context_stats:
+            return
+        self._context_stats["requests"] = self._context_stats.get("requests", 0) + 1
+        for key, value in context_stats.items():
+            self._context_stats[key] = self._context_stats.get(key, 0) + value
+
+    def single_flight_stats(self) -> Optional[Dict[str, Any]]:
+        """Return request coalescing counters, or None when coalescing is disabled."""
+        return self._single_flight.stats() if self._single_flight is not None else None
+
+    def qa_fast_path_stats(self) -> Optional[Dict[str, Any]]:
+        """Return accepted-answer fast path hit counters, or None when it is disabled."""
+        if self._qa_fast_path_min_similarity is None:
+            return None
+        lookups = self._qa_fast_path_lookups
+        return {
+            "min_similarity": self._qa_fast_path_min_similarity,
+            "lookups": lookups,
+            "hits": self._qa_fast_path_hits,
+            "hit_rate": self._qa_fast_path_hits / lookups if lookups else 0.0,
+        }
+
+    def reranker_stats(self) -> Optional[Dict[str, Any]]:
+        """Return rerank score cache statistics, or None when reranking is disabled."""
+        return self._reranker.cache_stats() if self._reranker is not None else None
+
+    def conversation_stats(self) -> Optional[Dict[str, Any]]:
+        """Return conversation memory statistics, or None when memory is disabled."""
+        return self._conversations.stats() if self._conversations is not None else None
+
+    @staticmethod
+    def _done_event(
+        origin: str,
+        timings: Dict[str, float],
+        conversation_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "event": "done",
+            "data": {
+                "conversation_id": conversation_id or str(uuid4()),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "origin": origin,
+                "timings": timings,
+            },
+        }
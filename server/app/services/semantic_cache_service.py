@@ -0,0 +1,206 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    text: str
+    sources: List[str]
+    similarity: float
+
+
+@dataclass
+class _CacheEntry:
+    text: str
+    sources: List[str]
+    namespace: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticCacheService:
+    """
+    In-process semantic cache of RAG answers keyed by query embedding.
+
+    A lookup returns a previous answer when its query embedding has a cosine
+    similarity above `similarity_threshold` with the new query. Entries live
+    in a fixed-size matrix so a lookup is a single matrix-vector product.
+
+    - LRU eviction once `max_entries` is reached; expired entries are
+      dropped on lookup, before matching
+    - `namespace` keeps answers produced with different retrieval settings
+      apart; a namespace is forgotten with its last entry, so there are
+      never more namespaces than entries
+    - `invalidate_sources` drops every answer that used a given source, and is
+      called whenever a document or Q&A thread is re-indexed or deleted
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+    ) -> None:
+        self._threshold = similarity_threshold
+        self._ttl = ttl_seconds
+        self._max_entries = max(max_entries, 1)
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), rows normalized
+        # Namespace id and creation time per slot; namespace -1 marks a free slot
+        self._slot_namespaces = np.full(self._max_entries, -1, dtype=np.int32)
+        self._slot_created = np.zeros(self._max_entries, dtype=np.float64)
+        self._namespace_ids: Dict[str, int] = {}
+        self._namespace_sizes: Dict[str, int] = {}
+        self._free_namespace_ids: List[int] = []
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()  # slot -> entry, LRU order
+        self._free_slots: List[int] = list(range(self._max_entries - 1, -1, -1))
+        self._slots_by_source: Dict[str, Set[int]] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, query_embedding: Any, namespace: str = "") -> Optional[CachedAnswer]:
+        """Return a cached answer for a semantically equivalent query, if any."""
+        query = self._normalize(query_embedding)
+        with self._lock:
+            if self._matrix is None or not self._entries or self._matrix.shape[1] != query.shape[0]:
+                self._misses += 1
+                return None
+
+            self._expire_locked()
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is None:
+                self._misses += 1
+                return None
+
+            similarities = self._matrix @ query
+            similarities[self._slot_namespaces != namespace_id] = -np.inf
+
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self._threshold:
+                self._misses += 1
+                return None
+
+            entry = self._entries[slot]
+            self._entries.move_to_end(slot)
+            self._hits += 1
+            return CachedAnswer(text=entry.text, sources=list(entry.sources), similarity=similarity)
+
+    def store(
+        self,
+        query_embedding: Any,
+        text: str,
+        sources: List[str],
+        namespace: str = "",
+    ) -> None:
+        """Cache an answer under the given query embedding."""
+        vector = self._normalize(query_embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First entry (or the embedding model changed): (re)allocate
+                self._reset_locked(dim=vector.shape[0])
+
+            if not self._free_slots:
+                oldest_slot = next(iter(self._entries))
+                self._remove_slot(oldest_slot)
+                self._evictions += 1
+
+            slot = self._free_slots.pop()
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is None:
+                namespace_id = (
+                    self._free_namespace_ids.pop() if self._free_namespace_ids else len(self._namespace_ids)
+                )
+                self._namespace_ids[namespace] = namespace_id
+            self._namespace_sizes[namespace] = self._namespace_sizes.get(namespace, 0) + 1
+            entry = _CacheEntry(text=text, sources=list(sources), namespace=namespace)
+            self._matrix[slot] = vector
+            self._slot_namespaces[slot] = namespace_id
+            self._slot_created[slot] = entry.created_at
+            self._entries[slot] = entry
+            for source in sources:
+                self._slots_by_source.setdefault(source, set()).add(slot)
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Drop every cached answer that was built from any of `sources`."""
+        removed = 0
+        with self._lock:
+            for source in sources:
+                for slot in list(self._slots_by_source.get(source, ())):
+                    self._remove_slot(slot)
+                    removed += 1
+            self._invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all cached answers."""
+        with self._lock:
+            dim = self._matrix.shape[1] if self._matrix is not None else None
+            self._reset_locked(dim=dim)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "namespaces": len(self._namespace_ids),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "similarity_threshold": self._threshold,
+                "ttl_seconds": self._ttl,
+            }
+
+    def _reset_locked(self, dim: Optional[int]) -> None:
+        self._matrix = np.zeros((self._max_entries, dim), dtype=np.float32) if dim else None
+        self._slot_namespaces[:] = -1
+        self._namespace_ids.clear()
+        self._namespace_sizes.clear()
+        self._free_namespace_ids.clear()
+        self._entries.clear()
+        self._free_slots = list(range(self._max_entries - 1, -1, -1))
+        self._slots_by_source.clear()
+
+    def _expire_locked(self) -> None:
+        expired = np.flatnonzero(
+            (self._slot_namespaces >= 0) & (self._slot_created < time.monotonic() - self._ttl)
+        )
+        for slot in expired:
+            self._remove_slot(int(slot))
+        self._evictions += len(expired)
+
+    def _remove_slot(self, slot: int) -> None:
+        entry = self._entries.pop(slot, None)
+        if entry is None:
+            return
+        self._slot_namespaces[slot] = -1
+        self._free_slots.append(slot)
+        self._namespace_sizes[entry.namespace] -= 1
+        if not self._namespace_sizes[entry.namespace]:
+            # Last entry of the namespace: forget it and recycle its id
+            del self._namespace_sizes[entry.namespace]
+            self._free_namespace_ids.append(self._namespace_ids.pop(entry.namespace))
+        for source in entry.sources:
+            slots = self._slots_by_source.get(source)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._slots_by_source[source]
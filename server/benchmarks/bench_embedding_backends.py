@@ -0,0 +1,139 @@
+"""
+Parity and speed of the embedding backends (torch, ONNX, int8 ONNX).
+
+Embeds a synthetic mix of document chunks and questions (same generator as
+`bench_rag_pipeline`) with every backend, checks that each ONNX backend
+agrees with the torch reference (per-text cosine similarity, failing below
+the minimum) and reports encode latency / throughput per batch size.
+
+    cd server && python -m benchmarks.bench_embedding_backends \\
+        --model-dir ./models/all-MiniLM-L6-v2 [--export] \\
+        [--backends torch onnx onnx-int8] [--batch-sizes 1 8 32] [--output emb.json]
+
+`--export` first writes the model files and both ONNX variants to
+`--model-dir` (needs `optimum[onnxruntime]`); point `EMBEDDING_MODEL_DIR`
+at the same directory to serve them. Exits non-zero when a backend misses
+its parity threshold.
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.infra.embeddings import (
+    DEFAULT_QUANTIZATION,
+    EMBEDDING_BACKENDS,
+    default_onnx_file,
+    export_onnx_model,
+    generate_embeddings,
+    initialize_embedding_model,
+)
+from benchmarks.bench_rag_pipeline import build_corpus, build_queries
+from benchmarks.common import print_table, run_metadata, summarize, time_calls, write_json
+
+
+def build_texts(count: int, seed: int) -> List[str]:
+    """Half document chunks, half short questions."""
+    chunks = [chunk["content"] for chunk in build_corpus(max(count // 12, 1), 6, seed)]
+    questions = build_queries(count, max(count // 12, 1), 6, seed)
+    texts = chunks[: count // 2] + questions[: count - min(len(chunks), count // 2)]
+    return texts[:count]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Per-row cosine similarity between two embedding matrices."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--model-dir", default=settings.EMBEDDING_MODEL_DIR, help="Local model directory")
+    parser.add_argument("--export", action="store_true", help="Export the ONNX models to --model-dir first")
+    parser.add_argument("--quantization", default=DEFAULT_QUANTIZATION, help="int8 preset: avx2, avx512, avx512_vnni, arm64")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--texts", type=int, default=512, help="Texts used for the parity check")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--min-cosine-onnx", type=float, default=0.999)
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    if args.export:
+        if not args.model_dir:
+            parser.error("--export needs --model-dir")
+        print(f"Exporting {args.model} to {args.model_dir} (int8 preset {args.quantization})...")
+        export_onnx_model(args.model, args.model_dir, args.quantization)
+
+    texts = build_texts(args.texts, args.seed)
+    min_cosine = {"onnx": args.min_cosine_onnx, "onnx-int8": args.min_cosine_int8}
+    reference = None
+    parity_rows: List[Dict[str, object]] = []
+    speed_rows: List[Dict[str, object]] = []
+    # torch first, so the ONNX backends can be compared against it
+    for backend in sorted(args.backends, key=lambda name: name != "torch"):
+        start = time.perf_counter()
+        model = initialize_embedding_model(
+            args.model,
+            backend=backend,
+            model_dir=args.model_dir,
+            onnx_file=default_onnx_file(backend, args.quantization) if backend != "torch" else None,
+        )
+        load_s = time.perf_counter() - start
+        embeddings = np.asarray(generate_embeddings(texts, model), dtype=np.float32)
+
+        if backend == "torch":
+            reference = embeddings
+        elif reference is not None:
+            agreement = cosine_agreement(reference, embeddings)
+            parity_rows.append({
+                "backend": backend,
+                "texts": len(texts),
+                "mean_cosine": float(agreement.mean()),
+                "min_cosine": float(agreement.min()),
+                "threshold": min_cosine[backend],
+                "passed": bool(agreement.min() >= min_cosine[backend]),
+            })
+
+        for batch_size in args.batch_sizes:
+            batch = texts[:batch_size]
+            latency = summarize(time_calls(lambda: generate_embeddings(batch, model), args.iterations, warmup=3))
+            speed_rows.append({
+                "backend": backend,
+                "batch": batch_size,
+                "load_s": load_s,
+                "p50_ms": latency["p50_ms"],
+                "p95_ms": latency["p95_ms"],
+                "p99_ms": latency["p99_ms"],
+                "texts_per_s": batch_size / latency["mean_ms"] * 1000.0,
+            })
+        del model
+
+    print_table(speed_rows, ["backend", "batch", "load_s", "p50_ms", "p95_ms", "p99_ms", "texts_per_s"])
+    if parity_rows:
+        print()
+        print_table(parity_rows, ["backend", "texts", "mean_cosine", "min_cosine", "threshold", "passed"])
+    elif len(args.backends) > 1:
+        print("Parity not checked: include the torch backend as reference")
+
+    write_json(args.output, {
+        "benchmark": "embedding_backends",
+        "run": run_metadata(),
+        "model": args.model,
+        "quantization": args.quantization,
+        "speed": speed_rows,
+        "parity": parity_rows,
+    })
+    return 0 if all(row["passed"] for row in parity_rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Per-query and per-batch overhead of the embedding API around `encode`.
+
+Compares the former list-based path (`model.encode(texts).tolist()`, nested
+Python lists passed around and converted back to arrays by consumers) with
+the current float32 path (`generate_embeddings` returns one contiguous
+array of unit rows, converted to lists only at the Chroma call). Three
+stages are timed for each batch size:
+
+- `embed`: the embedding API call itself
+- `consume`: what the consumers of a query vector do with it (semantic
+  cache normalization, MMR's array conversion of the query)
+- `to_chroma`: preparing the vectors for a Chroma call
+
+`chroma_query_ms` is one multi-query `collection.query` on an in-memory
+collection, for scale; Chroma receives the same lists on both paths.
+
+By default the model is a stand-in returning precomputed vectors, so only
+the overhead around the forward pass is measured; `--real-model` uses the
+configured embedding model instead (the overhead then shows next to the
+encode cost).
+
+    cd server && python -m benchmarks.bench_embedding_overhead \\
+        [--batch-sizes 1 32 256] [--dim 384] [--real-model] [--output overhead.json]
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+import chromadb
+import numpy as np
+
+from app.core.config import settings
+from app.infra.embeddings import generate_embeddings, initialize_embedding_model
+from app.infra.vector_store import to_chroma_embeddings
+from app.services.semantic_cache_service import SemanticCacheService
+from benchmarks.bench_embedding_backends import build_texts
+from benchmarks.common import print_table, run_metadata, summarize, time_calls, write_json
+
+
+class PrecomputedModel:
+    """`encode` returning fresh float32 unit vectors without a forward pass."""
+
+    def __init__(self, dim: int, rows: int, seed: int) -> None:
+        vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+        self._vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        # A copy, like a model producing a new output array per call
+        return self._vectors[: len(texts)].copy()
+
+
+def list_generate_embeddings(texts: List[str], model: Any) -> List[List[float]]:
+    """The embedding API before float32 arrays were kept end to end."""
+    return model.encode(texts).tolist()
+
+
+def consume(vectors: Any) -> None:
+    for vector in vectors:
+        SemanticCacheService._normalize(vector)
+        np.asarray(vector, dtype=np.float32)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--dim", type=int, default=384, help="Vector size of the stand-in model")
+    parser.add_argument("--real-model", action="store_true", help="Use the configured embedding model")
+    parser.add_argument("--collection-size", type=int, default=2000, help="Vectors in the Chroma collection")
+    parser.add_argument("--top-k", type=int, default=7)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    texts = build_texts(max(args.batch_sizes), args.seed)
+    if args.real_model:
+        model = initialize_embedding_model(
+            settings.EMBEDDING_MODEL,
+            backend=settings.EMBEDDING_BACKEND,
+            model_dir=settings.EMBEDDING_MODEL_DIR,
+        )
+    else:
+        model = PrecomputedModel(args.dim, len(texts), args.seed)
+    dim = generate_embeddings(texts[:1], model).shape[1]
+
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection("bench_embedding_overhead", metadata={"hnsw:space": "ip"})
+    stored = np.random.default_rng(args.seed + 1).standard_normal((args.collection_size, dim)).astype(np.float32)
+    stored /= np.linalg.norm(stored, axis=1, keepdims=True)
+    for offset in range(0, len(stored), 1000):
+        part = stored[offset:offset + 1000]
+        collection.add(
+            ids=[str(offset + index) for index in range(len(part))],
+            embeddings=part.tolist(),
+        )
+
+    paths = {
+        "lists": (list_generate_embeddings, lambda vectors: vectors),
+        "float32": (generate_embeddings, to_chroma_embeddings),
+    }
+    rows: List[Dict[str, Any]] = []
+    for batch_size in args.batch_sizes:
+        batch = texts[:batch_size]
+        per_path: Dict[str, Dict[str, float]] = {}
+        for path, (embed, for_chroma) in paths.items():
+            vectors = embed(batch, model)
+            stages = {
+                "embed": lambda: embed(batch, model),
+                "consume": lambda: consume(vectors),
+                "to_chroma": lambda: for_chroma(vectors),
+            }
+            per_path[path] = {
+                stage: summarize(time_calls(func, args.iterations, warmup=5))["p50_ms"]
+                for stage, func in stages.items()
+            }
+            per_path[path]["total"] = sum(per_path[path].values())
+        query_embeddings = to_chroma_embeddings(generate_embeddings(batch, model))
+        chroma_query = summarize(time_calls(
+            lambda: collection.query(query_embeddings=query_embeddings, n_results=args.top_k, include=["distances"]),
+            args.iterations,
+            warmup=5,
+        ))["p50_ms"]
+        for path, stages in per_path.items():
+            rows.append({
+                "batch": batch_size,
+                "path": path,
+                "embed_ms": stages["embed"],
+                "consume_ms": stages["consume"],
+                "to_chroma_ms": stages["to_chroma"],
+                "total_ms": stages["total"],
+                "per_query_us": stages["total"] / batch_size * 1000.0,
+                "vs_lists": stages["total"] / per_path["lists"]["total"],
+                "chroma_query_ms": chroma_query,
+            })
+
+    print(f"{'configured model' if args.real_model else 'precomputed vectors'}, dim {dim}, p50 per call")
+    print_table(rows, [
+        "batch", "path", "embed_ms", "consume_ms", "to_chroma_ms", "total_ms", "per_query_us", "vs_lists",
+        "chroma_query_ms",
+    ])
+    write_json(args.output, {
+        "benchmark": "embedding_overhead",
+        "run": run_metadata(),
+        "real_model": args.real_model,
+        "dim": int(dim),
+        "collection_size": args.collection_size,
+        "results": rows,
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
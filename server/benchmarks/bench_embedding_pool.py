@@ -0,0 +1,115 @@
+"""
+Scaling benchmark for the multi-process embedding pool.
+
+Embeds the same synthetic chunk/question mix (see
+`bench_embedding_backends.build_texts`) in-process and with
+`EmbeddingProcessPool` at several worker counts, and reports throughput,
+speed-up over in-process and per-call latency. Worker start-up and model
+loading are excluded (each pool is warmed up first); the pool output is
+checked against the in-process vectors.
+
+    cd server && python -m benchmarks.bench_embedding_pool \\
+        [--workers 1 2 4 8] [--torch-threads 1] [--texts 2048] [--batch 256] [--output pool.json]
+
+Keep `workers * torch-threads` at or below the physical core count;
+oversubscribed runs show up as a falling speed-up.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.infra.embedding_pool import EmbeddingProcessPool
+from app.infra.embeddings import initialize_embedding_model
+from benchmarks.bench_embedding_backends import build_texts
+from benchmarks.common import print_table, run_metadata, summarize, write_json
+
+
+def run(model: Any, texts: List[str], batch: int, repeats: int) -> Dict[str, float]:
+    """Embed `texts` in calls of `batch` texts, `repeats` times; returns throughput and latency."""
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for offset in range(0, len(texts), batch):
+            call_start = time.perf_counter()
+            model.encode(texts[offset:offset + batch])
+            latencies.append((time.perf_counter() - call_start) * 1000.0)
+    elapsed = time.perf_counter() - start
+    latency = summarize(latencies)
+    return {
+        "texts_per_s": len(texts) * repeats / elapsed,
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--backend", default=settings.EMBEDDING_BACKEND)
+    parser.add_argument("--model-dir", default=settings.EMBEDDING_MODEL_DIR)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--torch-threads", type=int, default=1, help="Intra-op threads per worker")
+    parser.add_argument("--min-batch", type=int, default=settings.EMBEDDING_POOL_MIN_BATCH)
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--batch", type=int, default=256, help="Texts per encode call")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    texts = build_texts(args.texts, args.seed)
+    print(f"{len(texts)} texts, {os.cpu_count()} CPUs")
+
+    model = initialize_embedding_model(args.model, backend=args.backend, model_dir=args.model_dir)
+    reference = np.asarray(model.encode(texts[: args.batch]), dtype=np.float32)
+    baseline = run(model, texts, args.batch, args.repeats)
+    rows: List[Dict[str, Any]] = [{"mode": "in-process", "workers": 0, **baseline, "speedup": 1.0}]
+    del model
+
+    matches = True
+    for workers in args.workers:
+        pool = EmbeddingProcessPool(
+            args.model,
+            workers=workers,
+            torch_threads=args.torch_threads,
+            min_batch=args.min_batch,
+            backend=args.backend,
+            model_dir=args.model_dir,
+        )
+        try:
+            pool.warm_up()
+            pooled = pool.encode(texts[: args.batch])
+            matches = matches and bool(np.allclose(pooled, reference, atol=1e-4))
+            result = run(pool, texts, args.batch, args.repeats)
+        finally:
+            pool.close()
+        rows.append({
+            "mode": "pool",
+            "workers": workers,
+            **result,
+            "speedup": result["texts_per_s"] / baseline["texts_per_s"],
+        })
+
+    print_table(rows, ["mode", "workers", "texts_per_s", "speedup", "p50_ms", "p95_ms"])
+    print(f"Pool output matches in-process vectors: {matches}")
+    write_json(args.output, {
+        "benchmark": "embedding_pool",
+        "run": run_metadata(),
+        "model": args.model,
+        "backend": args.backend,
+        "torch_threads": args.torch_threads,
+        "cpus": os.cpu_count(),
+        "results": rows,
+        "matches_in_process": matches,
+    })
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Micro-benchmark for MMR selection (`app.infra.mmr`).
+
+Measures the selection cost alone (no Chroma query) for realistic candidate
+pool sizes at the embedding dimension of all-MiniLM-L6-v2, and flags any
+configuration whose p99 exceeds the 1 ms budget.
+
+`select_*` columns time MMR on float32 arrays; `from_lists_*` columns add
+the conversion from the nested Python lists Chroma returns, which is
+reported separately because it dominates at larger pool sizes.
+
+`--hybrid` also runs hybrid retrieval (dense + BM25, RRF) over an in-memory
+collection of near-duplicate groups and reports how many distinct groups
+reach the top-k without MMR, with MMR applied before fusion (the dense leg
+alone, which keeps its whole candidate pool) and with MMR as the final
+selection (the `hybrid_search` path), plus the latency of each.
+
+    cd server && python -m benchmarks.bench_mmr [--dim 384] [--k 7] [--hybrid] [--output mmr.json]
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+import chromadb
+import numpy as np
+
+from app.infra.hybrid_retriever import hybrid_search, reciprocal_rank_fusion
+from app.infra.lexical_index import LexicalIndex
+from app.infra.mmr import maximal_marginal_relevance
+from app.infra.retrieval import RetrievalParams, dense_search
+from benchmarks.common import print_table, summarize, time_calls, write_json
+
+BUDGET_MS = 1.0
+
+
+def bench_hybrid(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Distinct near-duplicate groups in the hybrid top-k, per MMR placement."""
+    rng = np.random.default_rng(1)
+    centroids = rng.standard_normal((args.groups, args.dim)).astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    ids, texts, metadatas, vectors = [], [], [], []
+    for group, centroid in enumerate(centroids):
+        for item in range(args.group_size):
+            vector = centroid + 0.05 * rng.standard_normal(args.dim).astype(np.float32)
+            ids.append(f"g{group}-{item}")
+            texts.append(f"release notes topic{group} section {item} upgrade steps")
+            metadatas.append({"source": f"doc{group}", "group": group})
+            vectors.append(vector / np.linalg.norm(vector))
+
+    collection = chromadb.EphemeralClient().create_collection(
+        "bench_mmr_hybrid", metadata={"hnsw:space": "ip"}
+    )
+    collection.add(ids=ids, embeddings=np.asarray(vectors).tolist(), documents=texts, metadatas=metadatas)
+    lexical_index = LexicalIndex()
+    lexical_index.add(ids, texts, metadatas)
+
+    # Relevance decays across groups, so the dense pool is dominated by group 0
+    weights = 0.8 ** np.arange(args.groups, dtype=np.float32)
+    query = (weights[:, None] * centroids).sum(axis=0)
+    query /= np.linalg.norm(query)
+    query_text = "topic0 upgrade steps"
+    mmr = RetrievalParams(mmr_lambda=args.lambda_mult, mmr_fetch_k=args.hybrid_candidates)
+
+    def mmr_before_fusion() -> List[Dict[str, Any]]:
+        dense = dense_search(query, collection, args.hybrid_candidates, mmr)
+        lexical = lexical_index.search(query_text, args.hybrid_candidates)
+        return reciprocal_rank_fusion([dense, lexical], top_k=args.k)
+
+    variants = {
+        "no_mmr": lambda: hybrid_search(
+            query_text, query, collection, lexical_index, args.k, args.hybrid_candidates
+        ),
+        "mmr_before_fusion": mmr_before_fusion,
+        "mmr_last": lambda: hybrid_search(
+            query_text, query, collection, lexical_index, args.k, args.hybrid_candidates, params=mmr
+        ),
+    }
+    rows = []
+    for name, search in variants.items():
+        groups = {chunk["metadata"]["group"] for chunk in search()}
+        latency = summarize(time_calls(search, args.iterations // 5, warmup=3))
+        rows.append({
+            "variant": name,
+            "k": args.k,
+            "candidates": args.hybrid_candidates,
+            "distinct_groups": len(groups),
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=7, help="Number of chunks selected")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--hybrid", action="store_true", help="Also benchmark MMR in hybrid retrieval")
+    parser.add_argument("--groups", type=int, default=10, help="Near-duplicate groups (--hybrid)")
+    parser.add_argument("--group-size", type=int, default=8, help="Chunks per group (--hybrid)")
+    parser.add_argument("--hybrid-candidates", type=int, default=20, help="Candidates per leg (--hybrid)")
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for count in args.candidates:
+        query = rng.standard_normal(args.dim).astype(np.float32)
+        candidates = rng.standard_normal((count, args.dim)).astype(np.float32)
+        candidate_lists = candidates.tolist()
+
+        select = summarize(time_calls(
+            lambda: maximal_marginal_relevance(query, candidates, args.k, args.lambda_mult),
+            args.iterations,
+        ))
+        from_lists = summarize(time_calls(
+            lambda: maximal_marginal_relevance(query, candidate_lists, args.k, args.lambda_mult),
+            args.iterations,
+        ))
+        rows.append({
+            "candidates": count,
+            "k": args.k,
+            "select_p50_ms": select["p50_ms"],
+            "select_p95_ms": select["p95_ms"],
+            "select_p99_ms": select["p99_ms"],
+            "from_lists_p50_ms": from_lists["p50_ms"],
+            "from_lists_p99_ms": from_lists["p99_ms"],
+            "within_budget": select["p99_ms"] <= BUDGET_MS,
+        })
+
+    print_table(rows, [
+        "candidates", "k", "select_p50_ms", "select_p95_ms", "select_p99_ms",
+        "from_lists_p50_ms", "from_lists_p99_ms", "within_budget",
+    ])
+    hybrid_rows = []
+    if args.hybrid:
+        hybrid_rows = bench_hybrid(args)
+        print()
+        print_table(hybrid_rows, ["variant", "k", "candidates", "distinct_groups", "p50_ms", "p95_ms"])
+    write_json(args.output, {"dim": args.dim, "budget_ms": BUDGET_MS, "results": rows, "hybrid": hybrid_rows})
+    return 0 if all(row["within_budget"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
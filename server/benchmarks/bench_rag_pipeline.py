@@ -0,0 +1,199 @@
+"""
+End-to-end RAG pipeline benchmark with a per-stage breakdown.
+
+Seeds a synthetic corpus into a temporary Chroma directory through
+`add_documents_to_vector_store` (chunked with the app's own splitter),
+replays a query set through `rag_pipeline` with the local `FakeChatModel`
+(no network) and reports throughput plus p50/p95/p99 for embedding,
+retrieval, reranking (when enabled), prompt building and generation.
+
+    cd server && python -m benchmarks.bench_rag_pipeline \\
+        [--docs 200] [--queries 200] [--hybrid] [--output results.json] \\
+        [--baseline previous.json]
+
+Results are written as JSON (with the git commit) so runs can be compared
+across commits with `--baseline`.
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.infra.document_loader import process_uploaded_file
+from app.infra.embeddings import initialize_embedding_model
+from app.infra.fake_llm import FakeChatModel
+from app.infra.lexical_index import LexicalIndex
+from app.infra.rag_engine import rag_pipeline
+from app.infra.vector_store import add_documents_to_vector_store, initialize_vector_store
+from benchmarks.common import (
+    compare_to_baseline,
+    print_table,
+    run_metadata,
+    summarize,
+    write_json,
+)
+
+STAGES = ["embedding_ms", "retrieval_ms", "rerank_ms", "prompt_ms", "generation_ms", "total_ms"]
+
+_TOPICS = [
+    "authentication", "billing", "deployment", "database", "search", "uploads",
+    "notifications", "permissions", "caching", "monitoring", "backups", "api",
+]
+_WORDS = (
+    "the service handles requests from users and stores results in the database "
+    "configuration changes require a restart of the worker process before they apply "
+    "errors are logged with a code and a short description for the support team "
+    "each release updates the documentation and migration notes for administrators"
+).split()
+
+
+def build_corpus(doc_count: int, paragraphs_per_doc: int, seed: int) -> List[Dict[str, Any]]:
+    """Synthetic documents with topic words and error codes, chunked like uploads."""
+    rng = random.Random(seed)
+    chunks: List[Dict[str, Any]] = []
+    for doc_idx in range(doc_count):
+        topic = _TOPICS[doc_idx % len(_TOPICS)]
+        paragraphs = []
+        for paragraph_idx in range(paragraphs_per_doc):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(60, 120))]
+            words.insert(rng.randrange(len(words)), topic)
+            words.insert(rng.randrange(len(words)), f"ERR-{doc_idx:04d}-{paragraph_idx}")
+            paragraphs.append(" ".join(words) + ".")
+        chunks.extend(
+            process_uploaded_file(
+                "\n\n".join(paragraphs),
+                f"synthetic-{doc_idx:04d}.txt",
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP,
+            )
+        )
+    return chunks
+
+
+def build_queries(query_count: int, doc_count: int, paragraphs_per_doc: int, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    templates = [
+        "How do I fix {code}?",
+        "What does the documentation say about {topic}?",
+        "Why does {topic} fail after a release with {code}?",
+        "Explain the {topic} configuration for administrators",
+    ]
+    queries = []
+    for _ in range(query_count):
+        doc_idx = rng.randrange(doc_count)
+        queries.append(
+            rng.choice(templates).format(
+                code=f"ERR-{doc_idx:04d}-{rng.randrange(paragraphs_per_doc)}",
+                topic=_TOPICS[doc_idx % len(_TOPICS)],
+            )
+        )
+    return queries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic documents to index")
+    parser.add_argument("--paragraphs", type=int, default=6, help="Paragraphs per document")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to replay")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K_RETRIEVAL)
+    parser.add_argument("--hybrid", action="store_true", help="Fuse BM25 with dense retrieval")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0, help="0 = instant")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    parser.add_argument("--baseline", help="Previous JSON result to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    try:
+        print(f"Loading embedding model {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})...")
+        embedding_model = initialize_embedding_model(
+            settings.EMBEDDING_MODEL,
+            backend=settings.EMBEDDING_BACKEND,
+            model_dir=settings.EMBEDDING_MODEL_DIR,
+            onnx_file=settings.EMBEDDING_ONNX_FILE,
+        )
+        _, collection = initialize_vector_store(persist_directory=workdir)
+        lexical_index = LexicalIndex() if args.hybrid else None
+
+        chunks = build_corpus(args.docs, args.paragraphs, args.seed)
+        start = time.perf_counter()
+        add_documents_to_vector_store(chunks, collection, embedding_model, lexical_index=lexical_index)
+        ingest_s = time.perf_counter() - start
+        print(f"Indexed {len(chunks)} chunks from {args.docs} documents in {ingest_s:.2f}s")
+
+        llm = FakeChatModel(
+            latency_ms=args.llm_latency_ms,
+            latency_jitter_ms=0.0,
+            tokens_per_second=args.llm_tokens_per_second,
+            seed=args.seed,
+        )
+        queries = build_queries(args.queries + args.warmup, args.docs, args.paragraphs, args.seed)
+
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        run_start = time.perf_counter()
+        for position, query in enumerate(queries):
+            start = time.perf_counter()
+            result = rag_pipeline(
+                query,
+                collection,
+                embedding_model,
+                llm,
+                top_k=args.top_k,
+                temperature=settings.LLM_TEMPERATURE,
+                lexical_index=lexical_index,
+            )
+            total_ms = (time.perf_counter() - start) * 1000.0
+            if position < args.warmup:
+                run_start = time.perf_counter()
+                continue
+            for stage, value in result["timings"].items():
+                samples.setdefault(stage, []).append(value)
+            samples["total_ms"].append(total_ms)
+        elapsed_s = time.perf_counter() - run_start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stages = {stage: summarize(values) for stage, values in samples.items() if values}
+    throughput = args.queries / elapsed_s if elapsed_s else 0.0
+
+    print_table(
+        [{"stage": stage, **summary} for stage, summary in stages.items()],
+        ["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"],
+    )
+    print(f"Throughput: {throughput:.1f} queries/s (sequential)")
+
+    if args.baseline:
+        rows = compare_to_baseline(stages, args.baseline)
+        print(f"\nCompared to {args.baseline}:")
+        print_table(rows, [
+            "stage", "baseline_p50_ms", "current_p50_ms", "p50_change_pct",
+            "baseline_p95_ms", "current_p95_ms", "p95_change_pct",
+        ])
+
+    write_json(args.output, {
+        "benchmark": "rag_pipeline",
+        "run": run_metadata(),
+        "config": {
+            **vars(args),
+            "chunks": len(chunks),
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "chunk_size": settings.CHUNK_SIZE,
+            "chunk_overlap": settings.CHUNK_OVERLAP,
+            "context_packing": settings.CONTEXT_PACKING_ENABLED,
+        },
+        "ingest_s": ingest_s,
+        "throughput_qps": throughput,
+        "stages": stages,
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Helpers shared by the benchmark scripts: timing, percentiles and reporting.
+"""
+
+from datetime import datetime, timezone
+import json
+import math
+import platform
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (`pct` in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of a list of millisecond samples."""
+    if not samples_ms:
+        return {"count": 0}
+    return {
+        "count": len(samples_ms),
+        "mean_ms": sum(samples_ms) / len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms),
+    }
+
+
+def time_calls(func: Callable[[], Any], iterations: int, warmup: int = 10) -> List[float]:
+    """Call `func` repeatedly and return per-call wall-clock times in ms."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    """Print rows as a fixed-width table (floats with 3 decimals)."""
+    def fmt(value: Any) -> str:
+        return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+    widths = {
+        column: max(len(column), *(len(fmt(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(fmt(row.get(column, "")).rjust(widths[column]) for column in columns))
+
+
+def write_json(path: Optional[str], payload: Dict[str, Any]) -> None:
+    """Write benchmark results as JSON when an output path is given."""
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Commit, interpreter and timestamp, so results can be compared across runs."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare_to_baseline(
+    current: Dict[str, Dict[str, float]],
+    baseline_path: str,
+    section: str = "stages",
+) -> List[Dict[str, Any]]:
+    """
+    Compare per-stage summaries against a previous JSON result file.
+
+    Returns rows with the baseline / current p50 and p95 and the relative
+    change in percent (negative is faster).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f).get(section, {})
+    rows = []
+    for stage, summary in current.items():
+        previous = baseline.get(stage)
+        if not previous or "p50_ms" not in summary or "p50_ms" not in previous:
+            continue
+        row: Dict[str, Any] = {"stage": stage}
+        for key in ("p50_ms", "p95_ms"):
+            row[f"baseline_{key}"] = previous[key]
+            row[f"current_{key}"] = summary[key]
+            row[f"{key[:3]}_change_pct"] = (
+                (summary[key] - previous[key]) / previous[key] * 100.0 if previous[key] else 0.0
+            )
+        rows.append(row)
+    return rows